@@ -0,0 +1,629 @@
+# benchmarks/run_benchmarks.py
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_ohlcv, session_timeline, write_dataset
+from run_sensitivity_report_of_backtester import build_strategies_from_json
+from src.backtester import Backtester, WeightedStrategy, suppress_all_output
+from src.event_engine import EventDrivenBacktester
+from src.execution_manager import ExecutionManager
+from src.logger_gateway import OrderLogger, SignalLogger
+from src.order import Order
+from src.order_book import OrderBook
+from src.order_manager import OrderManager
+from src.position_manager import PositionManager
+from src.price_manager import PriceManager
+from src.signals import Signal, SignalBundle
+from src.simulatedMatchingEngine import EngineBoard, SimulatedMatchingEngine, match_resting_orders
+from src.strategies import Strategy
+
+
+EXEC_CFG = {
+    "default_order_type": "MARKET",
+    "default_time_in_force": "GTC",
+    "max_positions": 10,
+    "max_symbol_weight": 0.2,
+    "min_position_value": 1000.0,
+    "min_trade_value": 500.0,
+    "base_weight_per_symbol": 0.03,
+    "weight_per_strength_unit": 0.02,
+    "max_strength_multiplier": 2.0,
+}
+RISK_CFG = {"max_orders_per_minute": 60, "max_position_size": 10_000, "allow_short": False}
+
+
+class NullLogger:
+    """Order logger that drops events, so engine timings exclude the CSV writes."""
+
+    def log_event(self, *args, **kwargs):
+        pass
+
+
+class NoOpStrategy(Strategy):
+    """Strategy that never signals, so event loop timings exclude the strategies."""
+
+    def generate_signals(self, tick):
+        return []
+
+
+class OrderChurn:
+    """
+    Timer callback of the event loop benchmark: every interval it sends a
+    far from market limit order for each of the next symbols and cancels
+    it cancel_after later, then schedules itself again until end_ns.
+    """
+
+    def __init__(self, bt: EventDrivenBacktester, symbols: List[str], per_timer: int,
+                 interval_ns: int, cancel_after_ns: int, end_ns: int):
+        self.bt = bt
+        self.symbols = symbols
+        self.per_timer = per_timer
+        self.interval_ns = interval_ns
+        self.cancel_after_ns = cancel_after_ns
+        self.end_ns = end_ns
+        self.next_symbol = 0
+
+    def __call__(self, ts_ns: int) -> None:
+        bt = self.bt
+        for _ in range(self.per_timer):
+            symbol = self.symbols[self.next_symbol]
+            self.next_symbol = (self.next_symbol + 1) % len(self.symbols)
+            bar = bt._last_bar.get(symbol)
+            if bar is None:
+                continue
+            price = round(float(bar["Close"]) * 0.9, 2)
+            order = make_order(symbol, "BUY", 10, price, "LIMIT", bar.name)
+            bt.submit_order(order)
+            bt.cancel_order(symbol, order.order_id, at=ts_ns + self.cancel_after_ns)
+        if ts_ns + self.interval_ns <= self.end_ns:
+            bt.schedule_timer(ts_ns + self.interval_ns, self)
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+def best_time(fn: Callable[[], None], repeat: int, setup: Optional[Callable[[], None]] = None) -> float:
+    """Fastest of repeat runs of fn, in seconds; setup runs untimed before each."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def result(name: str, ops: int, seconds: float, unit: str = "ops", **extra) -> dict:
+    return {
+        "name": name,
+        "ops": int(ops),
+        "unit": unit,
+        "seconds": seconds,
+        "ops_per_sec": ops / seconds if seconds > 0 else None,
+        **extra,
+    }
+
+
+def bar_series(n_bars: int, seed: int) -> List[pd.Series]:
+    df = generate_ohlcv(1, n_bars, seed=seed)["SYN0000"].set_index("Datetime")
+    return [bar for _, bar in df.iterrows()]
+
+
+def make_order(symbol: str, side: str, quantity: int, price: Optional[float], order_type: str, ts) -> Order:
+    return Order({
+        "symbol": symbol,
+        "side": side,
+        "quantity": quantity,
+        "price": price,
+        "order_type": order_type,
+        "timestamp": ts,
+        "time_in_force": "GTC",
+    })
+
+
+# ---------------------------------------------------------------------------
+# Components
+# ---------------------------------------------------------------------------
+
+def bench_price_manager(n_bars: int, repeat: int, seed: int) -> List[dict]:
+    bars = bar_series(n_bars, seed)
+    results = []
+
+    def update():
+        pm = PriceManager(max_history=200)
+        for bar in bars:
+            pm.update("SYN", bar)
+
+    results.append(result("price_manager.update", len(bars), best_time(update, repeat), "bars"))
+
+    pm = PriceManager(max_history=200)
+    for bar in bars[-200:]:
+        pm.update("SYN", bar)
+
+    calls = max(1, n_bars // 20)
+    indicators = {
+        "sma": lambda: pm.get_sma("SYN", 20),
+        "ema": lambda: pm.get_ema("SYN", 20),
+        "rsi": lambda: pm.get_rsi("SYN", 14),
+        "macd": lambda: pm.get_macd("SYN"),
+        "atr": lambda: pm.get_atr("SYN", 14),
+        "bollinger": lambda: pm.get_bollinger_bands("SYN", 20),
+        "volatility": lambda: pm.get_volatility("SYN", 20),
+    }
+    for name, call in indicators.items():
+        def run(call=call):
+            for _ in range(calls):
+                call()
+        results.append(result(f"price_manager.{name}", calls, best_time(run, repeat), "calls"))
+    return results
+
+
+def bench_order_book(n_orders: int, repeat: int, seed: int) -> List[dict]:
+    rng = np.random.default_rng(seed)
+    sides = np.where(rng.random(n_orders) < 0.5, "BUY", "SELL")
+    # bids below 100, asks above, on a 1 cent grid
+    offsets = np.round(rng.uniform(0.01, 5.0, n_orders), 2)
+    prices = np.where(sides == "BUY", 100.0 - offsets, 100.0 + offsets)
+    cancel_idx = rng.permutation(n_orders)[: n_orders // 2]
+    ts = pd.Timestamp("2025-01-06 14:30", tz="UTC")
+
+    state = {}
+
+    def setup_orders():
+        state["orders"] = [
+            make_order("SYN", side, 100, float(price), "LIMIT", ts)
+            for side, price in zip(sides, prices)
+        ]
+
+    def add():
+        book = OrderBook()
+        for order in state["orders"]:
+            book.add_order(order)
+        state["book"] = book
+
+    def setup_filled():
+        setup_orders()
+        add()
+
+    def cancel():
+        book = state["book"]
+        orders = state["orders"]
+        for i in cancel_idx:
+            book.cancel_order(orders[i].order_id)
+
+    def pop():
+        book = state["book"]
+        while book.pop_best_bid_order() is not None:
+            pass
+        while book.pop_best_ask_order() is not None:
+            pass
+
+    with suppress_all_output():
+        t_add = best_time(add, repeat, setup_orders)
+        t_cancel = best_time(cancel, repeat, setup_filled)
+        t_pop = best_time(pop, repeat, setup_filled)
+
+    return [
+        result("order_book.add", n_orders, t_add, "orders"),
+        result("order_book.cancel", len(cancel_idx), t_cancel, "orders"),
+        result("order_book.pop_best", n_orders, t_pop, "orders"),
+    ]
+
+
+def _engine(seed: int) -> SimulatedMatchingEngine:
+    with suppress_all_output():
+        return SimulatedMatchingEngine(
+            order_book=OrderBook(),
+            order_logger=NullLogger(),
+            position_manager=PositionManager(cash=1e12),
+            seed=seed,
+        )
+
+
+def bench_matching_engine(n_orders: int, n_bars: int, n_books: int, repeat: int, seed: int) -> List[dict]:
+    bars = bar_series(n_bars, seed)
+    bar = bars[0]
+    results = []
+    state = {}
+
+    def setup_market():
+        state["engine"] = _engine(seed)
+        state["orders"] = [
+            make_order("SYN", "BUY" if i % 2 == 0 else "SELL", 10, None, "MARKET", bar.name)
+            for i in range(n_orders)
+        ]
+
+    def market():
+        engine = state["engine"]
+        for order in state["orders"]:
+            engine.process_order(order, bar)
+
+    results.append(result(
+        "matching_engine.market_orders", n_orders, best_time(market, repeat, setup_market), "orders"
+    ))
+
+    # resting limit orders around the first close, matched by the following bars
+    close = float(bar["Close"])
+    n_limits = min(n_orders, 10_000)
+
+    def setup_limits():
+        rng = np.random.default_rng(seed)
+        engine = _engine(seed)
+        for i in range(n_limits):
+            side = "BUY" if i % 2 == 0 else "SELL"
+            offset = float(rng.uniform(0.001, 0.02)) * close
+            price = round(close - offset if side == "BUY" else close + offset, 2)
+            engine.process_order(make_order("SYN", side, 10, price, "LIMIT", bar.name), bar)
+        state["engine"] = engine
+
+    def check():
+        engine = state["engine"]
+        for b in bars[1:]:
+            engine.check_open_orders(b)
+
+    results.append(result(
+        "matching_engine.check_open_orders", len(bars) - 1, best_time(check, repeat, setup_limits), "bars",
+        resting_orders=n_limits,
+    ))
+
+    # one bar over many books, one in ten crossing
+    def setup_books():
+        engines = []
+        board = EngineBoard()
+        low, high = float(bars[0]["Low"]), float(bars[0]["High"])
+        for i in range(n_books):
+            engine = _engine(seed + i)
+            board.attach(engine)
+            side = "BUY" if i % 2 == 0 else "SELL"
+            # rests on bar 0, crosses bar 1 only if it is near the price
+            gap = 0.0005 if i % 10 == 0 else 0.2
+            price = round(low * (1 - gap) if side == "BUY" else high * (1 + gap), 2)
+            engine.process_order(make_order("SYN", side, 10, price, "LIMIT", bar.name), bar)
+            engines.append(engine)
+        state["engines"] = engines
+        state["board"] = board
+        state["slots"] = np.array([e.board_slot for e in engines])
+
+    def batch():
+        match_resting_orders(
+            state["engines"], [bars[1]] * n_books, board=state["board"], slots=state["slots"]
+        )
+
+    results.append(result(
+        "matching_engine.match_resting_orders", n_books, best_time(batch, repeat, setup_books), "books"
+    ))
+    return results
+
+
+def bench_signal_bundle(n_symbols: int, repeat: int, seed: int) -> List[dict]:
+    rng = np.random.default_rng(seed)
+    strategies = ["MomentumStrategy", "MovingAverageCrossoverStrategy", "RsiReversionStrategy"]
+    signals = [
+        Signal(
+            symbol=f"SYN{i:04d}",
+            side="BUY" if rng.random() < 0.5 else "SELL",
+            strength=float(rng.uniform(0.1, 2.0)),
+            source=strategy,
+        )
+        for i in range(n_symbols)
+        for strategy in strategies
+    ]
+    bundle = SignalBundle.from_signals(signals)
+    k = max(1, n_symbols // 10)
+
+    calls = {
+        "from_signals": lambda: SignalBundle.from_signals(signals),
+        "top_buys": lambda: bundle.top_buys(k),
+        "strongest_buy": lambda: bundle.strongest_buy_symbol(),
+        "normalized_rank": lambda: bundle.normalized("rank"),
+        "normalized_zscore": lambda: bundle.normalized("zscore"),
+    }
+    results = []
+    for name, call in calls.items():
+        n = 20
+
+        def run(call=call):
+            for _ in range(n):
+                call()
+        results.append(result(
+            f"signal_bundle.{name}.{n_symbols}_symbols", n, best_time(run, repeat), "bundles",
+            symbols=n_symbols, signals=len(signals),
+        ))
+    return results
+
+
+def bench_loggers(n_events: int, repeat: int, seed: int, log_dir: str) -> List[dict]:
+    ts = pd.Timestamp("2025-01-06 14:30", tz="UTC")
+    order = make_order("SYN", "BUY", 10, 100.0, "LIMIT", ts)
+    order.order_id = 1
+    signal = Signal(symbol="SYN", side="BUY", strength=1.0, source="MomentumStrategy")
+
+    with suppress_all_output():
+        order_logger = OrderLogger(log_dir)
+        signal_logger = SignalLogger(log_dir)
+
+    def orders():
+        for _ in range(n_events):
+            order_logger.log_event("FILLED", order, ts, fill_qty=10, fill_price=100.0)
+
+    def signals():
+        for _ in range(n_events):
+            signal_logger.log_signal(ts, signal)
+
+    return [
+        result("logger.order_event", n_events, best_time(orders, repeat), "events"),
+        result("logger.signal", n_events, best_time(signals, repeat), "events"),
+    ]
+
+
+# ---------------------------------------------------------------------------
+# End to end
+# ---------------------------------------------------------------------------
+
+def build_synthetic_backtester(
+    paths: Dict[str, str],
+    log_dir: str,
+    seed: int,
+    backtester_cls: type = Backtester,
+    noop_strategies: bool = False,
+    **kwargs,
+) -> Backtester:
+    """Backtester (or backtester_cls, given kwargs) over a write_dataset directory."""
+    with open(paths["market_data_config"], "r") as f:
+        market_cfg = json.load(f)
+    with open(paths["strategy_config"], "r") as f:
+        strat_cfg = json.load(f)
+    init_portfolio_cfg = {"cash": 200_000.0, "positions": {}}
+
+    pmgr = PositionManager.from_dict(init_portfolio_cfg)
+    pm = PriceManager(max_history=200)
+    order_logger = OrderLogger(log_dir)
+    signal_logger = SignalLogger(log_dir)
+    exec_mgr = ExecutionManager(
+        price_manager=pm,
+        position_manager=pmgr,
+        starting_cash=pmgr.get_cash(),
+        settings_dict=EXEC_CFG,
+    )
+    order_mgr = OrderManager.from_settings(
+        RISK_CFG,
+        initial_capital=pmgr.get_cash(),
+        order_logger=order_logger,
+    )
+    if noop_strategies:
+        strategies_by_symbol = {symbol: [WeightedStrategy(NoOpStrategy())] for symbol in strat_cfg}
+    else:
+        strategies_by_symbol = build_strategies_from_json(pm, strat_cfg)
+    return backtester_cls(
+        config_path=paths["market_data_config"],
+        price_manager=pm,
+        position_manager=pmgr,
+        strategies_by_symbol=strategies_by_symbol,
+        execution_manager=exec_mgr,
+        order_manager=order_mgr,
+        order_logger=order_logger,
+        signal_logger=signal_logger,
+        market_cfg=market_cfg,
+        strat_cfg=strat_cfg,
+        exec_cfg=EXEC_CFG,
+        init_portfolio_cfg=init_portfolio_cfg,
+        order_mgr_params=RISK_CFG,
+        suppress_output=True,
+        seed=seed,
+        **kwargs,
+    )
+
+
+def bench_backtester(n_symbols: int, n_bars: int, seed: int, work_dir: str) -> dict:
+    """One Backtester.run over synthetic data; bars/second counts symbol bars."""
+    data_dir = os.path.join(work_dir, f"data_{n_symbols}x{n_bars}")
+    log_dir = os.path.join(work_dir, "logs")
+    paths = write_dataset(data_dir, n_symbols, n_bars, seed=seed)
+
+    t0 = time.perf_counter()
+    with suppress_all_output():
+        bt = build_synthetic_backtester(paths, log_dir, seed)
+    t_load = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    bt.run()
+    t_run = time.perf_counter() - t0
+
+    return result(
+        f"backtester.run.{n_symbols}_symbols", n_symbols * n_bars, t_run, "bars",
+        symbols=n_symbols,
+        steps=n_bars,
+        steps_per_sec=n_bars / t_run if t_run > 0 else None,
+        load_seconds=t_load,
+        fills=len(bt.pmgr.trade_log),
+        end_equity=float(bt.equity_curve.values[-1]) if len(bt.equity_curve) else None,
+    )
+
+
+def bench_event_loop(n_symbols: int, n_bars: int, seed: int, work_dir: str, per_timer: int = 5) -> dict:
+    """
+    One EventDrivenBacktester.run over synthetic data with no-op strategies
+    and a timer that sends and cancels per_timer limit orders every 30
+    seconds, so the time is spent in the event queue and its handlers.
+    """
+    data_dir = os.path.join(work_dir, f"data_{n_symbols}x{n_bars}")
+    log_dir = os.path.join(work_dir, "logs")
+    paths = write_dataset(data_dir, n_symbols, n_bars, seed=seed)
+
+    with suppress_all_output():
+        bt = build_synthetic_backtester(
+            paths, log_dir, seed,
+            backtester_cls=EventDrivenBacktester,
+            noop_strategies=True,
+            order_latency="1s",
+            cancel_latency="1s",
+        )
+    # engines are built on first use and take the portfolio's logger
+    bt.portfolios[0].order_logger = NullLogger()
+
+    timeline = session_timeline(n_bars)
+    interval = pd.Timedelta("30s").value
+    churn = OrderChurn(
+        bt, bt.data_gateway.tickers(), min(per_timer, n_symbols),
+        interval_ns=interval,
+        cancel_after_ns=pd.Timedelta("20s").value,
+        end_ns=timeline[-1].value,
+    )
+    bt.schedule_timer(timeline[0].value + interval, churn)
+
+    t0 = time.perf_counter()
+    bt.run()
+    t_run = time.perf_counter() - t0
+
+    return result(
+        f"event_loop.run.{n_symbols}_symbols", bt.events_processed, t_run, "events",
+        symbols=n_symbols,
+        steps=n_bars,
+        orders_per_timer=churn.per_timer,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def print_results(results: List[dict], baseline: Optional[Dict[str, dict]] = None) -> None:
+    header = f"{'Benchmark':45s} {'ops/s':>14s} {'seconds':>10s}"
+    if baseline:
+        header += f" {'vs base':>9s}"
+    print(header)
+    print("-" * len(header))
+    for res in results:
+        rate = res["ops_per_sec"]
+        line = f"{res['name']:45s} {rate:14,.0f} {res['seconds']:10.4f}"
+        base = (baseline or {}).get(res["name"])
+        if base and base.get("ops_per_sec"):
+            line += f" {rate / base['ops_per_sec']:8.2f}x"
+        print(line)
+
+
+def parse_sizes(text: str) -> List[tuple]:
+    """"1:5000,100:500" -> [(1, 5000), (100, 500)] as (symbols, bars)."""
+    sizes = []
+    for part in text.split(","):
+        symbols, bars = part.split(":")
+        sizes.append((int(symbols), int(bars)))
+    return sizes
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks of the backtester components and end to end runs "
+                    "on synthetic market data."
+    )
+    parser.add_argument("--output", type=str, default="benchmarks/results.json",
+                        help="JSON file for the results (default benchmarks/results.json).")
+    parser.add_argument("--compare", type=str, default=None,
+                        help="Results JSON of an earlier run to compare against.")
+    parser.add_argument("--quick", action="store_true",
+                        help="Smaller sizes for a fast check.")
+    parser.add_argument("--only", type=str, default=None,
+                        help="Comma separated groups to run: price_manager, order_book, "
+                             "matching_engine, signal_bundle, loggers, backtester, event_loop.")
+    parser.add_argument("--backtests", type=str, default=None,
+                        help="End to end sizes as symbols:bars pairs "
+                             "(default 1:5000,100:500,1000:100).")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per component benchmark, the fastest is kept (default 3).")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of the synthetic data and the simulated fills (default 0).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    scale = 10 if args.quick else 1
+    backtests = parse_sizes(
+        args.backtests or ("1:1000,100:100,1000:60" if args.quick else "1:5000,100:500,1000:100")
+    )
+    groups = set(args.only.split(",")) if args.only else None
+    seed = args.seed
+
+    def wanted(group: str) -> bool:
+        return groups is None or group in groups
+
+    results: List[dict] = []
+    with tempfile.TemporaryDirectory(prefix="bt_bench_") as work_dir:
+        log_dir = os.path.join(work_dir, "logs")
+
+        if wanted("price_manager"):
+            print("Running price_manager ...")
+            results += bench_price_manager(20_000 // scale, args.repeat, seed)
+        if wanted("order_book"):
+            print("Running order_book ...")
+            results += bench_order_book(100_000 // scale, args.repeat, seed)
+        if wanted("matching_engine"):
+            print("Running matching_engine ...")
+            results += bench_matching_engine(50_000 // scale, 5_000 // scale, 1_000, args.repeat, seed)
+        if wanted("signal_bundle"):
+            print("Running signal_bundle ...")
+            for n_symbols in (10, 1_000):
+                results += bench_signal_bundle(n_symbols, args.repeat, seed)
+        if wanted("loggers"):
+            print("Running loggers ...")
+            results += bench_loggers(20_000 // scale, args.repeat, seed, log_dir)
+        if wanted("backtester"):
+            for n_symbols, n_bars in backtests:
+                print(f"Running backtester {n_symbols} symbols x {n_bars} bars ...")
+                results.append(bench_backtester(n_symbols, n_bars, seed, work_dir))
+        if wanted("event_loop"):
+            for n_symbols, n_bars in backtests:
+                print(f"Running event_loop {n_symbols} symbols x {n_bars} bars ...")
+                results.append(bench_event_loop(n_symbols, n_bars, seed, work_dir))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = {res["name"]: res for res in json.load(f)["results"]}
+
+    print()
+    print_results(results, baseline)
+
+    report = {"environment": environment(), "quick": args.quick, "seed": seed, "results": results}
+    out_dir = os.path.dirname(args.output)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# benchmarks/synthetic_data.py
+
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+CSV_COLUMNS = ["symbol", "Datetime", "Open", "High", "Low", "Close", "Volume", "trade_count", "vwap"]
+
+# strategies given to every synthetic symbol, as in strategy_config.json
+DEFAULT_STRATEGIES = [
+    {"class": "MomentumStrategy", "weight": 1.0, "params": {"period": 20, "threshold": 0.02}},
+    {"class": "MovingAverageCrossoverStrategy", "weight": 0.5, "params": {"fast": 10, "slow": 50}},
+    {"class": "RsiReversionStrategy", "weight": 1.0, "params": {"period": 14, "overbought": 70, "oversold": 30}},
+]
+
+
+def symbol_names(n_symbols: int) -> List[str]:
+    return [f"SYN{i:04d}" for i in range(n_symbols)]
+
+
+def session_timeline(
+    bars: int,
+    start: str = "2025-01-06 14:30",
+    session_bars: int = 390,
+    freq: str = "1min",
+) -> pd.DatetimeIndex:
+    """
+    UTC timestamps of bars minutes in sessions of session_bars bars, one
+    session per weekday, so consecutive sessions are separated by
+    overnight (and weekend) gaps.
+    """
+    n_sessions = -(-bars // session_bars)
+    days = pd.bdate_range(pd.Timestamp(start, tz="UTC"), periods=n_sessions, normalize=False).as_unit("ns")
+    offsets = pd.timedelta_range(0, periods=session_bars, freq=freq).as_unit("ns")
+    ts = (days.asi8[:, None] + offsets.asi8[None, :]).ravel()[:bars]
+    return pd.DatetimeIndex(ts.view("datetime64[ns]")).tz_localize("UTC").as_unit("ns")
+
+
+def generate_symbol(
+    rng: np.random.Generator,
+    timeline: pd.DatetimeIndex,
+    symbol: str,
+    session_bars: int = 390,
+    start_price: float = 100.0,
+    drift: float = 0.0,
+    vol_low: float = 0.0006,
+    vol_high: float = 0.002,
+    regime_switch: float = 0.002,
+    gap_vol: float = 0.01,
+    halt_rate: float = 0.0002,
+    halt_bars: int = 15,
+    mean_volume: float = 2_000.0,
+) -> pd.DataFrame:
+    """
+    Minute bars of one symbol.
+
+    Log prices follow a GBM whose per bar volatility switches between
+    vol_low and vol_high (a two state Markov chain with switch probability
+    regime_switch per bar). Each session opens with a N(0, gap_vol) jump.
+    With probability halt_rate per bar a halt of halt_bars bars starts:
+    halted bars repeat the last price with zero volume while the latent
+    price keeps moving, so trading resumes with a gap.
+    """
+    n = len(timeline)
+
+    regime = np.cumsum(rng.random(n) < regime_switch) % 2
+    sigma = np.where(regime == 1, vol_high, vol_low)
+    log_ret = (drift - 0.5 * sigma ** 2) + sigma * rng.standard_normal(n)
+
+    session_open = np.zeros(n, dtype=bool)
+    session_open[::session_bars] = True
+    session_open[0] = False
+    log_ret[session_open] += gap_vol * rng.standard_normal(int(session_open.sum()))
+
+    close = start_price * np.exp(np.cumsum(log_ret))
+    open_ = np.empty(n)
+    open_[0] = start_price
+    open_[1:] = close[:-1]
+    # a session opens at its gapped price
+    open_[session_open] = close[session_open] * np.exp(-sigma[session_open] * rng.standard_normal(int(session_open.sum())))
+
+    wick = sigma * np.abs(rng.standard_normal((2, n)))
+    high = np.maximum(open_, close) * (1.0 + wick[0])
+    low = np.minimum(open_, close) * (1.0 - wick[1])
+
+    activity = 1.0 + np.abs(log_ret) / sigma
+    volume = np.round(mean_volume * activity * rng.lognormal(0.0, 0.5, n))
+    trade_count = np.maximum(1.0, np.round(volume / rng.uniform(5.0, 15.0, n)))
+    vwap = (high + low + close) / 3.0
+
+    halted = np.zeros(n, dtype=bool)
+    for s in np.flatnonzero(rng.random(n) < halt_rate):
+        halted[s:s + halt_bars] = True
+    if halted.any():
+        # halted bars print the last traded close
+        last = np.maximum.accumulate(np.where(halted, -1, np.arange(n)))
+        flat = np.where(last >= 0, close[np.maximum(last, 0)], start_price)
+        for arr in (open_, high, low, close, vwap):
+            arr[halted] = flat[halted]
+        volume[halted] = 0.0
+        trade_count[halted] = 0.0
+
+    return pd.DataFrame({
+        "symbol": symbol,
+        "Datetime": timeline,
+        "Open": open_.round(4),
+        "High": high.round(4),
+        "Low": low.round(4),
+        "Close": close.round(4),
+        "Volume": volume,
+        "trade_count": trade_count,
+        "vwap": vwap.round(6),
+    }, columns=CSV_COLUMNS)
+
+
+def generate_ohlcv(
+    n_symbols: int,
+    bars: int,
+    seed: int = 0,
+    session_bars: int = 390,
+    **params,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Bars of n_symbols symbols on one shared timeline (the gateway expects
+    the same timestamps for every ticker). Symbol i always gets the same
+    data for a given seed, whatever n_symbols is; params go to
+    generate_symbol.
+    """
+    timeline = session_timeline(bars, session_bars=session_bars)
+    children = np.random.SeedSequence(seed).spawn(n_symbols)
+
+    data = {}
+    for symbol, child in zip(symbol_names(n_symbols), children):
+        rng = np.random.default_rng(child)
+        start_price = float(rng.uniform(20.0, 500.0))
+        data[symbol] = generate_symbol(
+            rng, timeline, symbol, session_bars=session_bars, start_price=start_price, **params
+        )
+    return data
+
+
+def write_dataset(
+    directory: str,
+    n_symbols: int,
+    bars: int,
+    seed: int = 0,
+    strategies: Optional[List[dict]] = None,
+    **params,
+) -> Dict[str, str]:
+    """
+    Write one CSV per symbol plus market_data_config.json and
+    strategy_config.json in the repo formats. Returns the config paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    data = generate_ohlcv(n_symbols, bars, seed=seed, **params)
+
+    market_cfg = []
+    for symbol, df in data.items():
+        path = os.path.join(directory, f"{symbol}.csv")
+        df.to_csv(path, index=False)
+        market_cfg.append({"ticker": symbol, "filepath": path})
+
+    strat_cfg = {symbol: strategies or DEFAULT_STRATEGIES for symbol in data}
+
+    paths = {
+        "market_data_config": os.path.join(directory, "market_data_config.json"),
+        "strategy_config": os.path.join(directory, "strategy_config.json"),
+    }
+    with open(paths["market_data_config"], "w") as f:
+        json.dump(market_cfg, f, indent=2)
+    with open(paths["strategy_config"], "w") as f:
+        json.dump(strat_cfg, f, indent=2)
+    return paths
@@ -15,6 +15,14 @@ CONFIG_PATH = "src/settings/market_data_config.json"
 STRATEGY_CONFIG_PATH = "src/settings/strategy_config.json"
 EXEC_SETTINGS_PATH = "src/settings/execution_settings.json"
 INITIAL_PORTFOLIO_PATH = "src/settings/initial_positions.json"
+RISK_SETTINGS_PATH = "src/settings/risk_settings.json"
+
+# seed for the simulated fills, None for a different run every time
+SEED = 0
+
+# directory for periodic checkpoints, None to disable; a run started with
+# checkpoints already in it resumes from the latest one
+CHECKPOINT_DIR = None
 
 
 def build_strategies_from_json(pm: PriceManager, strat_cfg: dict) -> dict:
@@ -57,10 +65,8 @@ def main():
     with open(INITIAL_PORTFOLIO_PATH, "r") as f:
         init_portfolio_cfg = json.load(f)
 
-    order_mgr_params = {
-        "max_orders_per_minute": 60,
-        "max_position_size": 10_000,
-    }
+    with open(RISK_SETTINGS_PATH, "r") as f:
+        order_mgr_params = json.load(f)
 
     # portfolio and price manager
     pmgr = PositionManager.from_json(INITIAL_PORTFOLIO_PATH)
@@ -81,10 +87,9 @@ def main():
         settings_dict=exec_cfg,
     )
 
-    order_mgr = OrderManager(
+    order_mgr = OrderManager.from_settings(
+        order_mgr_params,
         initial_capital=pmgr.get_cash(),
-        max_orders_per_minute=order_mgr_params["max_orders_per_minute"],
-        max_position_size=order_mgr_params["max_position_size"],
         order_logger=order_logger,
     )
 
@@ -103,8 +108,12 @@ def main():
         exec_cfg=exec_cfg,
         init_portfolio_cfg=init_portfolio_cfg,
         order_mgr_params=order_mgr_params,
+        seed=SEED,
+        checkpoint_dir=CHECKPOINT_DIR,
     )
 
+    if CHECKPOINT_DIR is not None:
+        bt.resume()
     bt.run()
 
     # equity by step index
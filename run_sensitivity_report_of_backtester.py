@@ -15,13 +15,17 @@ from src.execution_manager import ExecutionManager
 from src.order_manager import OrderManager
 from src.position_manager import PositionManager
 from src.logger_gateway import OrderLogger, SignalLogger
+from src.order import seed_order_ids
 from src import strategies as strat_mod
+from src.utills.performance import periods_per_year, returns_from_equity, sharpe_ratio
+from src.utills.bootstrap import sweep_bootstrap_report
 
 
 CONFIG_PATH = "src/settings/market_data_config.json"
 STRATEGY_CONFIG_PATH = "src/settings/strategy_config.json"
 EXEC_SETTINGS_PATH = "src/settings/execution_settings.json"
 INITIAL_PORTFOLIO_PATH = "src/settings/initial_positions.json"
+RISK_SETTINGS_PATH = "src/settings/risk_settings.json"
 
 
 # ---------------------------------------------------------------------------
@@ -74,6 +78,12 @@ def load_base_configs() -> Tuple[dict, dict, dict, dict]:
     return market_cfg, strat_cfg, exec_cfg, init_portfolio_cfg
 
 
+def load_risk_settings(path: str = RISK_SETTINGS_PATH) -> dict:
+    """OrderManager risk settings: position limit and order rate limits."""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
 # ---------------------------------------------------------------------------
 # Annualized Sharpe, same logic as Backtester._final_report
 # ---------------------------------------------------------------------------
@@ -82,41 +92,16 @@ def compute_annualized_sharpe(eq_df: pd.DataFrame) -> Optional[float]:
     if eq_df.empty:
         return None
 
-    series = eq_df["equity"]
-    rets = series.pct_change().dropna()
-
-    if rets.empty:
-        return None
-
-    per_period_vol = rets.std()
-    per_period_ret = rets.mean()
-
-    if per_period_vol == 0:
-        return None
-
-    diffs = eq_df.index.to_series().diff().dropna()
-    if diffs.empty:
-        return None
-
-    dt_sec = diffs.dt.total_seconds().median()
-    if dt_sec <= 0:
-        return None
-
-    seconds_per_year = 365.0 * 24.0 * 60.0 * 60.0
-    periods_per_year = seconds_per_year / dt_sec
-
-    if periods_per_year <= 0:
-        return None
-
-    ann_sharpe = (per_period_ret / per_period_vol) * (periods_per_year ** 0.5)
-    return float(ann_sharpe)
+    equity = eq_df["equity"].to_numpy(dtype=float)
+    timestamps = eq_df.index.as_unit("ns").asi8
+    return sharpe_ratio(returns_from_equity(equity), periods_per_year(timestamps))
 
 
 # ---------------------------------------------------------------------------
 # Core runner for one backtest
 # ---------------------------------------------------------------------------
 
-def run_single_backtest(
+def build_backtester(
     market_cfg: dict,
     strat_cfg: dict,
     exec_cfg: dict,
@@ -124,24 +109,39 @@ def run_single_backtest(
     order_mgr_params: Dict[str, Any] | None = None,
     config_path: str = CONFIG_PATH,
     initial_portfolio_path: str = INITIAL_PORTFOLIO_PATH,
-) -> Tuple[Optional[float], pd.DataFrame, pd.DataFrame]:
+    suppress_output: bool = False,
+    start=None,
+    end=None,
+    warmup_bars: int | None = None,
+    seed: int | None = None,
+    symbols: List[str] | None = None,
+    run_id: int | None = None,
+) -> Backtester:
     """
-    Returns (annualized_sharpe, equity_curve_df, trade_df).
+    Backtester for the given configs. With initial_portfolio_path None the
+    portfolio comes from init_portfolio_cfg; symbols restricts the data
+    and strategies to those tickers. run_id, for runs in parallel workers,
+    gives the run its own order id range and log files.
     """
-
     if order_mgr_params is None:
-        order_mgr_params = {
-            "max_orders_per_minute": 60,
-            "max_position_size": 10_000,
-        }
+        order_mgr_params = load_risk_settings()
 
-    pmgr = PositionManager.from_json(initial_portfolio_path)
+    if initial_portfolio_path is None:
+        pmgr = PositionManager.from_dict(init_portfolio_cfg)
+    else:
+        pmgr = PositionManager.from_json(initial_portfolio_path)
     pm = PriceManager(max_history=200)
 
+    if symbols is not None:
+        strat_cfg = {sym: entries for sym, entries in strat_cfg.items() if sym in symbols}
     strategies_by_symbol = build_strategies_from_json(pm, strat_cfg)
 
-    order_logger = OrderLogger()
-    signal_logger = SignalLogger()
+    suffix = ""
+    if run_id is not None:
+        seed_order_ids(run_id)
+        suffix = f"run{run_id}"
+    order_logger = OrderLogger(suffix=suffix)
+    signal_logger = SignalLogger(suffix=suffix)
 
     exec_mgr = ExecutionManager(
         price_manager=pm,
@@ -150,14 +150,13 @@ def run_single_backtest(
         settings_dict=exec_cfg,
     )
 
-    order_mgr = OrderManager(
+    order_mgr = OrderManager.from_settings(
+        order_mgr_params,
         initial_capital=pmgr.get_cash(),
-        max_orders_per_minute=order_mgr_params["max_orders_per_minute"],
-        max_position_size=order_mgr_params["max_position_size"],
         order_logger=order_logger,
     )
 
-    bt = Backtester(
+    return Backtester(
         config_path=config_path,
         price_manager=pm,
         position_manager=pmgr,
@@ -171,13 +170,54 @@ def run_single_backtest(
         exec_cfg=exec_cfg,
         init_portfolio_cfg=init_portfolio_cfg,
         order_mgr_params=order_mgr_params,
+        suppress_output=suppress_output,
+        start=start,
+        end=end,
+        warmup_bars=warmup_bars,
+        seed=seed,
+        symbols=symbols,
     )
 
+
+def run_single_backtest(
+    market_cfg: dict,
+    strat_cfg: dict,
+    exec_cfg: dict,
+    init_portfolio_cfg: dict,
+    order_mgr_params: Dict[str, Any] | None = None,
+    config_path: str = CONFIG_PATH,
+    initial_portfolio_path: str = INITIAL_PORTFOLIO_PATH,
+    return_frames: bool = True,
+    seed: int | None = None,
+) -> Tuple[Optional[float], Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """
+    Returns (annualized_sharpe, equity_curve_df, trade_df).
+
+    The Sharpe ratio comes from the backtester's running stats. If
+    return_frames is False the DataFrames are not built and None is
+    returned in their place.
+    """
+    bt = build_backtester(
+        market_cfg=market_cfg,
+        strat_cfg=strat_cfg,
+        exec_cfg=exec_cfg,
+        init_portfolio_cfg=init_portfolio_cfg,
+        order_mgr_params=order_mgr_params,
+        config_path=config_path,
+        initial_portfolio_path=initial_portfolio_path,
+        seed=seed,
+    )
     bt.run()
 
+    sharpe = bt.get_performance_summary().get("sharpe")
+    if sharpe is not None:
+        sharpe = float(sharpe)
+
+    if not return_frames:
+        return sharpe, None, None
+
     eq_df = bt.get_equity_curve_dataframe()
     trade_df = bt.get_trade_dataframe()
-    sharpe = compute_annualized_sharpe(eq_df)
 
     return sharpe, eq_df, trade_df
 
@@ -201,7 +241,12 @@ def run_backtest_job(job: dict) -> dict:
         "init_portfolio_cfg": dict,
         "order_mgr_params": dict,
         "cache": proxy dict,
-    }
+      }
+
+    Optional keys: "run_id" (unique per job) separates the order ids and
+    log files of parallel jobs, "seed" seeds the simulated fills, "start", "end",
+    "warmup_bars" restrict the run to a time window, "suppress_output" mutes the backtest prints and
+    "return_equity" adds the equity arrays to the result.
     """
 
     import json as _json
@@ -247,33 +292,172 @@ def run_backtest_job(job: dict) -> dict:
                     params[param_y] = value_y
                     entry["params"] = params
 
+    window = {
+        "start": job.get("start"),
+        "end": job.get("end"),
+        "warmup_bars": job.get("warmup_bars"),
+    }
+
     key_obj = {
         "market_cfg": mc,
         "strat_cfg": sc,
         "exec_cfg": ec,
         "init_portfolio_cfg": ic,
+        "window": window,
+        "seed": job.get("seed"),
     }
     key = _json.dumps(key_obj, sort_keys=True)
 
     if key in cache:
-        sharpe = cache[key]
+        cached = cache[key]
     else:
-        sharpe, _, _ = run_single_backtest(
+        bt = build_backtester(
             market_cfg=mc,
             strat_cfg=sc,
             exec_cfg=ec,
             init_portfolio_cfg=ic,
             order_mgr_params=order_mgr_params,
+            suppress_output=job.get("suppress_output", False),
+            seed=job.get("seed"),
+            run_id=job.get("run_id"),
+            **window,
         )
-        cache[key] = sharpe
+        bt.run()
+        metrics = bt.get_performance_summary()
+        sharpe = metrics.get("sharpe")
+        cached = {
+            "sharpe": float(sharpe) if sharpe is not None else None,
+            "metrics": metrics,
+            # per bar returns, kept for the bootstrap
+            "returns": returns_from_equity(bt.equity_curve.values),
+            "ppy": periods_per_year(bt.equity_curve.timestamps),
+            "equity": (
+                bt.equity_curve.timestamps.copy(),
+                bt.equity_curve.values.copy(),
+            ),
+        }
+        cache[key] = cached
 
     return {
         "block": job["block"],
         "coord": coord,
-        "sharpe": sharpe,
+        "seed": job.get("seed"),
+        "sharpe": cached["sharpe"],
+        "metrics": cached["metrics"],
+        "returns": cached["returns"] if job.get("bootstrap") else None,
+        "ppy": cached["ppy"],
+        "equity": cached["equity"] if job.get("return_equity") else None,
     }
 
 
+# ---------------------------------------------------------------------------
+# Bootstrap confidence intervals across all runs of the sweep
+# ---------------------------------------------------------------------------
+
+def _run_label(res: dict) -> str:
+    coord = res["coord"]
+    if res["block"] == "execution_sensitivity":
+        vals = f"wpsu={coord['weight_per_strength_unit']}, msw={coord['max_symbol_weight']}"
+    elif "weight" in coord:
+        vals = f"{coord['class_name']} weight={coord['weight']}"
+    else:
+        vals = (
+            f"{coord['class_name']} {coord['param_x']}={coord['value_x']}, "
+            f"{coord['param_y']}={coord['value_y']}"
+        )
+    return vals
+
+
+def print_bootstrap_report(
+    results_by_block: Dict[str, List[dict]],
+    n_resamples: int,
+    mean_block: Optional[float] = None,
+) -> None:
+    runs: Dict[str, Any] = {}
+    ppy = 0.0
+    for block_results in results_by_block.values():
+        for r in block_results:
+            if r.get("returns") is None or len(r["returns"]) < 2:
+                continue
+            runs.setdefault(_run_label(r), r["returns"])
+            ppy = max(ppy, r["ppy"])
+
+    if len(runs) < 2:
+        print("\nNot enough runs with returns for a bootstrap.")
+        return
+
+    ci_df, prob_df = sweep_bootstrap_report(
+        runs,
+        ppy=ppy,
+        n_resamples=n_resamples,
+        mean_block=mean_block,
+        seed=0,
+    )
+    ci_df = ci_df.sort_values("sharpe_median", ascending=False)
+    best = ci_df.index[0]
+    ci_df["p_beats_best"] = prob_df.loc[ci_df.index, best]
+
+    print("\n==============================")
+    print(f"Bootstrap Sharpe 95% CI ({n_resamples} resamples, {len(runs)} configs)")
+    print("==============================")
+    print(ci_df)
+
+    print("\n==============================")
+    print("Probability row config beats column config")
+    print("==============================")
+    print(prob_df.loc[ci_df.index, ci_df.index])
+
+
+# ---------------------------------------------------------------------------
+# Monte Carlo over fill seeds
+# ---------------------------------------------------------------------------
+
+def run_monte_carlo(
+    n_seeds: int,
+    base_seed: int,
+    market_cfg: dict,
+    strat_cfg: dict,
+    exec_cfg: dict,
+    init_portfolio_cfg: dict,
+    order_mgr_params: Dict[str, Any],
+    processes: Optional[int] = None,
+) -> pd.DataFrame:
+    """Run the same config with n_seeds seeds; one row of metrics per seed."""
+    jobs = [
+        {
+            "block": "monte_carlo",
+            "kind": "base",
+            "coord": {},
+            "seed": base_seed + i,
+            "run_id": i,
+            "market_cfg": market_cfg,
+            "strat_cfg": strat_cfg,
+            "exec_cfg": exec_cfg,
+            "init_portfolio_cfg": init_portfolio_cfg,
+            "order_mgr_params": order_mgr_params,
+            "suppress_output": True,
+            "cache": {},
+        }
+        for i in range(n_seeds)
+    ]
+
+    rows = []
+    with mp.Pool(processes=processes) as pool:
+        for idx, res in enumerate(pool.imap_unordered(run_backtest_job, jobs), start=1):
+            print(f"Completed {idx} / {n_seeds} seeds")
+            m = res["metrics"]
+            rows.append({
+                "seed": res["seed"],
+                "sharpe": res["sharpe"],
+                "total_return": m.get("total_return"),
+                "max_drawdown": m.get("max_drawdown"),
+                "end_equity": m.get("end_equity"),
+                "num_fills": m.get("num_fills"),
+            })
+
+    return pd.DataFrame(rows).set_index("seed").sort_index()
+
+
 # ---------------------------------------------------------------------------
 # Argument parsing
 # ---------------------------------------------------------------------------
@@ -296,6 +480,41 @@ def parse_args() -> argparse.Namespace:
         help="Number of worker processes for multiprocessing "
              "(default uses mp.Pool default).",
     )
+    parser.add_argument(
+        "--metric",
+        type=str,
+        default="sharpe",
+        help="Metric shown in the tables, any key of "
+             "src.utills.performance.performance_summary (default sharpe).",
+    )
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=0,
+        help="Number of bootstrap resamples for Sharpe confidence intervals "
+             "and the outperformance matrix (0 disables, e.g. 5000).",
+    )
+    parser.add_argument(
+        "--block-length",
+        type=float,
+        default=None,
+        help="Mean block length for the stationary bootstrap "
+             "(default n ** (1/3)).",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed for the simulated fills, shared by every job so grid "
+             "cells differ only in their settings (default 0).",
+    )
+    parser.add_argument(
+        "--monte-carlo",
+        type=int,
+        default=0,
+        help="Instead of the sweep, run the base config with this many "
+             "seeds (seed, seed + 1, ...) and print the outcome distribution.",
+    )
     return parser.parse_args()
 
 
@@ -315,10 +534,26 @@ def main():
             raise ValueError("strategy_config.json is empty, cannot infer symbol.")
         symbol = next(iter(strat_cfg.keys()))
 
-    order_mgr_params = {
-        "max_orders_per_minute": 60,
-        "max_position_size": 10_000,
-    }
+    order_mgr_params = load_risk_settings()
+
+    if args.monte_carlo > 0:
+        mc_df = run_monte_carlo(
+            n_seeds=args.monte_carlo,
+            base_seed=args.seed,
+            market_cfg=market_cfg,
+            strat_cfg=strat_cfg,
+            exec_cfg=exec_cfg,
+            init_portfolio_cfg=init_portfolio_cfg,
+            order_mgr_params=order_mgr_params,
+            processes=args.processes,
+        )
+        print("\n==============================")
+        print(f"Monte Carlo over {args.monte_carlo} fill seeds")
+        print("==============================")
+        print(mc_df)
+        print("\nDistribution:")
+        print(mc_df.describe(percentiles=[0.05, 0.25, 0.5, 0.75, 0.95]).T)
+        return
 
     # Example grids, edit as desired
 
@@ -446,14 +681,21 @@ def main():
     with mp.Manager() as manager:
         cache = manager.dict()
 
-        for job in jobs:
+        for i, job in enumerate(jobs):
+            job["run_id"] = i
             job["cache"] = cache
+            job["bootstrap"] = args.bootstrap > 0
+            job["seed"] = args.seed
 
         results_by_block: Dict[str, List[dict]] = {}
 
         with mp.Pool(processes=args.processes) as pool:
             for idx, res in enumerate(pool.imap_unordered(run_backtest_job, jobs), start=1):
                 print(f"Completed {idx} / {total_runs} backtests")
+                if args.metric == "sharpe":
+                    res["value"] = res["sharpe"]
+                else:
+                    res["value"] = res["metrics"].get(args.metric)
                 block = res["block"]
                 results_by_block.setdefault(block, []).append(res)
 
@@ -465,7 +707,7 @@ def main():
         for r in exec_results:
             c = r["coord"]
             key = (c["weight_per_strength_unit"], c["max_symbol_weight"])
-            exec_map[key] = r["sharpe"]
+            exec_map[key] = r["value"]
 
         exec_data = []
         for wpsu in weight_per_strength_unit_values:
@@ -494,9 +736,9 @@ def main():
             weight_map: Dict[float, Optional[float]] = {}
             for r in block_results:
                 w = r["coord"]["weight"]
-                weight_map[w] = r["sharpe"]
+                weight_map[w] = r["value"]
             data = [weight_map.get(w) for w in strategy_weight_values]
-            df = pd.DataFrame({"sharpe": data}, index=strategy_weight_values)
+            df = pd.DataFrame({args.metric: data}, index=strategy_weight_values)
             df.index.name = f"{symbol}_{class_name}_weight"
             dfs[f"Weight_{class_name}"] = df
 
@@ -506,7 +748,7 @@ def main():
         for r in mom_results:
             c = r["coord"]
             key = (c["value_x"], c["value_y"])
-            mom_map[key] = r["sharpe"]
+            mom_map[key] = r["value"]
         mom_data = []
         for period in momentum_period_values:
             row = []
@@ -528,7 +770,7 @@ def main():
         for r in mac_results:
             c = r["coord"]
             key = (c["value_x"], c["value_y"])
-            mac_map[key] = r["sharpe"]
+            mac_map[key] = r["value"]
         mac_data = []
         for fast in mac_fast_values:
             row = []
@@ -550,7 +792,7 @@ def main():
         for r in rsi_results:
             c = r["coord"]
             key = (c["value_x"], c["value_y"])
-            rsi_map[key] = r["sharpe"]
+            rsi_map[key] = r["value"]
         rsi_data = []
         for ob in rsi_overbought_values:
             row = []
@@ -603,6 +845,9 @@ def main():
     print("==============================")
     print(dfs["Params_RsiReversionStrategy"])
 
+    if args.bootstrap > 0:
+        print_bootstrap_report(results_by_block, args.bootstrap, args.block_length)
+
 
 if __name__ == "__main__":
     main()
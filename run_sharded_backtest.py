@@ -0,0 +1,252 @@
+# run_sharded_backtest.py
+
+import heapq
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import multiprocessing as mp
+
+from run_sensitivity_report_of_backtester import (
+    build_backtester,
+    load_base_configs,
+    load_risk_settings,
+)
+from src.utills.performance import attribution, performance_summary, TRADE_COLUMNS
+
+
+# ---------------------------------------------------------------------------
+# Partitioning
+# ---------------------------------------------------------------------------
+
+def count_bars(market_cfg: List[dict]) -> Dict[str, int]:
+    """Number of data rows per ticker, used as the cost of a symbol."""
+    counts = {}
+    for entry in market_cfg:
+        with open(entry["filepath"], "rb") as f:
+            counts[entry["ticker"]] = max(sum(1 for _ in f) - 1, 0)
+    return counts
+
+
+def partition_symbols(costs: Dict[str, int], n_shards: int) -> List[List[str]]:
+    """
+    Split symbols into at most n_shards groups of similar total cost.
+
+    Greedy longest-first: symbols are taken in decreasing cost and each
+    goes to the currently cheapest shard. Symbols keep their config order
+    inside a shard and empty shards are dropped.
+    """
+    order = {sym: i for i, sym in enumerate(costs)}
+    n_shards = max(1, min(n_shards, len(costs)))
+
+    heap = [(0, i) for i in range(n_shards)]
+    shards: List[List[str]] = [[] for _ in range(n_shards)]
+    for sym in sorted(costs, key=lambda s: (-costs[s], order[s])):
+        load, i = heapq.heappop(heap)
+        shards[i].append(sym)
+        heapq.heappush(heap, (load + costs[sym], i))
+
+    return [sorted(shard, key=order.get) for shard in shards if shard]
+
+
+def shard_portfolio(init_portfolio_cfg: dict, symbols: List[str], n_symbols: int) -> dict:
+    """
+    Initial portfolio of a shard: the starting positions of its symbols
+    and a share of the cash proportional to its number of symbols.
+    """
+    cfg = dict(init_portfolio_cfg)
+    cfg["cash"] = float(init_portfolio_cfg.get("cash", 0.0)) * len(symbols) / n_symbols
+    positions = init_portfolio_cfg.get("positions", {})
+    cfg["positions"] = {sym: pos for sym, pos in positions.items() if sym in symbols}
+    return cfg
+
+
+def initial_equity(portfolio_cfg: dict) -> float:
+    """Cash plus starting positions at cost, the value of a shard before its first bar."""
+    value = float(portfolio_cfg.get("cash", 0.0))
+    for pos in portfolio_cfg.get("positions", {}).values():
+        value += pos.get("quantity", 0.0) * pos.get("avg_price", 0.0)
+    return value
+
+
+def shard_seed(seed: Optional[int], shard: int) -> Optional[int]:
+    """Independent seed per shard, so shards do not reuse the same fill draws."""
+    if seed is None:
+        return None
+    return int(np.random.SeedSequence([seed, shard]).generate_state(1)[0])
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+def run_shard_job(job: dict) -> dict:
+    """
+    Worker function for one shard.
+
+    Expects:
+      job = {
+        "shard": int,
+        "symbols": list of tickers,
+        "market_cfg": dict,
+        "strat_cfg": dict,
+        "exec_cfg": dict,
+        "init_portfolio_cfg": dict (already the shard's portfolio),
+        "order_mgr_params": dict,
+        "seed": int | None,
+      }
+    """
+    bt = build_backtester(
+        market_cfg=job["market_cfg"],
+        strat_cfg=job["strat_cfg"],
+        exec_cfg=job["exec_cfg"],
+        init_portfolio_cfg=job["init_portfolio_cfg"],
+        order_mgr_params=job["order_mgr_params"],
+        initial_portfolio_path=None,
+        suppress_output=True,
+        seed=job["seed"],
+        symbols=job["symbols"],
+        run_id=job["shard"],
+    )
+    bt.run()
+
+    return {
+        "shard": job["shard"],
+        "symbols": job["symbols"],
+        "initial_equity": initial_equity(job["init_portfolio_cfg"]),
+        "metrics": bt.get_performance_summary(),
+        "equity": (
+            bt.equity_curve.timestamps.copy(),
+            bt.equity_curve.values.copy(),
+        ),
+        "trades": bt.get_trade_arrays(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Merging
+# ---------------------------------------------------------------------------
+
+def merge_equity(results: List[dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum of the shard equity curves on the union of their timestamps. A
+    shard holds its last value between its own bars and its initial
+    equity before its first bar.
+    """
+    curves = [res["equity"] for res in results if len(res["equity"][0])]
+    if not curves:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    ts = np.unique(np.concatenate([t for t, _ in curves]))
+    total = np.zeros(len(ts), dtype=np.float64)
+    for res in results:
+        shard_ts, shard_eq = res["equity"]
+        if len(shard_ts) == 0:
+            total += res["initial_equity"]
+            continue
+        idx = np.searchsorted(shard_ts, ts, side="right") - 1
+        total += np.where(idx >= 0, shard_eq[np.maximum(idx, 0)], res["initial_equity"])
+    return ts, total
+
+
+def merge_trades(results: List[dict]) -> Dict[str, np.ndarray]:
+    """Shard trade logs concatenated in timestamp order (stable across shards)."""
+    parts = [res["trades"] for res in results if len(res["trades"]["timestamp"])]
+    if not parts:
+        return {col: np.empty(0) for col in TRADE_COLUMNS}
+
+    merged = {col: np.concatenate([np.asarray(p[col]) for p in parts]) for col in TRADE_COLUMNS}
+    order = np.argsort(merged["timestamp"], kind="stable")
+    return {col: values[order] for col, values in merged.items()}
+
+
+# ---------------------------------------------------------------------------
+# Argument parsing
+# ---------------------------------------------------------------------------
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Sharded backtest: every shard of symbols runs as an independent "
+                    "sub-portfolio in its own process, results are merged afterwards."
+    )
+    parser.add_argument("--shards", type=int, default=None,
+                        help="Number of shards (default: one per symbol).")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for the simulated fills (default 0).")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Number of worker processes (default uses mp.Pool default).")
+    return parser.parse_args()
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    args = parse_args()
+
+    market_cfg, strat_cfg, exec_cfg, init_portfolio_cfg = load_base_configs()
+    order_mgr_params = load_risk_settings()
+
+    costs = count_bars(market_cfg)
+    shards = partition_symbols(costs, args.shards or len(costs))
+    print(f"Shards: {len(shards)} over {len(costs)} symbols")
+
+    jobs = []
+    for i, symbols in enumerate(shards):
+        jobs.append({
+            "shard": i,
+            "symbols": symbols,
+            "market_cfg": market_cfg,
+            "strat_cfg": strat_cfg,
+            "exec_cfg": exec_cfg,
+            "init_portfolio_cfg": shard_portfolio(init_portfolio_cfg, symbols, len(costs)),
+            "order_mgr_params": order_mgr_params,
+            "seed": shard_seed(args.seed, i),
+        })
+
+    results: List[Optional[dict]] = [None] * len(jobs)
+    with mp.Pool(processes=args.processes) as pool:
+        for idx, res in enumerate(pool.imap_unordered(run_shard_job, jobs), start=1):
+            print(f"Completed {idx} / {len(jobs)} shards")
+            results[res["shard"]] = res
+
+    rows = []
+    for res in results:
+        metrics = res["metrics"]
+        rows.append({
+            "shard": res["shard"],
+            "symbols": ",".join(res["symbols"]),
+            "initial_equity": res["initial_equity"],
+            "end_equity": metrics.get("end_equity"),
+            "total_return": metrics.get("total_return"),
+            "sharpe": metrics.get("sharpe"),
+            "max_drawdown": metrics.get("max_drawdown"),
+            "num_fills": metrics.get("num_fills"),
+        })
+
+    print("\n==============================")
+    print("Shards")
+    print("==============================")
+    print(pd.DataFrame(rows).set_index("shard"))
+
+    ts, eq = merge_equity(results)
+    trades = merge_trades(results)
+    summary = performance_summary(eq, ts, trades)
+
+    print("\n==============================")
+    print("Combined portfolio performance")
+    print("==============================")
+    for key, value in summary.items():
+        print(f"{key:25s} {value}")
+
+    for by in ("symbol", "strategy"):
+        print("\n==============================")
+        print(f"Attribution by {by}")
+        print("==============================")
+        print(attribution(trades, by=by))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+# run_walk_forward.py
+
+import json
+import argparse
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import multiprocessing as mp
+
+from run_sensitivity_report_of_backtester import (
+    CONFIG_PATH,
+    load_base_configs,
+    load_risk_settings,
+    run_backtest_job,
+)
+from src.utills.performance import performance_summary
+
+
+# ---------------------------------------------------------------------------
+# Timeline and windows
+# ---------------------------------------------------------------------------
+
+def load_timeline(config_path: str = CONFIG_PATH) -> pd.DatetimeIndex:
+    """Sorted union of the bar timestamps of all configured tickers."""
+    with open(config_path, "r") as f:
+        config = json.load(f)
+
+    timeline = None
+    for entry in config:
+        idx = pd.DatetimeIndex(
+            pd.read_csv(entry["filepath"], usecols=["Datetime"], parse_dates=["Datetime"])["Datetime"]
+        )
+        timeline = idx if timeline is None else timeline.union(idx)
+    return timeline.sort_values().unique().as_unit("ns")
+
+
+def build_windows(
+    timeline: pd.DatetimeIndex,
+    train: pd.Timedelta,
+    test: pd.Timedelta,
+    step: Optional[pd.Timedelta] = None,
+    anchored: bool = False,
+) -> List[Dict[str, pd.Timestamp]]:
+    """
+    Consecutive train/test windows over the timeline.
+
+    Each test window starts where its train window ends; windows advance by
+    step (default: the test length). With anchored=True every train window
+    starts at the beginning of the data. Boundaries are snapped to bars by
+    binary search and windows without test bars are dropped.
+    """
+    if step is None:
+        step = test
+
+    ts = timeline.as_unit("ns").asi8
+    first = timeline[0]
+    last = timeline[-1]
+
+    windows = []
+    test_start = first + train
+    while test_start <= last:
+        test_end = test_start + test
+        train_start = first if anchored else test_start - train
+
+        lo = ts.searchsorted(test_start.value, side="left")
+        hi = ts.searchsorted(test_end.value, side="left")
+        if hi > lo:
+            windows.append({
+                "train_start": train_start,
+                "train_end": test_start,
+                "test_start": test_start,
+                "test_end": test_end,
+            })
+        test_start = test_start + step
+
+    return windows
+
+
+# ---------------------------------------------------------------------------
+# Jobs
+# ---------------------------------------------------------------------------
+
+def _window_job(
+    base: dict,
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    kind: str,
+    coord: dict,
+    block: str,
+    warmup_bars: Optional[int],
+    run_id: int,
+) -> dict:
+    job = dict(base)
+    job.update({
+        "block": block,
+        "run_id": run_id,
+        "kind": kind,
+        "coord": coord,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "warmup_bars": warmup_bars,
+        "suppress_output": True,
+    })
+    return job
+
+
+def param_grid(
+    symbol: str,
+    class_name: str,
+    param_x: str,
+    values_x: List[Any],
+    param_y: str,
+    values_y: List[Any],
+) -> List[dict]:
+    """param2d coordinates in the format of the sensitivity sweep jobs."""
+    return [
+        {
+            "symbol": symbol,
+            "class_name": class_name,
+            "param_x": param_x,
+            "value_x": vx,
+            "param_y": param_y,
+            "value_y": vy,
+        }
+        for vx in values_x
+        for vy in values_y
+    ]
+
+
+def optimise_windows(
+    pool,
+    base: dict,
+    windows: List[dict],
+    grid: List[dict],
+    warmup_bars: Optional[int],
+) -> List[Optional[dict]]:
+    """
+    Run the whole grid on every train window at once and return the best
+    coordinate (highest Sharpe) per window.
+    """
+    jobs = []
+    for w_idx, w in enumerate(windows):
+        for coord in grid:
+            jobs.append(_window_job(
+                base, w["train_start"], w["train_end"], "param2d", coord,
+                block=f"train_{w_idx}", warmup_bars=warmup_bars, run_id=len(jobs),
+            ))
+
+    best: List[Tuple[float, Optional[dict]]] = [(-np.inf, None)] * len(windows)
+    for idx, res in enumerate(pool.imap_unordered(run_backtest_job, jobs), start=1):
+        print(f"Completed {idx} / {len(jobs)} train backtests")
+        w_idx = int(res["block"].split("_")[1])
+        sharpe = res["sharpe"]
+        if sharpe is not None and sharpe > best[w_idx][0]:
+            best[w_idx] = (sharpe, res["coord"])
+
+    return [coord for _, coord in best]
+
+
+def run_test_windows(
+    pool,
+    base: dict,
+    windows: List[dict],
+    coords: List[Optional[dict]],
+    warmup_bars: Optional[int],
+    first_run_id: int = 0,
+) -> List[dict]:
+    """Test backtest per window; run ids follow on from first_run_id (after the train jobs)."""
+    jobs = []
+    for w_idx, (w, coord) in enumerate(zip(windows, coords)):
+        kind = "param2d" if coord is not None else "base"
+        job = _window_job(
+            base, w["test_start"], w["test_end"], kind, coord or {},
+            block=f"test_{w_idx}", warmup_bars=warmup_bars, run_id=first_run_id + w_idx,
+        )
+        job["return_equity"] = True
+        jobs.append(job)
+
+    results: List[Optional[dict]] = [None] * len(windows)
+    for idx, res in enumerate(pool.imap_unordered(run_backtest_job, jobs), start=1):
+        print(f"Completed {idx} / {len(jobs)} test backtests")
+        results[int(res["block"].split("_")[1])] = res
+    return results
+
+
+def stitch_equity(results: List[dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Chain the out of sample equity curves. Every window starts from the
+    initial portfolio, so each curve is rescaled to begin where the
+    previous one ended.
+    """
+    ts_parts = []
+    eq_parts = []
+    level = None
+    for res in results:
+        ts, eq = res["equity"]
+        if len(eq) == 0:
+            continue
+        if level is not None and eq[0] != 0:
+            eq = eq * (level / eq[0])
+        ts_parts.append(ts)
+        eq_parts.append(eq)
+        level = eq[-1]
+
+    if not eq_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    return np.concatenate(ts_parts), np.concatenate(eq_parts)
+
+
+# ---------------------------------------------------------------------------
+# Argument parsing
+# ---------------------------------------------------------------------------
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Walk-forward backtest: optimise on train windows, "
+                    "evaluate on the following test windows."
+    )
+    parser.add_argument("--train", type=str, default="5D",
+                        help="Train window length, pandas Timedelta string (default 5D).")
+    parser.add_argument("--test", type=str, default="2D",
+                        help="Test window length (default 2D).")
+    parser.add_argument("--step", type=str, default=None,
+                        help="Step between windows (default: test length).")
+    parser.add_argument("--anchored", action="store_true",
+                        help="Anchor all train windows at the start of the data.")
+    parser.add_argument("--warmup", type=int, default=None,
+                        help="Warm-up bars before each window "
+                             "(default: PriceManager history length).")
+    parser.add_argument("--optimise", action="store_true",
+                        help="Re-optimise MomentumStrategy period/threshold on each train window.")
+    parser.add_argument("--symbol", type=str, default=None,
+                        help="Symbol whose strategy is re-optimised "
+                             "(default: first symbol in strategy_config.json).")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for the simulated fills (default 0).")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Number of worker processes (default uses mp.Pool default).")
+    return parser.parse_args()
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def main():
+    args = parse_args()
+
+    market_cfg, strat_cfg, exec_cfg, init_portfolio_cfg = load_base_configs()
+    symbol = args.symbol or next(iter(strat_cfg.keys()))
+
+    order_mgr_params = load_risk_settings()
+
+    timeline = load_timeline(CONFIG_PATH)
+    windows = build_windows(
+        timeline,
+        train=pd.Timedelta(args.train),
+        test=pd.Timedelta(args.test),
+        step=pd.Timedelta(args.step) if args.step else None,
+        anchored=args.anchored,
+    )
+    if not windows:
+        raise ValueError("No walk-forward windows fit in the data.")
+    print(f"Walk-forward windows: {len(windows)}")
+
+    with mp.Manager() as manager:
+        base = {
+            "market_cfg": market_cfg,
+            "strat_cfg": strat_cfg,
+            "exec_cfg": exec_cfg,
+            "init_portfolio_cfg": init_portfolio_cfg,
+            "order_mgr_params": order_mgr_params,
+            "seed": args.seed,
+            "cache": manager.dict(),
+        }
+
+        with mp.Pool(processes=args.processes) as pool:
+            if args.optimise:
+                grid = param_grid(
+                    symbol, "MomentumStrategy",
+                    "period", [10, 20, 40, 60],
+                    "threshold", [0.01, 0.02, 0.03, 0.05],
+                )
+                coords = optimise_windows(pool, base, windows, grid, args.warmup)
+                n_train = len(windows) * len(grid)
+            else:
+                coords = [None] * len(windows)
+                n_train = 0
+
+            results = run_test_windows(pool, base, windows, coords, args.warmup, first_run_id=n_train)
+
+    rows = []
+    for w, coord, res in zip(windows, coords, results):
+        row = {
+            "test_start": w["test_start"],
+            "test_end": w["test_end"],
+            "sharpe": res["sharpe"],
+            "total_return": res["metrics"].get("total_return"),
+            "max_drawdown": res["metrics"].get("max_drawdown"),
+        }
+        if coord is not None:
+            row[coord["param_x"]] = coord["value_x"]
+            row[coord["param_y"]] = coord["value_y"]
+        rows.append(row)
+
+    print("\n==============================")
+    print("Walk-forward windows (out of sample)")
+    print("==============================")
+    print(pd.DataFrame(rows))
+
+    ts, eq = stitch_equity(results)
+    summary = performance_summary(eq, ts)
+
+    print("\n==============================")
+    print("Stitched out of sample performance")
+    print("==============================")
+    for key, value in summary.items():
+        print(f"{key:25s} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List
 from dataclasses import dataclass
-from datetime import datetime
 import sys
 import os
 from contextlib import contextmanager
 
+import numpy as np
 import pandas as pd
 
 from src.gateways.multi_historical_data_gateway import MultiHistoricalDataGateway
@@ -13,10 +13,21 @@ from src.strategies import Strategy
 from src.signals import Signal, SignalBundle
 from src.execution_manager import ExecutionManager
 from src.order_manager import OrderManager
-from src.position_manager import PositionManager, TradeRecord
+from src.position_manager import PositionManager
+from src.order import Order, peek_next_order_id, reset_order_ids
+from src.checkpoint import (
+    CheckpointWriter,
+    dump_state,
+    latest_checkpoint,
+    load_state,
+    read_checkpoint,
+)
 from src.order_book import OrderBook
-from src.simulatedMatchingEngine import SimulatedMatchingEngine
+from src.portfolio import Portfolio
+from src.simulatedMatchingEngine import SimulatedMatchingEngine, match_resting_orders
 from src.logger_gateway import OrderLogger, SignalLogger
+from src.equity_curve import EquityCurve, OnlineStats
+from src.utills.performance import attribution
 from model.models import MarketDataPoint
 
 
@@ -60,8 +71,48 @@ class Backtester:
       - prints settings and performance summary at the end
 
     If suppress_output is True, all prints during run() are muted.
+
+    seed makes the simulated fills reproducible; None draws fresh entropy.
+
+    fill_model is a fill model settings dict (see src.fill_models), by
+    default exec_cfg["fill_model"]; each symbol's engine gets its own model
+    prepared from that symbol's full data.
+
+    symbols restricts the run to those tickers of the market data config.
+
+    portfolios adds further accounts driven by the same pass over the
+    data: bars, PriceManager updates, strategies and signal bundles are
+    shared, while every portfolio sizes, risk checks and fills its own
+    orders (see src.portfolio.Portfolio). Each entry is a dict with an
+    optional "name", "init_portfolio_cfg" (or just "cash"), "exec_cfg",
+    "order_mgr_params" and "fill_model"; exec_cfg and order_mgr_params
+    entries override the main run's settings. The managers passed in
+    directly form the first portfolio, "main". All portfolios draw fills
+    from the same seed; each extra portfolio writes its order events to
+    its own OrderLogger, whose file name carries the portfolio name as a
+    suffix.
+
+    start and end restrict the run to bars with start <= timestamp < end.
+    When start is given, warmup_bars bars before it (default: the
+    PriceManager history length) are fed to the PriceManager only, so
+    indicators are ready on the first traded bar.
+
+    With checkpoint_dir set, a checkpoint of the whole simulation state
+    (gateway cursors, PriceManager, strategies, PositionManager, order
+    books and engines, rate limiters, equity buffer, RNG states, order id
+    counter) is written every checkpoint_every steps by a background
+    writer (see src.checkpoint). resume() loads the latest one into a
+    Backtester built with the same settings; run() then continues from
+    there with the same results as an uninterrupted run. max_steps counts
+    steps from the start of the backtest, including resumed ones.
     """
 
+    # Backtester owned state saved by value in checkpoints
+    _checkpoint_attrs = (
+        "_warmup_until",
+        "_steps",
+    )
+
     def __init__(
         self,
         config_path: str,
@@ -78,9 +129,28 @@ class Backtester:
         init_portfolio_cfg,
         order_mgr_params,
         suppress_output: bool = False,
+        start=None,
+        end=None,
+        warmup_bars: int | None = None,
+        seed: int | None = None,
+        fill_model: dict | None = None,
+        checkpoint_dir: str | None = None,
+        checkpoint_every: int = 5_000,
+        checkpoint_keep: int = 2,
+        symbols: List[str] | None = None,
+        portfolios: List[Dict[str, Any]] | None = None,
     ):
-        self.data_gateway = MultiHistoricalDataGateway(config_path)
+        self.data_gateway = MultiHistoricalDataGateway(config_path, tickers=symbols)
         self.pm = price_manager
+
+        # bars before this timestamp (ns) only warm up the PriceManager
+        self._warmup_until: int | None = None
+        if start is not None or end is not None:
+            if warmup_bars is None:
+                warmup_bars = price_manager.max_history if start is not None else 0
+            self.data_gateway.set_range(start=start, end=end, warmup_bars=warmup_bars)
+            if start is not None:
+                self._warmup_until = self.data_gateway.to_index_timestamp(start).value
         self.pmgr = position_manager
         self.strategies_by_symbol = strategies_by_symbol
         self.exec_mgr = execution_manager
@@ -96,15 +166,104 @@ class Backtester:
         self.init_portfolio_cfg = init_portfolio_cfg
         self.order_mgr_params = order_mgr_params
 
-        self.order_books: Dict[str, OrderBook] = {}
-        self.matching_engines: Dict[str, SimulatedMatchingEngine] = {}
-
-        # list of (timestamp, equity)
-        self.equity_curve: List[Tuple[datetime, float]] = []
-
         # if True, suppress all prints during run()
         self.suppress_output = suppress_output
 
+        # each matching engine gets its own child stream of this seed,
+        # in the order the symbols first appear
+        self.seed = seed
+        seed_seq = np.random.SeedSequence(seed)
+
+        if fill_model is None:
+            fill_model = (exec_cfg or {}).get("fill_model")
+        self.fill_model_cfg = fill_model
+
+        capacity = self.data_gateway.num_bars
+        self.portfolios: List[Portfolio] = [
+            Portfolio(
+                "main",
+                position_manager,
+                execution_manager,
+                order_manager,
+                order_logger,
+                seed_seq,
+                fill_model=fill_model,
+                capacity=capacity,
+                exec_cfg=exec_cfg,
+                init_portfolio_cfg=init_portfolio_cfg,
+                order_mgr_params=order_mgr_params,
+            )
+        ]
+        for i, cfg in enumerate(portfolios or [], start=1):
+            self.portfolios.append(self._build_portfolio(i, cfg, seed_seq.entropy, capacity))
+
+        # steps processed since the start of the backtest
+        self._steps = 0
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_keep = checkpoint_keep
+        self._checkpointer: CheckpointWriter | None = None
+
+    def _build_portfolio(self, i: int, cfg: Dict[str, Any], entropy, capacity: int) -> Portfolio:
+        """Extra portfolio from a portfolios entry, defaults from the main run."""
+        init_cfg = dict(cfg.get("init_portfolio_cfg", self.init_portfolio_cfg))
+        if "cash" in cfg:
+            init_cfg["cash"] = cfg["cash"]
+        exec_cfg = {**(self.exec_cfg or {}), **cfg.get("exec_cfg", {})}
+        order_mgr_params = {**(self.order_mgr_params or {}), **cfg.get("order_mgr_params", {})}
+        fill_model = cfg.get("fill_model", exec_cfg.get("fill_model", self.fill_model_cfg))
+
+        name = cfg.get("name", f"portfolio_{i}")
+        return Portfolio.from_config(
+            name,
+            self.pm,
+            exec_cfg,
+            init_cfg,
+            order_mgr_params,
+            self._portfolio_logger(name),
+            # same entropy as the main portfolio: every portfolio sees the
+            # same fill draws, so differences come from the settings only
+            np.random.SeedSequence(entropy),
+            fill_model=fill_model,
+            capacity=capacity,
+        )
+
+    def _portfolio_logger(self, name: str):
+        """
+        Order logger of an extra portfolio: a file of its own next to the
+        main order log, suffixed with the portfolio name. Loggers that are
+        not OrderLoggers (no file) are shared.
+        """
+        base = self.order_logger
+        if not isinstance(base, OrderLogger):
+            return base
+        suffix = f"{base.suffix}_{name}" if base.suffix else name
+        return OrderLogger(log_dir=base.log_dir, suffix=suffix)
+
+    # state of the main portfolio
+
+    @property
+    def order_books(self) -> Dict[str, OrderBook]:
+        return self.portfolios[0].order_books
+
+    @property
+    def matching_engines(self) -> Dict[str, SimulatedMatchingEngine]:
+        return self.portfolios[0].matching_engines
+
+    @property
+    def equity_curve(self) -> EquityCurve:
+        return self.portfolios[0].equity_curve
+
+    @property
+    def stats(self) -> OnlineStats:
+        return self.portfolios[0].stats
+
+    def get_portfolio(self, name: str) -> Portfolio:
+        for portfolio in self.portfolios:
+            if portfolio.name == name:
+                return portfolio
+        raise KeyError(f"No portfolio named '{name}'")
+
     # public entry point
 
     def run(self, max_steps: int | None = None):
@@ -120,10 +279,8 @@ class Backtester:
             self._run_internal(max_steps)
 
     def _run_internal(self, max_steps: int | None = None):
-        step = 0
-
         while True:
-            if max_steps is not None and step >= max_steps:
+            if max_steps is not None and self._steps >= max_steps:
                 print("Backtester: max steps reached.")
                 break
 
@@ -133,27 +290,118 @@ class Backtester:
                 break
 
             self._process_step(ticks)
-            step += 1
+            self._steps += 1
+            self._maybe_checkpoint()
 
+        self._close_checkpoints()
         self._final_report()
 
-    def _process_step(self, ticks: Dict[str, tuple]):
-        # lazily create order book and matching engine per symbol
-        for symbol, (_, _) in ticks.items():
-            if symbol not in self.order_books:
-                ob = OrderBook()
-                me = SimulatedMatchingEngine(
-                    order_book=ob,
-                    order_logger=self.order_logger,
-                    position_manager=self.pmgr,
-                )
-                self.order_books[symbol] = ob
-                self.matching_engines[symbol] = me
+    # checkpoints
 
-        # 1 check existing open limit orders against new tick
-        for symbol, (timestamp, bar) in ticks.items():
-            engine = self.matching_engines[symbol]
-            engine.check_open_orders(bar)
+    def _live_objects(self) -> Dict[str, Any]:
+        """
+        Objects a new run builds itself. Checkpoints store references to
+        them by name; the state of those in _restored_objects is saved and
+        restored in place, the others (data, loggers) are not saved.
+        """
+        live = {
+            "backtester": self,
+            "gateway": self.data_gateway,
+            "order_logger": self.order_logger,
+            "signal_logger": self.signal_logger,
+        }
+        for i, portfolio in enumerate(self.portfolios[1:], start=1):
+            live[f"portfolio:{i}:order_logger"] = portfolio.order_logger
+        live.update(self._restored_objects())
+        return live
+
+    def _restored_objects(self) -> Dict[str, Any]:
+        objects = {
+            "price_manager": self.pm,
+            "position_manager": self.pmgr,
+            "execution_manager": self.exec_mgr,
+            "order_manager": self.order_mgr,
+        }
+        for symbol, weighted in self.strategies_by_symbol.items():
+            for i, ws in enumerate(weighted):
+                objects[f"strategy:{symbol}:{i}"] = ws.strategy
+        for i, portfolio in enumerate(self.portfolios):
+            objects[f"portfolio:{i}"] = portfolio
+            if i > 0:
+                objects[f"portfolio:{i}:position_manager"] = portfolio.pmgr
+                objects[f"portfolio:{i}:execution_manager"] = portfolio.exec_mgr
+                objects[f"portfolio:{i}:order_manager"] = portfolio.order_mgr
+        return objects
+
+    def _checkpoint_state(self) -> Dict[str, Any]:
+        return {
+            "gateway": self.data_gateway.get_state(),
+            "next_order_id": peek_next_order_id(),
+            "objects": {name: vars(obj) for name, obj in self._restored_objects().items()},
+            "backtester": {name: getattr(self, name) for name in self._checkpoint_attrs},
+        }
+
+    def checkpoint(self) -> None:
+        """
+        Snapshot the simulation state now. Pickling happens here, so the
+        snapshot is consistent; the file is written in the background.
+        """
+        if self.checkpoint_dir is None:
+            raise ValueError("checkpoint_dir is not set")
+        if self._checkpointer is None:
+            self._checkpointer = CheckpointWriter(self.checkpoint_dir, keep=self.checkpoint_keep)
+        data = dump_state(self._checkpoint_state(), self._live_objects())
+        self._checkpointer.submit(self._steps, data)
+
+    def _maybe_checkpoint(self) -> None:
+        if self.checkpoint_dir is not None and self._steps % self.checkpoint_every == 0:
+            self.checkpoint()
+
+    def _close_checkpoints(self) -> None:
+        if self._checkpointer is not None:
+            self._checkpointer.close()
+            self._checkpointer = None
+
+    def resume(self, path: str | None = None) -> bool:
+        """
+        Load a checkpoint file, or the latest one in a directory (default
+        checkpoint_dir). Returns False if there is none.
+        """
+        path = path or self.checkpoint_dir
+        if path is not None and os.path.isdir(path):
+            path = latest_checkpoint(path)
+        if path is None or not os.path.exists(path):
+            return False
+
+        state = load_state(read_checkpoint(path), self._live_objects())
+        restored = self._restored_objects()
+        for name, attrs in state["objects"].items():
+            obj_dict = vars(restored[name])
+            obj_dict.clear()
+            obj_dict.update(attrs)
+        for name, value in state["backtester"].items():
+            setattr(self, name, value)
+        self.data_gateway.set_state(state["gateway"])
+        reset_order_ids(state["next_order_id"])
+
+        print(f"Backtester: resumed from {path} at step {self._steps}.")
+        return True
+
+    def _process_step(self, ticks: Dict[str, tuple]):
+        if self._warmup_until is not None:
+            if next(iter(ticks.values()))[0].value < self._warmup_until:
+                for symbol, (_, bar) in ticks.items():
+                    self.pm.update(symbol, bar)
+                return
+            self._warmup_until = None
+
+        # 1 check existing open orders of all symbols against the new bars
+        bars = [bar for _, bar in ticks.values()]
+        symbols = tuple(ticks)
+        now_ns = next(iter(ticks.values()))[0].value
+        for portfolio in self.portfolios:
+            engines, slots = portfolio.engines_for(symbols, self.data_gateway.get_market_data)
+            match_resting_orders(engines, bars, board=portfolio.board, slots=slots, now_ns=now_ns)
 
         # 2 update price history
         for symbol, (timestamp, bar) in ticks.items():
@@ -161,59 +409,78 @@ class Backtester:
 
         # 3 run strategies and collect signals
         signals: List[Signal] = []
-
         for symbol, (ts, bar) in ticks.items():
-            weighted_strats = self.strategies_by_symbol.get(symbol, [])
-            if not weighted_strats:
-                continue
+            self._collect_signals(symbol, ts, bar, signals)
 
-            mdp = self._build_market_data_point(symbol, ts, bar)
-
-            for ws in weighted_strats:
-                out = ws.strategy.generate_signals(mdp)
-                if not out:
-                    continue
-
-                for s in out:
-                    s.strength *= ws.weight
-                    signals.append(s)
-                    # log weighted signal
-                    self.signal_logger.log_signal(timestamp=ts, signal=s)
-
-        # 4 bundle signals and have ExecutionManager create orders
+        # 4-6 bundle once, then size, risk check and route per portfolio
         if signals:
-            bundle = SignalBundle.from_signals(signals)
-
             any_symbol = next(iter(ticks))
             bar_ts = ticks[any_symbol][0]
+            bundle = SignalBundle.from_signals(signals)
+            for portfolio in self.portfolios:
+                for order in self._portfolio_orders(portfolio, bundle, bar_ts):
+                    _, bar = ticks[order.symbol]
+                    portfolio.matching_engines[order.symbol].process_order(order, bar)
+
+        # 7 record equity and update running stats for this bar
+        self._record_equity(next(iter(ticks.values()))[0])
+
+    def _get_engine(self, symbol: str, portfolio: Portfolio | None = None) -> SimulatedMatchingEngine:
+        """Matching engine of symbol in portfolio (default main), created on first use."""
+        if portfolio is None:
+            portfolio = self.portfolios[0]
+        engine = portfolio.matching_engines.get(symbol)
+        if engine is None:
+            engine = portfolio.get_engine(symbol, self.data_gateway.get_market_data(symbol))
+        return engine
+
+    def _collect_signals(self, symbol: str, ts, bar, signals: List[Signal]) -> None:
+        """Run the weighted strategies of symbol on bar and append their signals."""
+        weighted_strats = self.strategies_by_symbol.get(symbol, [])
+        if not weighted_strats:
+            return
+
+        mdp = self._build_market_data_point(symbol, ts, bar)
+
+        for ws in weighted_strats:
+            out = ws.strategy.generate_signals(mdp)
+            if not out:
+                continue
 
-            raw_orders = self.exec_mgr.generate_orders_from_bundle(
-                bundle=bundle,
-                timestamp=bar_ts,
-            )
+            for s in out:
+                s.strength *= ws.weight
+                signals.append(s)
+                # log weighted signal
+                self.signal_logger.log_signal(timestamp=ts, signal=s)
+
+    def _orders_from_signals(self, signals: List[Signal], bar_ts) -> List[Order]:
+        """Bundle signals and return the accepted orders of the main portfolio."""
+        bundle = SignalBundle.from_signals(signals)
+        return self._portfolio_orders(self.portfolios[0], bundle, bar_ts)
+
+    def _portfolio_orders(self, portfolio: Portfolio, bundle: SignalBundle, bar_ts) -> List[Order]:
+        """Let the portfolio's ExecutionManager size orders, keep those its OrderManager accepts."""
+        raw_orders = portfolio.exec_mgr.generate_orders_from_bundle(
+            bundle=bundle,
+            timestamp=bar_ts,
+        )
 
-            # 5 risk checks in OrderManager
-            accepted = []
-            for o in raw_orders:
-                cap = self.exec_mgr.cash
-                pos_size = self.exec_mgr.get_position_qty(o.symbol)
-                if self.order_mgr.validate_order(
-                    order=o,
-                    current_capital=cap,
-                    current_position_size=pos_size,
-                ):
-                    accepted.append(o)
-
-            # 6 route accepted orders to symbol specific matching engines
-            for order in accepted:
-                _, bar = ticks[order.symbol]
-                engine = self.matching_engines[order.symbol]
-                engine.process_order(order, bar)
-
-        # 7 record equity for this bar
-        bar_timestamp = next(iter(ticks.values()))[0]
-        equity = self.exec_mgr.get_portfolio_value()
-        self.equity_curve.append((bar_timestamp.to_pydatetime(), equity))
+        if not raw_orders:
+            return []
+        state = self._portfolio_state(raw_orders, portfolio)
+        mask, _ = portfolio.order_mgr.validate_batch(raw_orders, state)
+        return [o for o, ok in zip(raw_orders, mask) if ok]
+
+    def _portfolio_state(self, orders: List[Order], portfolio: Portfolio | None = None) -> Dict[str, Any]:
+        """Cash and positions validate_batch sees (see Portfolio.portfolio_state)."""
+        if portfolio is None:
+            portfolio = self.portfolios[0]
+        return portfolio.portfolio_state(orders)
+
+    def _record_equity(self, bar_timestamp: pd.Timestamp) -> None:
+        """Append equity at bar_timestamp to every portfolio."""
+        for portfolio in self.portfolios:
+            portfolio.record_equity(bar_timestamp)
 
     # helpers
 
@@ -228,40 +495,30 @@ class Backtester:
         )
 
     def get_equity_curve_dataframe(self) -> pd.DataFrame:
-        if not self.equity_curve:
-            return pd.DataFrame(columns=["timestamp", "equity"])
-        ts, vals = zip(*self.equity_curve)
-        return pd.DataFrame({"timestamp": ts, "equity": vals}).set_index("timestamp")
+        return self.portfolios[0].get_equity_curve_dataframe()
+
+    def get_trade_arrays(self) -> Dict[str, np.ndarray]:
+        """Trade log as NumPy columns (timestamps as int64 ns, side as 1 = buy / 2 = sell)."""
+        return self.portfolios[0].get_trade_arrays()
 
     def get_trade_dataframe(self) -> pd.DataFrame:
-        records: List[TradeRecord] = self.pmgr.trade_log
-        if not records:
-            return pd.DataFrame(
-                columns=[
-                    "timestamp",
-                    "symbol",
-                    "side",
-                    "quantity",
-                    "price",
-                    "realized_pnl",
-                    "position_after",
-                ]
-            )
+        return self.portfolios[0].get_trade_dataframe()
 
-        data = [
-            {
-                "timestamp": tr.timestamp,
-                "symbol": tr.symbol,
-                "side": tr.side,
-                "quantity": tr.quantity,
-                "price": tr.price,
-                "realized_pnl": tr.realized_pnl,
-                "position_after": tr.position_after,
-            }
-            for tr in records
-        ]
-        df = pd.DataFrame(data).set_index("timestamp")
-        return df.sort_index()
+    def get_closed_lots_dataframe(self) -> pd.DataFrame:
+        """Closed tax lots with per-lot realized PnL and holding period."""
+        return self.pmgr.closed_lots_dataframe()
+
+    def get_order_book_stats(self) -> Dict[str, Dict[str, int]]:
+        return {sym: ob.memory_stats() for sym, ob in self.order_books.items()}
+
+    def get_performance_summary(self) -> Dict[str, float]:
+        """Full vectorized analytics over the equity buffer and trade log."""
+        return self.portfolios[0].get_performance_summary()
+
+    def compare_portfolios(self) -> pd.DataFrame:
+        """Performance summary of every portfolio, one row per portfolio name."""
+        rows = {p.name: p.get_performance_summary() for p in self.portfolios}
+        return pd.DataFrame.from_dict(rows, orient="index")
 
     # settings printout
 
@@ -330,6 +587,8 @@ class Backtester:
             f"{exec_cfg.get('max_strength_multiplier', 0.0):.2f}"
         )
         print(f"{'default_order_type:':25s} {exec_cfg.get('default_order_type', '')}")
+        print(f"{'default_time_in_force:':25s} {exec_cfg.get('default_time_in_force', 'GTC')}")
+        print(f"{'sizing_mode:':25s} {exec_cfg.get('sizing_mode', 'strongest')}")
 
         # order manager risk
         print("\nRisk settings (OrderManager):")
@@ -341,6 +600,13 @@ class Backtester:
             f"{'max_position_size:':25s} "
             f"{order_mgr_params.get('max_position_size', 0)}"
         )
+        print(f"{'allow_short:':25s} {order_mgr_params.get('allow_short', False)}")
+        for scope, spec in (order_mgr_params.get("rate_limits") or {}).items():
+            if spec:
+                print(f"{'rate limit ' + scope + ':':25s} {spec}")
+
+        print(f"{'random seed:':25s} {self.seed}")
+        print(f"{'fill model:':25s} {self.fill_model_cfg or {'type': 'random'}}")
 
         # strategies
         print("\nStrategies per symbol:")
@@ -355,57 +621,57 @@ class Backtester:
                 print(f"{symbol:8s} {class_name:28s} {weight:8.2f} {params_str}")
         print("=" * 70)
 
+    def _print_extended_metrics(self, summary: Dict[str, float]):
+        trades = self.get_trade_arrays()
+
+        print("-" * 70)
+        sortino = summary.get("sortino")
+        calmar = summary.get("calmar")
+        if sortino is not None:
+            print(f"{'Sortino ratio (rf=0):':25s} {sortino:11.2f}")
+        if calmar is not None:
+            print(f"{'Calmar ratio:':25s} {calmar:11.2f}")
+        print(f"{'Max drawdown bars:':25s} {summary['max_drawdown_bars']:12d}")
+        print(f"{'Turnover:':25s} {summary['turnover']:11.2f}x")
+        print(f"{'Exposure:':25s} {summary['exposure']:11.2%}")
+
+        pf = summary.get("profit_factor")
+        if pf is not None:
+            print(f"{'Profit factor:':25s} {pf:11.2f}")
+
+        if len(trades["quantity"]) > 0:
+            by_symbol = attribution(trades, by="symbol")
+            print("\nRealized PnL by symbol:")
+            for sym, row in by_symbol.iterrows():
+                print(f"{sym:25s} {row['realized_pnl']:12.2f}")
+
+            by_strategy = attribution(trades, by="strategy")
+            print("\nRealized PnL by strategy:")
+            for label, row in by_strategy.iterrows():
+                print(f"{label:40s} {row['realized_pnl']:12.2f}")
+
     # final stats
     def _final_report(self):
         # settings first
         self._print_run_settings()
 
-        eq_df = self.get_equity_curve_dataframe()
-        trade_df = self.get_trade_dataframe()
+        # equity metrics come from the vectorized analytics; OnlineStats is
+        # only the live view used while the run is in progress
+        stats = self.stats
+        summary = self.get_performance_summary()
 
         print("\n" + "=" * 70)
         print("BACKTEST PERFORMANCE SUMMARY")
         print("=" * 70)
 
-        if not eq_df.empty:
-            eq_series = eq_df["equity"]
-
-            start_val = eq_series.iloc[0]
-            end_val = eq_series.iloc[-1]
-            total_return = (end_val / start_val - 1.0) if start_val != 0 else 0.0
+        if summary:
+            ann_vol = summary["volatility"]
+            ann_sharpe = summary["sharpe"]
 
-            running_max = eq_series.cummax()
-            drawdown = (eq_series - running_max) / running_max
-            max_dd = drawdown.min()
-
-            rets = eq_series.pct_change().dropna()
-
-            ann_vol = None
-            ann_sharpe = None
-
-            if not rets.empty:
-                per_period_vol = rets.std()
-                per_period_ret = rets.mean()
-
-                diffs = eq_df.index.to_series().diff().dropna()
-                if not diffs.empty:
-                    dt_sec = diffs.dt.total_seconds().median()
-                    seconds_per_year = 365.0 * 24.0 * 60.0 * 60.0
-                    periods_per_year = seconds_per_year / dt_sec if dt_sec > 0 else 0.0
-                else:
-                    periods_per_year = 0.0
-
-                if periods_per_year > 0.0:
-                    ann_vol = per_period_vol * (periods_per_year ** 0.5)
-                    if per_period_vol > 0.0:
-                        ann_sharpe = (
-                            per_period_ret / per_period_vol
-                        ) * (periods_per_year ** 0.5)
-
-            print(f"{'Start equity:':25s} {start_val:12.2f}")
-            print(f"{'End equity:':25s} {end_val:12.2f}")
-            print(f"{'Total return:':25s} {total_return:11.2%}")
-            print(f"{'Max drawdown:':25s} {max_dd:11.2%}")
+            print(f"{'Start equity:':25s} {summary['start_equity']:12.2f}")
+            print(f"{'End equity:':25s} {summary['end_equity']:12.2f}")
+            print(f"{'Total return:':25s} {summary['total_return']:11.2%}")
+            print(f"{'Max drawdown:':25s} {summary['max_drawdown']:11.2%}")
 
             if ann_vol is not None:
                 print(f"{'Volatility (annualized):':25s} {ann_vol:11.2%}")
@@ -416,31 +682,57 @@ class Backtester:
 
         print("-" * 70)
 
-        if not trade_df.empty:
-            cum = trade_df["realized_pnl"].astype(float)
-
-            if len(cum) > 1 and cum.abs().sum() > cum.abs().iloc[-1] * 2:
-                per_trade = cum.diff().fillna(cum.iloc[0])
-            else:
-                per_trade = cum
-
-            total_realized = per_trade.sum()
-            avg_trade = per_trade.mean()
-            wins = (per_trade > 0).sum()
-            losses = (per_trade < 0).sum()
-            num_trades = len(per_trade)
-            win_rate = wins / num_trades if num_trades > 0 else 0.0
-
-            print(f"{'Number of trades:':25s} {num_trades:12d}")
-            print(f"{'Total realized PnL:':25s} {total_realized:12.2f}")
-            print(f"{'Average trade PnL:':25s} {avg_trade:12.2f}")
-            print(f"{'Win rate:':25s} {win_rate:11.2%}")
-            print(f"{'Wins:':25s} {wins:12d}")
-            print(f"{'Losses:':25s} {losses:12d}")
+        if stats.num_trades > 0:
+            print(f"{'Number of trades:':25s} {stats.num_trades:12d}")
+            print(f"{'Total realized PnL:':25s} {stats.total_realized_pnl:12.2f}")
+            print(f"{'Average trade PnL:':25s} {stats.average_trade_pnl():12.2f}")
+            print(f"{'Win rate:':25s} {stats.win_rate():11.2%}")
+            print(f"{'Wins:':25s} {stats.wins:12d}")
+            print(f"{'Losses:':25s} {stats.losses:12d}")
         else:
             print("No trades recorded.")
 
+        if summary and stats.num_points > 1:
+            self._print_extended_metrics(summary)
+
+        book_stats = self.get_order_book_stats()
+        if any(b["total_added"] > 0 for b in book_stats.values()):
+            print("-" * 70)
+            print(f"{'Order book':10s} {'Live':>8s} {'Added':>10s} {'Cancelled':>10s} {'Filled':>10s} {'KB':>8s}")
+            for sym, b in book_stats.items():
+                print(
+                    f"{sym:10s} {b['live_orders']:8d} {b['total_added']:10d} "
+                    f"{b['total_cancelled']:10d} {b['total_filled']:10d} "
+                    f"{b['approx_bytes'] / 1024:8.1f}"
+                )
+
         print("-" * 70)
         print(f"{'Final cash:':25s} {self.pmgr.get_cash():12.2f}")
         print(f"{'Final positions:':25s} {self.pmgr.snapshot_positions()}")
         print("=" * 70)
+
+        if len(self.portfolios) > 1:
+            self._print_portfolio_comparison()
+
+    def _print_portfolio_comparison(self):
+        print("\n" + "=" * 70)
+        print("PORTFOLIO COMPARISON")
+        print("=" * 70)
+        print(
+            f"{'Portfolio':16s} {'End equity':>12s} {'Return':>9s} {'Max DD':>9s} "
+            f"{'Sharpe':>8s} {'Fills':>7s} {'Cash':>12s}"
+        )
+        print("-" * 70)
+        for p in self.portfolios:
+            summary = p.get_performance_summary()
+            if not summary:
+                print(f"{p.name[:16]:16s} {'-':>12s}")
+                continue
+            sharpe = summary["sharpe"]
+            sharpe_str = f"{sharpe:8.2f}" if sharpe is not None else f"{'-':>8s}"
+            print(
+                f"{p.name[:16]:16s} {summary['end_equity']:12.2f} {summary['total_return']:9.2%} "
+                f"{summary['max_drawdown']:9.2%} {sharpe_str} {len(p.pmgr.trade_log):7d} "
+                f"{p.pmgr.get_cash():12.2f}"
+            )
+        print("=" * 70)
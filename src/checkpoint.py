@@ -0,0 +1,152 @@
+import glob
+import io
+import os
+import pickle
+import threading
+import zlib
+from typing import Any, Dict, Optional
+
+
+CHECKPOINT_PREFIX = "checkpoint-"
+CHECKPOINT_SUFFIX = ".pkl.z"
+
+
+class _StatePickler(pickle.Pickler):
+    """Pickles references to live objects as names instead of by value."""
+
+    def __init__(self, file, live: Dict[int, str]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._live = live
+
+    def persistent_id(self, obj):
+        return self._live.get(id(obj))
+
+
+class _StateUnpickler(pickle.Unpickler):
+    def __init__(self, file, live: Dict[str, Any]):
+        super().__init__(file)
+        self._live = live
+
+    def persistent_load(self, pid):
+        try:
+            return self._live[pid]
+        except KeyError:
+            raise pickle.UnpicklingError(f"checkpoint refers to unknown object '{pid}'")
+
+
+def dump_state(state: Dict[str, Any], live: Dict[str, Any]) -> bytes:
+    """
+    Pickle state. Objects in live (name -> object) are stored as their
+    name only, so they can be swapped for the objects of a new run on load.
+    """
+    buf = io.BytesIO()
+    _StatePickler(buf, {id(obj): name for name, obj in live.items()}).dump(state)
+    return buf.getvalue()
+
+
+def load_state(data: bytes, live: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of dump_state, resolving names through live."""
+    return _StateUnpickler(io.BytesIO(data), live).load()
+
+
+def checkpoint_path(directory: str, step: int) -> str:
+    return os.path.join(directory, f"{CHECKPOINT_PREFIX}{step:012d}{CHECKPOINT_SUFFIX}")
+
+
+def latest_checkpoint(directory: str) -> Optional[str]:
+    """Newest checkpoint file in directory, or None."""
+    paths = sorted(glob.glob(os.path.join(directory, CHECKPOINT_PREFIX + "*" + CHECKPOINT_SUFFIX)))
+    return paths[-1] if paths else None
+
+
+def read_checkpoint(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return zlib.decompress(f.read())
+
+
+class CheckpointWriter:
+    """
+    Writes checkpoints on a background thread.
+
+    submit() only hands over the pickled bytes; compression, the write to
+    a temporary file and the atomic rename happen on the writer thread, so
+    the simulation loop does not wait for the disk. If a newer snapshot
+    arrives while one is still waiting, the older one is dropped: only the
+    latest checkpoint is ever needed. The newest keep files are kept.
+
+    Errors of the writer thread are raised by the next submit() or close().
+    """
+
+    def __init__(self, directory: str, keep: int = 2, compress_level: int = 1):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.keep = max(1, keep)
+        self.compress_level = compress_level
+        self.written = 0
+
+        self._cond = threading.Condition()
+        self._pending: Optional[tuple] = None
+        self._busy = False
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._work, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, step: int, data: bytes) -> None:
+        with self._cond:
+            self._raise_error()
+            self._pending = (step, data)
+            self._cond.notify_all()
+
+    def flush(self) -> None:
+        """Wait until every submitted checkpoint is on disk."""
+        with self._cond:
+            while self._pending is not None or self._busy:
+                self._cond.wait()
+            self._raise_error()
+
+    def close(self) -> None:
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("writing checkpoint failed") from error
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                step, data = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                self._write(step, data)
+            except BaseException as e:  # handed to the simulation thread
+                with self._cond:
+                    self._error = e
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _write(self, step: int, data: bytes) -> None:
+        path = checkpoint_path(self.directory, step)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(zlib.compress(data, self.compress_level))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self.written += 1
+
+        old = sorted(glob.glob(os.path.join(self.directory, CHECKPOINT_PREFIX + "*" + CHECKPOINT_SUFFIX)))
+        for stale in old[: -self.keep]:
+            os.remove(stale)
@@ -0,0 +1,204 @@
+import math
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+SECONDS_PER_YEAR = 365.0 * 24.0 * 60.0 * 60.0
+
+
+class EquityCurve:
+    """
+    Preallocated equity buffer.
+
+    Timestamps are stored as int64 nanoseconds since epoch (UTC) and equity
+    as float64. The buffer is sized up front from the data length and only
+    grows (by doubling) if more points arrive than expected.
+    """
+
+    def __init__(self, capacity: int = 1024, tz=None):
+        capacity = max(1, int(capacity))
+        self._ts = np.empty(capacity, dtype=np.int64)
+        self._equity = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+        # timezone of the incoming timestamps, used when building DataFrames
+        self.tz = tz
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, ts_ns: int, equity: float) -> None:
+        if self._size == len(self._ts):
+            self._grow()
+        self._ts[self._size] = ts_ns
+        self._equity[self._size] = equity
+        self._size += 1
+
+    def _grow(self) -> None:
+        new_cap = 2 * len(self._ts)
+        ts = np.empty(new_cap, dtype=np.int64)
+        eq = np.empty(new_cap, dtype=np.float64)
+        ts[: self._size] = self._ts[: self._size]
+        eq[: self._size] = self._equity[: self._size]
+        self._ts = ts
+        self._equity = eq
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """View of the recorded timestamps (int64 ns)."""
+        return self._ts[: self._size]
+
+    @property
+    def values(self) -> np.ndarray:
+        """View of the recorded equity values (float64)."""
+        return self._equity[: self._size]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        if self._size == 0:
+            return pd.DataFrame(columns=["timestamp", "equity"])
+        index = pd.to_datetime(self.timestamps, unit="ns", utc=self.tz is not None)
+        if self.tz is not None:
+            index = index.tz_convert(self.tz)
+        index.name = "timestamp"
+        return pd.DataFrame({"equity": self.values}, index=index)
+
+
+class OnlineStats:
+    """
+    Running performance statistics, updated once per bar.
+
+    Keeps a Welford mean and variance of bar returns, the running peak and
+    max drawdown, a histogram of bar spacings (for the median bar interval
+    used in annualization) and trade win/loss counts, so every final metric
+    is available in O(1) without building the equity DataFrame.
+    """
+
+    def __init__(self):
+        self.num_points = 0
+        self.start_equity: Optional[float] = None
+        self.last_equity: Optional[float] = None
+        self.peak: Optional[float] = None
+        self.max_drawdown = 0.0
+
+        # Welford accumulators over per bar returns
+        self.num_returns = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+        # bar spacing in ns -> count
+        self._dt_counts: Dict[int, int] = {}
+        self._last_ts: Optional[int] = None
+
+        # trades
+        self.num_trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.total_realized_pnl = 0.0
+
+    # updates
+
+    def update(self, ts_ns: int, equity: float) -> None:
+        if self.num_points == 0:
+            self.start_equity = equity
+            self.peak = equity
+        else:
+            prev = self.last_equity
+            if prev != 0:
+                r = (equity - prev) / prev
+                self.num_returns += 1
+                delta = r - self._mean
+                self._mean += delta / self.num_returns
+                self._m2 += delta * (r - self._mean)
+
+            dt = ts_ns - self._last_ts
+            self._dt_counts[dt] = self._dt_counts.get(dt, 0) + 1
+
+            if equity > self.peak:
+                self.peak = equity
+
+        if self.peak > 0:
+            dd = (equity - self.peak) / self.peak
+            if dd < self.max_drawdown:
+                self.max_drawdown = dd
+
+        self.last_equity = equity
+        self._last_ts = ts_ns
+        self.num_points += 1
+
+    def record_trade(self, realized_pnl: float) -> None:
+        self.num_trades += 1
+        self.total_realized_pnl += realized_pnl
+        if realized_pnl > 0:
+            self.wins += 1
+        elif realized_pnl < 0:
+            self.losses += 1
+
+    # metrics
+
+    def total_return(self) -> Optional[float]:
+        if self.num_points == 0:
+            return None
+        if self.start_equity == 0:
+            return 0.0
+        return self.last_equity / self.start_equity - 1.0
+
+    def mean_return(self) -> Optional[float]:
+        if self.num_returns == 0:
+            return None
+        return self._mean
+
+    def std_return(self) -> Optional[float]:
+        """Sample standard deviation (ddof=1) of bar returns."""
+        if self.num_returns < 2:
+            return None
+        return math.sqrt(self._m2 / (self.num_returns - 1))
+
+    def median_bar_seconds(self) -> Optional[float]:
+        total = sum(self._dt_counts.values())
+        if total == 0:
+            return None
+
+        lo_pos = (total - 1) // 2
+        hi_pos = total // 2
+        lo = hi = None
+        seen = 0
+        for dt in sorted(self._dt_counts):
+            seen += self._dt_counts[dt]
+            if lo is None and seen > lo_pos:
+                lo = dt
+            if seen > hi_pos:
+                hi = dt
+                break
+        return (lo + hi) / 2.0 / 1e9
+
+    def periods_per_year(self) -> float:
+        dt_sec = self.median_bar_seconds()
+        if dt_sec is None or dt_sec <= 0:
+            return 0.0
+        return SECONDS_PER_YEAR / dt_sec
+
+    def annualized_volatility(self) -> Optional[float]:
+        vol = self.std_return()
+        ppy = self.periods_per_year()
+        if vol is None or ppy <= 0.0:
+            return None
+        return vol * (ppy ** 0.5)
+
+    def sharpe(self) -> Optional[float]:
+        """Annualized Sharpe ratio with rf=0, or None if undefined."""
+        vol = self.std_return()
+        ppy = self.periods_per_year()
+        if vol is None or vol == 0.0 or ppy <= 0.0:
+            return None
+        return (self._mean / vol) * (ppy ** 0.5)
+
+    def average_trade_pnl(self) -> float:
+        if self.num_trades == 0:
+            return 0.0
+        return self.total_realized_pnl / self.num_trades
+
+    def win_rate(self) -> float:
+        if self.num_trades == 0:
+            return 0.0
+        return self.wins / self.num_trades
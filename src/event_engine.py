@@ -0,0 +1,279 @@
+import heapq
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src.backtester import Backtester
+from src.order import Order
+from src.signals import Signal
+
+
+# event kinds, in the payload layout the handlers expect
+MARKET_DATA = 0    # (symbol, bar)
+ORDER_ARRIVAL = 1  # order
+CANCEL = 2         # (symbol, order_id)
+FILL = 3           # (order, fill quantity, fill price)
+TIMER = 4          # callback(ts_ns)
+
+EVENT_NAMES = ("MARKET_DATA", "ORDER_ARRIVAL", "CANCEL", "FILL", "TIMER")
+
+# simulated time before the first event
+_BEFORE_START = -(2 ** 63)
+
+
+class EventQueue:
+    """
+    Single priority queue of (timestamp ns, sequence, kind, payload).
+
+    The sequence number makes ordering total: events with the same
+    timestamp come out in the order they were pushed.
+    """
+
+    __slots__ = ("_heap", "_seq")
+
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._seq = 0
+
+    def push(self, ts_ns: int, kind: int, payload: Any = None) -> None:
+        heapq.heappush(self._heap, (ts_ns, self._seq, kind, payload))
+        self._seq += 1
+
+    def pop(self) -> tuple:
+        return heapq.heappop(self._heap)
+
+    def peek_time(self) -> Optional[int]:
+        return self._heap[0][0] if self._heap else None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class EventDrivenBacktester(Backtester):
+    """
+    Event driven variant of Backtester.
+
+    Bars of all symbols, order arrivals, cancels, fill reports and timers
+    are events in one EventQueue. Bars are merged lazily: each symbol has
+    at most one bar queued, and popping it queues that symbol's next bar.
+
+    Per bar event the symbol's resting orders are checked, the
+    PriceManager is updated and its strategies run. Once every event of a
+    timestamp has been handled, the collected signals go through
+    ExecutionManager and OrderManager as in Backtester and the accepted
+    orders arrive at their matching engine order_latency later. Fills are
+    applied by the engines at once and reported as FILL events
+    fill_latency later (see add_fill_handler). The equity curve is marked
+    after the last event of each bar timestamp.
+
+    Latencies are pd.Timedelta compatible values. With zero latencies the
+    results match Backtester bar for bar.
+
+    Orders sent but not yet arrived count towards the position and cash
+    the next risk checks see, so decisions made while orders are in flight
+    do not sell the same shares or spend the same cash twice.
+
+    Checkpoints also save the event queue, so scheduled timer callbacks
+    must be picklable (module level functions or bound methods).
+
+    Only the main portfolio is simulated: extra portfolios are not
+    supported here.
+    """
+
+    _checkpoint_attrs = Backtester._checkpoint_attrs + (
+        "events",
+        "events_processed",
+        "_now",
+        "_last_bar",
+        "_pending_signals",
+        "_bar_ts",
+        "_in_flight_qty",
+        "_in_flight_cash",
+        "_in_flight_count",
+    )
+
+    def __init__(
+        self,
+        *args,
+        order_latency=0,
+        cancel_latency=0,
+        fill_latency=0,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        if len(self.portfolios) > 1:
+            raise ValueError("EventDrivenBacktester does not support extra portfolios")
+        self.order_latency_ns = pd.Timedelta(order_latency).value
+        self.cancel_latency_ns = pd.Timedelta(cancel_latency).value
+        self.fill_latency_ns = pd.Timedelta(fill_latency).value
+
+        self.events = EventQueue()
+        self.events_processed = 0
+        self._handlers = (
+            self._on_market_data,
+            self._on_order_arrival,
+            self._on_cancel,
+            self._on_fill,
+            self._on_timer,
+        )
+        self._fill_handlers: List[Callable[[int, Order, int, float], None]] = []
+
+        self._now = _BEFORE_START
+        self._last_bar: Dict[str, pd.Series] = {}
+        self._pending_signals: List[Signal] = []
+        # timestamp of the bar being processed, until its equity is marked
+        self._bar_ts: Optional[pd.Timestamp] = None
+        # signed quantity per symbol and buy cash of orders not yet arrived
+        self._in_flight_qty: Dict[str, float] = {}
+        self._in_flight_cash = 0.0
+        self._in_flight_count = 0
+
+    # public scheduling API
+
+    def submit_order(self, order: Order, at: Optional[int] = None) -> None:
+        """Send an order; it reaches its engine order_latency after at (default: now)."""
+        base = self._now if at is None else at
+        self._track_in_flight(order, 1)
+        self.events.push(base + self.order_latency_ns, ORDER_ARRIVAL, order)
+
+    def cancel_order(self, symbol: str, order_id, at: Optional[int] = None) -> None:
+        """Request a cancel; it reaches the engine cancel_latency after at."""
+        base = self._now if at is None else at
+        self.events.push(base + self.cancel_latency_ns, CANCEL, (symbol, order_id))
+
+    def schedule_timer(self, ts_ns: int, callback: Callable[[int], None]) -> None:
+        """Call callback(ts_ns) when simulated time reaches ts_ns."""
+        self.events.push(ts_ns, TIMER, callback)
+
+    def add_fill_handler(self, handler: Callable[[int, Order, int, float], None]) -> None:
+        """handler(ts_ns, order, fill quantity, fill price) runs on every FILL event."""
+        self._fill_handlers.append(handler)
+
+    # main loop
+
+    def _run_internal(self, max_steps: int | None = None):
+        """max_steps counts bar timestamps, as in Backtester."""
+        events = self.events
+        handlers = self._handlers
+
+        # a resumed or continued run already has the next bars queued;
+        # timers and orders scheduled before the first run do not count
+        if self._now == _BEFORE_START:
+            for symbol in self.data_gateway.tickers():
+                self._queue_next_bar(symbol)
+
+        while True:
+            next_ts = events.peek_time()
+            if next_ts is None or next_ts > self._now:
+                # every event at self._now is done
+                if self._pending_signals:
+                    self._flush_decisions()
+                    continue
+                if self._bar_ts is not None:
+                    self._record_equity(self._bar_ts)
+                    self._bar_ts = None
+                    self._steps += 1
+                    self._maybe_checkpoint()
+                if next_ts is None:
+                    print("EventDrivenBacktester: end of events.")
+                    break
+                if max_steps is not None and self._steps >= max_steps:
+                    print("EventDrivenBacktester: max steps reached.")
+                    break
+
+            ts_ns, _, kind, payload = events.pop()
+            self._now = ts_ns
+            handlers[kind](ts_ns, payload)
+            self.events_processed += 1
+
+        self._close_checkpoints()
+        self._final_report()
+
+    def _track_in_flight(self, order: Order, sign: int) -> None:
+        """Add (sign 1) or remove (sign -1) an order from the in-flight totals."""
+        self._in_flight_count += sign
+        if self._in_flight_count == 0:
+            # exact reset, no rounding left behind
+            self._in_flight_qty.clear()
+            self._in_flight_cash = 0.0
+            return
+        qty = sign * order.quantity
+        if order.is_buy:
+            self._in_flight_cash += qty * (order.price if order.price is not None else (order.stop_price or 0.0))
+        else:
+            qty = -qty
+        self._in_flight_qty[order.symbol] = self._in_flight_qty.get(order.symbol, 0) + qty
+
+    def _portfolio_state(self, orders: List[Order], portfolio=None) -> Dict[str, Any]:
+        state = super()._portfolio_state(orders, portfolio)
+        if self._in_flight_qty:
+            state["cash"] -= self._in_flight_cash
+            positions = state["positions"]
+            for symbol in positions:
+                positions[symbol] += self._in_flight_qty.get(symbol, 0)
+        return state
+
+    def _queue_next_bar(self, symbol: str) -> None:
+        tick = self.data_gateway.get_next_tick_for(symbol)
+        if tick is not None:
+            ts, bar = tick
+            self.events.push(ts.value, MARKET_DATA, (symbol, bar))
+
+    def _report_fills(self, ts_ns: int, fills: List[Order]) -> None:
+        when = ts_ns + self.fill_latency_ns
+        for order in fills:
+            self.events.push(when, FILL, (order, order.filled_quantity, order.filled_price))
+
+    def _flush_decisions(self) -> None:
+        signals = self._pending_signals
+        self._pending_signals = []
+        for order in self._orders_from_signals(signals, self._bar_ts):
+            self.submit_order(order)
+
+    # handlers
+
+    def _on_market_data(self, ts_ns: int, payload) -> None:
+        symbol, bar = payload
+        self._queue_next_bar(symbol)
+        self._last_bar[symbol] = bar
+
+        if self._warmup_until is not None:
+            if ts_ns < self._warmup_until:
+                self.pm.update(symbol, bar)
+                return
+            self._warmup_until = None
+
+        engine = self._get_engine(symbol)
+        fills = engine.check_open_orders(bar)
+        if fills:
+            self._report_fills(ts_ns, fills)
+
+        self.pm.update(symbol, bar)
+        self._bar_ts = bar.name
+        self._collect_signals(symbol, bar.name, bar, self._pending_signals)
+
+    def _on_order_arrival(self, ts_ns: int, order: Order) -> None:
+        self._track_in_flight(order, -1)
+        bar = self._last_bar.get(order.symbol)
+        if bar is None:
+            print(f"EventDrivenBacktester: no market data for {order.symbol}, order dropped.")
+            return
+        fills = self._get_engine(order.symbol).process_order(order, bar)
+        if fills:
+            self._report_fills(ts_ns, fills)
+
+    def _on_cancel(self, ts_ns: int, payload) -> None:
+        symbol, order_id = payload
+        engine = self.matching_engines.get(symbol)
+        if engine is None:
+            return
+        if not engine.cancel_stop_order(order_id):
+            engine.order_book.cancel_order(order_id)
+
+    def _on_fill(self, ts_ns: int, payload) -> None:
+        order, qty, price = payload
+        for handler in self._fill_handlers:
+            handler(ts_ns, order, qty, price)
+
+    def _on_timer(self, ts_ns: int, callback) -> None:
+        callback(ts_ns)
@@ -1,13 +1,72 @@
 import json
-from uuid import uuid4
 from typing import Dict, Any, Optional, List
 
+import numpy as np
+
 from src.price_manager import PriceManager
-from src.signals import SignalBundle, AggregatedSymbolSignal
-from src.order import Order  # adjust path if needed
+from src.signals import NORMALIZATIONS, SignalBundle, AggregatedSymbolSignal
+from src.order import Order, OrderStatus, OrderType, next_order_id  # adjust path if needed
 from src.position_manager import PositionManager  # adjust path if needed
 
 
+class PortfolioSnapshot:
+    """
+    Portfolio as seen while sizing the orders of one bar.
+
+    Copied once from the PositionManager arrays (quantities and last
+    prices, aligned with its symbol_index) together with cash, total value
+    and the number of open positions. apply() books each sized order into
+    the copy, so later orders of the same bar see the cash and positions
+    it commits and every lookup is O(1).
+    """
+
+    __slots__ = ("symbols", "symbol_index", "quantities", "prices", "cash", "total_value", "open_count")
+
+    def __init__(self, pmgr: PositionManager):
+        n = pmgr.num_symbols
+        self.symbols = pmgr.symbols
+        self.symbol_index = pmgr.symbol_index
+        self.quantities = pmgr.quantities[:n].copy()
+        self.prices = pmgr.last_prices[:n].copy()
+        self.cash = pmgr.get_cash()
+        self.total_value = pmgr.marked_value()
+        self.open_count = int(np.count_nonzero(self.quantities))
+
+    def price(self, symbol: str) -> Optional[float]:
+        i = self.symbol_index.get(symbol)
+        if i is None or i >= len(self.prices):
+            return None
+        price = self.prices[i]
+        return None if price != price else price
+
+    def quantity(self, symbol: str) -> float:
+        i = self.symbol_index.get(symbol)
+        if i is None or i >= len(self.quantities):
+            return 0.0
+        return self.quantities[i]
+
+    def value(self, symbol: str) -> float:
+        price = self.price(symbol)
+        return 0.0 if price is None else self.quantity(symbol) * price
+
+    def weight(self, symbol: str) -> float:
+        if self.total_value <= 0:
+            return 0.0
+        return self.value(symbol) / self.total_value
+
+    def is_open(self, symbol: str) -> bool:
+        return self.quantity(symbol) != 0
+
+    def apply(self, symbol: str, signed_qty: float, price: float) -> None:
+        """Book a sized order as if filled at price (total value unchanged)."""
+        i = self.symbol_index[symbol]
+        old = self.quantities[i]
+        new = old + signed_qty
+        self.quantities[i] = new
+        self.cash -= signed_qty * price
+        self.open_count += int(new != 0) - int(old != 0)
+
+
 class ExecutionManager:
     """
     ExecutionManager
@@ -15,8 +74,22 @@ class ExecutionManager:
     - Reads and updates cash and positions through PositionManager
     - Loads execution and risk settings from JSON or dict
     - Consumes SignalBundle and produces Order objects
+
+    Orders of one bar are sized against a PortfolioSnapshot taken once at
+    the start of generate_orders_from_bundle.
+
+    sizing_mode "strongest" (default) orders only the strongest buy and
+    the strongest sell symbol of each bar. "rebalance" moves every
+    signalled symbol towards its target weight at once (see
+    _rebalance_orders).
+
+    signal_normalization "rank" or "zscore" replaces each bar's net
+    signal strengths by their cross-sectional rank or z-score before sizing
+    (see SignalBundle.normalized).
     """
 
+    SIZING_MODES = ("strongest", "rebalance")
+
     def __init__(
         self,
         price_manager: PriceManager,
@@ -35,6 +108,13 @@ class ExecutionManager:
         config = self._load_settings(settings_path, settings_dict)
         self._apply_settings(config)
 
+        # keep the PositionManager marked to market as bars arrive
+        for sym in list(self.pmgr.symbols) + [s for s in self.pm.prices if s not in self.pmgr.symbol_index]:
+            price = self.pm.get_latest_price(sym)
+            if price is not None:
+                self.pmgr.mark(sym, price)
+        self.pm.add_close_listener(self.pmgr.mark)
+
     # ---------------------- factory from json ----------------------
 
     @classmethod
@@ -78,6 +158,7 @@ class ExecutionManager:
             "weight_per_strength_unit": 0.02,
             "max_strength_multiplier": 2.0,
             "default_order_type": "MARKET",
+            "default_time_in_force": "GTC",
         }
 
     def _apply_settings(self, cfg: Dict[str, Any]) -> None:
@@ -91,6 +172,18 @@ class ExecutionManager:
         self.max_strength_multiplier: float = cfg.get("max_strength_multiplier", 1.0)
 
         self.default_order_type: str = cfg.get("default_order_type", "MARKET")
+        self.default_time_in_force: str = cfg.get("default_time_in_force", "GTC")
+        if self.default_time_in_force == "GTD":
+            # generated orders carry no expire_at
+            raise ValueError("default_time_in_force cannot be 'GTD'")
+
+        self.sizing_mode: str = cfg.get("sizing_mode", "strongest")
+        if self.sizing_mode not in self.SIZING_MODES:
+            raise ValueError(f"Unknown sizing_mode '{self.sizing_mode}'")
+
+        self.signal_normalization: Optional[str] = cfg.get("signal_normalization")
+        if self.signal_normalization not in (None,) + NORMALIZATIONS:
+            raise ValueError(f"Unknown signal_normalization '{self.signal_normalization}'")
 
     # ------------------------ portfolio helpers -------------------------
 
@@ -103,17 +196,14 @@ class ExecutionManager:
         self.pmgr.cash = value
 
     def get_position_qty(self, symbol: str) -> float:
-        pos = self.pmgr.get_position(symbol)
-        return 0.0 if pos is None else pos.quantity
+        return self.pmgr.get_quantity(symbol)
 
     def get_portfolio_value(self) -> float:
         """
-        Use PositionManager and latest prices.
+        Cash plus positions at the latest prices, from the PositionManager's
+        running market value (marked on every PriceManager update).
         """
-        last_prices: Dict[str, float] = {}
-        for sym in self.pmgr.positions.keys():
-            last_prices[sym] = self.pm.get_latest_price(sym)
-        return self.pmgr.portfolio_value(last_prices)
+        return self.pmgr.marked_value()
 
     def get_symbol_value(self, symbol: str) -> float:
         price = self.pm.get_latest_price(symbol)
@@ -128,11 +218,11 @@ class ExecutionManager:
         return self.get_symbol_value(symbol) / pv
 
     def open_symbols(self) -> List[str]:
-        return [
-            sym
-            for sym, pos in self.pmgr.positions.items()
-            if pos.quantity != 0
-        ]
+        pmgr = self.pmgr
+        return [sym for sym, i in pmgr.symbol_index.items() if pmgr.quantities[i] != 0]
+
+    def portfolio_snapshot(self) -> PortfolioSnapshot:
+        return PortfolioSnapshot(self.pmgr)
 
     # ---------------- main entry: bundle -> orders ---------------------
 
@@ -141,44 +231,191 @@ class ExecutionManager:
         bundle: SignalBundle,
         timestamp,
     ) -> List[Order]:
+        if self.signal_normalization is not None:
+            bundle = bundle.normalized(self.signal_normalization)
+        if self.sizing_mode == "rebalance":
+            return self._rebalance_orders(bundle, timestamp)
+
         orders: List[Order] = []
+        snap = self.portfolio_snapshot()
 
         best_buy = bundle.strongest_buy_symbol()
         if best_buy is not None:
-            buy_order = self._build_buy_order(best_buy, timestamp)
+            buy_order = self._build_buy_order(best_buy, timestamp, snap)
             if buy_order is not None:
                 orders.append(buy_order)
 
         best_sell = bundle.strongest_sell_symbol()
         if best_sell is not None:
-            sell_order = self._build_sell_order(best_sell, timestamp)
+            sell_order = self._build_sell_order(best_sell, timestamp, snap)
             if sell_order is not None:
                 orders.append(sell_order)
 
         return orders
 
+    def _rebalance_orders(self, bundle: SignalBundle, timestamp) -> List[Order]:
+        """
+        Orders taking the portfolio to its target weights.
+
+        Works on arrays over the bundle's symbols plus the long positions
+        the bundle does not mention. Target weights: a net buy signal gives
+        base_weight_per_symbol + net strength * weight_per_strength_unit, a
+        net sell signal 0, and a held symbol without a (net) signal keeps
+        its current weight; all are capped at max_symbol_weight. Each symbol
+        then gets one order for the signed difference to its target:
+
+        - sells: a target of 0 closes the position; a partial sell (trim)
+          needs min_trade_value and closes the position instead when the
+          rest would fall under min_position_value
+        - buys: need min_trade_value and must leave the position at
+          min_position_value or more; new positions are opened strongest
+          first up to max_positions (counting positions this bar closes)
+          and buys are funded strongest first from the cash at hand (sale
+          proceeds arrive only with the fills)
+
+        Sells come first.
+        """
+        snap = self.portfolio_snapshot()
+        n_rows = len(snap.quantities)
+        k = len(bundle)
+
+        rows = np.fromiter((snap.symbol_index.get(s, -1) for s in bundle.symbols), dtype=np.int64, count=k)
+        known = (rows >= 0) & (rows < n_rows)
+
+        # long positions without a signal this bar
+        in_bundle = np.zeros(n_rows, dtype=bool)
+        in_bundle[rows[known]] = True
+        extra = np.flatnonzero((snap.quantities > 0) & ~in_bundle)
+        if k == 0 and len(extra) == 0:
+            return []
+
+        rows = np.concatenate([np.where(known, rows, 0), extra])
+        known = np.concatenate([known, np.ones(len(extra), dtype=bool)])
+        net = np.concatenate([bundle.net_strength, np.zeros(len(extra))])
+
+        price = np.where(known, snap.prices[rows], np.nan)
+        qty = np.where(known, snap.quantities[rows], 0.0)
+        valid = known & (price > 0) & (qty >= 0)  # also drops NaN prices and shorts
+        price = np.where(valid, price, 1.0)
+        value = np.where(valid, qty * price, 0.0)
+
+        pv = snap.total_value
+        cap = self.max_symbol_weight
+        weight = value / pv if pv > 0 else np.zeros(len(net))
+        target = np.where(
+            net > 0,
+            np.minimum(self.base_weight_per_symbol + net * self.weight_per_strength_unit, cap),
+            np.where(net < 0, 0.0, np.minimum(weight, cap)),
+        )
+        delta = target * pv - value if pv > 0 else np.zeros(len(net))
+        held = valid & (qty > 0)
+
+        # sells: full closes and trims
+        close = held & (target <= 0)
+        trim_shares = np.minimum(np.floor(np.maximum(-delta, 0.0) / price), qty)
+        trim = held & ~close & (trim_shares > 0) & (trim_shares * price >= self.min_trade_value)
+        rest_small = trim & ((qty - trim_shares) * price < self.min_position_value)
+        close |= rest_small
+        trim &= ~rest_small
+        sell_shares = np.where(close, qty, np.where(trim, trim_shares, 0.0))
+        sell = close | trim
+
+        # buys towards the target
+        shares = np.where(delta > 0, np.floor(np.maximum(delta, 0.0) / price), 0.0)
+        buy = valid & (pv > 0) & (target > 0) & (shares > 0)
+        buy &= shares * price >= self.min_trade_value
+        buy &= value + shares * price >= self.min_position_value
+
+        # strongest first
+        buy_idx = np.flatnonzero(buy)
+        buy_idx = buy_idx[np.argsort(-net[buy_idx], kind="stable")]
+
+        # position slots for new symbols
+        is_new = qty[buy_idx] == 0
+        slots = max(0, self.max_positions - (snap.open_count - int(np.count_nonzero(close))))
+        if np.count_nonzero(is_new) > slots:
+            keep = ~is_new | (np.cumsum(is_new) <= slots)
+            buy_idx = buy_idx[keep]
+
+        # fund from cash, strongest first; the first buy that does not fit
+        # gets what is left, the rest is dropped
+        cost = shares[buy_idx] * price[buy_idx]
+        fits = np.cumsum(cost) <= snap.cash
+        if not fits.all():
+            cut = int(np.argmin(fits))
+            left = snap.cash - float(cost[:cut].sum())
+            j = buy_idx[cut]
+            shares[j] = np.floor(max(left, 0.0) / price[j])
+            partial_ok = (
+                shares[j] > 0
+                and shares[j] * price[j] >= self.min_trade_value
+                and value[j] + shares[j] * price[j] >= self.min_position_value
+            )
+            buy_idx = buy_idx[: cut + 1] if partial_ok else buy_idx[:cut]
+
+        orders: List[Order] = []
+        for i in np.flatnonzero(sell):
+            agg = self._rebalance_signal(bundle, snap, i, rows[i])
+            quantity = int(sell_shares[i])
+            if quantity <= 0:
+                continue
+            snap.apply(agg.symbol, -quantity, price[i])
+            orders.append(self._make_order(agg, timestamp, "SELL", quantity, price[i]))
+        for i in buy_idx:
+            agg = self._rebalance_signal(bundle, snap, i, rows[i])
+            quantity = int(shares[i])
+            snap.apply(agg.symbol, quantity, price[i])
+            orders.append(self._make_order(agg, timestamp, "BUY", quantity, price[i]))
+        return orders
+
+    @staticmethod
+    def _rebalance_signal(bundle: SignalBundle, snap: PortfolioSnapshot, i: int, row: int) -> AggregatedSymbolSignal:
+        """Signal record of entry i: from the bundle, or empty for a held symbol without signal."""
+        if i < len(bundle):
+            return bundle.aggregate(i)
+        return AggregatedSymbolSignal(symbol=snap.symbols[row])
+
     # ---------------- internal order building logic --------------------
 
+    def _make_order(self, agg: AggregatedSymbolSignal, timestamp, side: str, quantity, price) -> Order:
+        return Order({
+            "order_id": next_order_id(),
+            "timestamp": timestamp,
+            "symbol": agg.symbol,
+            "quantity": quantity,
+            "price": price,
+            "side": side,
+            "order_type": self.default_order_type,
+            "time_in_force": self.default_time_in_force,
+            "strategy": self._strategy_label(agg),
+        })
+
+    @staticmethod
+    def _strategy_label(agg: AggregatedSymbolSignal) -> Optional[str]:
+        """Label used for per-strategy attribution of the resulting fills."""
+        if not agg.sources:
+            return None
+        return "+".join(sorted(set(agg.sources)))
+
     def _build_buy_order(
         self,
         agg: AggregatedSymbolSignal,
         timestamp,
+        snap: PortfolioSnapshot,
     ) -> Optional[Order]:
         symbol = agg.symbol
-        price = self.pm.get_latest_price(symbol)
+        price = snap.price(symbol)
         if price is None or price <= 0:
             return None
 
-        pv = self.get_portfolio_value()
-        current_weight = self.get_symbol_weight(symbol)
-        current_positions = self.open_symbols()
+        pv = snap.total_value
 
         # limit total symbols
-        if symbol not in current_positions and len(current_positions) >= self.max_positions:
+        if not snap.is_open(symbol) and snap.open_count >= self.max_positions:
             return None
 
         # do not exceed max symbol weight
-        if current_weight >= self.max_symbol_weight:
+        if snap.weight(symbol) >= self.max_symbol_weight:
             return None
 
         # strength -> target weight
@@ -191,7 +428,7 @@ class ExecutionManager:
         target_weight = min(raw_weight, self.max_symbol_weight, max_weight_from_strength)
 
         target_value = target_weight * pv
-        current_value = self.get_symbol_value(symbol)
+        current_value = snap.value(symbol)
         incremental_value = max(0.0, target_value - current_value)
 
         if incremental_value < self.min_trade_value:
@@ -201,7 +438,7 @@ class ExecutionManager:
         if desired_shares <= 0:
             return None
 
-        max_affordable_shares = int(self.cash // price)
+        max_affordable_shares = int(snap.cash // price)
         shares_to_buy = min(desired_shares, max_affordable_shares)
 
         if shares_to_buy <= 0:
@@ -211,43 +448,29 @@ class ExecutionManager:
         if future_value < self.min_position_value:
             return None
 
-        order_dict = {
-            "order_id": str(uuid4()),
-            "timestamp": timestamp,
-            "symbol": symbol,
-            "quantity": shares_to_buy,
-            "price": price,
-            "side": "BUY",
-            "order_type": self.default_order_type,
-        }
-        return Order(order_dict)
+        snap.apply(symbol, shares_to_buy, price)
+        return self._make_order(agg, timestamp, "BUY", shares_to_buy, price)
 
     def _build_sell_order(
         self,
         agg: AggregatedSymbolSignal,
         timestamp,
+        snap: PortfolioSnapshot,
     ) -> Optional[Order]:
         symbol = agg.symbol
-        current_shares = self.get_position_qty(symbol)
+        # only shares already held: buys sized this bar have not filled yet
+        current_shares = min(snap.quantity(symbol), self.get_position_qty(symbol))
         if current_shares <= 0:
             return None
 
-        price = self.pm.get_latest_price(symbol)
+        price = snap.price(symbol)
         if price is None or price <= 0:
             return None
 
         quantity = current_shares
 
-        order_dict = {
-            "order_id": str(uuid4()),
-            "timestamp": timestamp,
-            "symbol": symbol,
-            "quantity": quantity,
-            "price": price,
-            "side": "SELL",
-            "order_type": self.default_order_type,
-        }
-        return Order(order_dict)
+        snap.apply(symbol, -quantity, price)
+        return self._make_order(agg, timestamp, "SELL", quantity, price)
 
     # ---------------- backtest style fills using PositionManager ----------------
 
@@ -259,11 +482,11 @@ class ExecutionManager:
         - Delegates cash and position updates to PositionManager.update_from_fill
         """
         for order in orders:
-            if order.order_type != "MARKET":
+            if order.type_code != OrderType.MARKET:
                 continue
             if order.quantity is None or order.quantity <= 0:
                 continue
-            if order.symbol is None or order.side is None:
+            if order.symbol is None or order.side_code is None:
                 continue
 
             # In backtest we assume we fill at the order price
@@ -274,4 +497,4 @@ class ExecutionManager:
             # Let PositionManager handle cash and position updates
             self.pmgr.update_from_fill(order, fee=fee_per_order)
 
-            order.status = "Filled"
+            order.status_code = OrderStatus.FILLED
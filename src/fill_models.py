@@ -0,0 +1,230 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.order import Order, OrderType, Side
+
+
+class FillModel(ABC):
+    """
+    Decides how much of an order fills on a bar and at what price.
+
+    fill() returns (quantity, price) for up to `quantity` units of order on
+    current_tick. Models with carries_remainder = True get the unfilled
+    rest of the order offered again on the following bars; otherwise the
+    remainder is dropped.
+
+    fill_resting() fills resting limit orders the bar crosses, at their
+    limit price; the unfilled part stays in the book.
+    """
+
+    carries_remainder = False
+    # carried remainders older than this many bars expire (None = never)
+    max_carry_bars: Optional[int] = None
+
+    def prepare(self, market_data: pd.DataFrame) -> None:
+        """
+        Precompute per bar arrays from the full OHLCV frame of one symbol.
+        Models that read only the current tick need nothing here.
+        """
+        return
+
+    @abstractmethod
+    def fill(
+        self,
+        engine,
+        order: Order,
+        current_tick: "pd.Series",
+        quantity: int,
+        fill_price: Optional[float] = None,
+    ) -> Tuple[int, float]:
+        pass
+
+    def fill_resting(
+        self,
+        engine,
+        order: Order,
+        current_tick: "pd.Series",
+        quantity: int,
+        limit_price: float,
+    ) -> Tuple[int, float]:
+        """(quantity, price) of a resting limit order crossed by current_tick."""
+        return self.fill(engine, order, current_tick, quantity, fill_price=limit_price)
+
+
+class RandomPartialFillModel(FillModel):
+    """
+    The original engine behaviour: fill at Close (or fill_price), with a
+    partial_fill_chance of filling only 10-90% and dropping the rest.
+    None uses the engine's partial_fill_chance.
+    """
+
+    def __init__(self, partial_fill_chance: Optional[float] = None):
+        self.partial_fill_chance = partial_fill_chance
+
+    def fill(self, engine, order, current_tick, quantity, fill_price=None):
+        if fill_price is None:
+            fill_price = current_tick["Close"]
+        fill_qty = quantity
+
+        chance = self.partial_fill_chance
+        if chance is None:
+            chance = engine.partial_fill_chance
+        if engine._next_uniform() < chance:
+            fill_qty = int(quantity * (0.1 + 0.8 * engine._next_uniform()))
+            fill_qty = max(1, fill_qty)
+
+        return fill_qty, fill_price
+
+    def fill_resting(self, engine, order, current_tick, quantity, limit_price):
+        # resting orders fill in full at their limit, as they always did
+        return quantity, limit_price
+
+
+class ParticipationFillModel(FillModel):
+    """
+    Volume constrained fills.
+
+    Each bar can absorb at most participation_rate of its Volume, shared by
+    all orders of the symbol on that bar; whatever does not fit is carried
+    to the next bars. Fills are priced at the bar vwap (Close when vwap is
+    missing) moved against the order by a square root impact,
+    impact * sqrt(fill_qty / Volume). Bars with no volume or no trades
+    absorb nothing. Limit orders never fill through their limit price.
+    The default impact moves the price 10 bps when taking a whole bar.
+
+    prepare() turns the symbol's frame into int64 timestamps and per bar
+    capacity / price / 1/volume arrays once, so a fill is a cursor lookup
+    plus a few float operations. Bars missing from the arrays fall back to
+    the tick's own columns.
+    """
+
+    carries_remainder = True
+
+    def __init__(
+        self,
+        participation_rate: float = 0.1,
+        impact: float = 0.001,
+        max_carry_bars: Optional[int] = None,
+    ):
+        if not 0.0 < participation_rate <= 1.0:
+            raise ValueError("participation_rate must be in (0, 1]")
+        self.participation_rate = participation_rate
+        self.impact = impact
+        self.max_carry_bars = max_carry_bars
+
+        self._ts = np.empty(0, dtype=np.int64)
+        self._capacity = np.empty(0, dtype=np.int64)
+        self._price = np.empty(0, dtype=np.float64)
+        self._inv_volume = np.empty(0, dtype=np.float64)
+
+        # bars arrive in time order: remember the last position and how
+        # much of that bar's capacity is already used
+        self._cursor = 0
+        self._used_ts: Optional[int] = None
+        self._used = 0
+
+    def _liquidity_arrays(self, volume, trade_count, vwap, close):
+        volume = np.nan_to_num(np.asarray(volume, dtype=np.float64), nan=0.0)
+        capacity = np.floor(self.participation_rate * volume).astype(np.int64)
+        if trade_count is not None:
+            trade_count = np.nan_to_num(np.asarray(trade_count, dtype=np.float64), nan=0.0)
+            capacity[trade_count <= 0] = 0
+
+        close = np.asarray(close, dtype=np.float64)
+        if vwap is None:
+            price = close
+        else:
+            vwap = np.asarray(vwap, dtype=np.float64)
+            price = np.where(np.isfinite(vwap) & (vwap > 0), vwap, close)
+
+        with np.errstate(divide="ignore"):
+            inv_volume = np.where(volume > 0, 1.0 / volume, 0.0)
+        return capacity, price, inv_volume
+
+    def prepare(self, market_data: pd.DataFrame) -> None:
+        self._ts = pd.DatetimeIndex(market_data.index).as_unit("ns").asi8
+        self._capacity, self._price, self._inv_volume = self._liquidity_arrays(
+            market_data["Volume"] if "Volume" in market_data else np.zeros(len(market_data)),
+            market_data["trade_count"] if "trade_count" in market_data else None,
+            market_data["vwap"] if "vwap" in market_data else None,
+            market_data["Close"],
+        )
+        self._cursor = 0
+
+    def _position(self, ts_ns: int) -> int:
+        """Row of ts_ns in the prepared arrays, or -1."""
+        ts = self._ts
+        i = self._cursor
+        if i < len(ts) and ts[i] == ts_ns:
+            return i
+        if i + 1 < len(ts) and ts[i + 1] == ts_ns:
+            self._cursor = i + 1
+            return i + 1
+        i = int(ts.searchsorted(ts_ns))
+        if i < len(ts) and ts[i] == ts_ns:
+            self._cursor = i
+            return i
+        return -1
+
+    def _bar_liquidity(self, current_tick) -> Tuple[int, int, float, float]:
+        ts_ns = pd.Timestamp(current_tick.name).value
+        i = self._position(ts_ns)
+        if i >= 0:
+            capacity, price, inv_volume = self._capacity[i], self._price[i], self._inv_volume[i]
+        else:
+            capacity, price, inv_volume = self._liquidity_arrays(
+                [current_tick.get("Volume", 0.0)],
+                [current_tick["trade_count"]] if "trade_count" in current_tick else None,
+                [current_tick["vwap"]] if "vwap" in current_tick else None,
+                [current_tick["Close"]],
+            )
+            capacity, price, inv_volume = capacity[0], price[0], inv_volume[0]
+        return ts_ns, int(capacity), float(price), float(inv_volume)
+
+    def fill(self, engine, order, current_tick, quantity, fill_price=None):
+        ts_ns, capacity, price, inv_volume = self._bar_liquidity(current_tick)
+        if ts_ns != self._used_ts:
+            self._used_ts = ts_ns
+            self._used = 0
+
+        fill_qty = min(quantity, capacity - self._used)
+        if fill_qty <= 0:
+            return 0, price
+
+        if fill_price is not None:
+            price = fill_price
+        slip = self.impact * math.sqrt(fill_qty * inv_volume)
+        if order.side_code == Side.BUY:
+            price *= 1.0 + slip
+            if order.type_code == OrderType.LIMIT and order.price is not None:
+                price = min(price, order.price)
+        else:
+            price *= 1.0 - slip
+            if order.type_code == OrderType.LIMIT and order.price is not None:
+                price = max(price, order.price)
+
+        self._used += fill_qty
+        return fill_qty, price
+
+
+FILL_MODELS = {
+    "random": RandomPartialFillModel,
+    "participation": ParticipationFillModel,
+}
+
+
+def build_fill_model(config: Optional[Dict[str, Any]] = None) -> FillModel:
+    """
+    Fill model from a settings dict such as
+    {"type": "participation", "participation_rate": 0.05, "impact": 0.001}.
+    None or a missing type gives the random partial fill model.
+    """
+    config = dict(config or {})
+    kind = config.pop("type", "random")
+    if kind not in FILL_MODELS:
+        raise ValueError(f"Unknown fill model '{kind}'")
+    return FILL_MODELS[kind](**config)
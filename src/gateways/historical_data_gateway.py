@@ -15,6 +15,10 @@ class HistoricalDataGateway(BaseDataGateway):
                 raise ValueError(f"No data found in {csv_filepath}")
             
             self._data_stream = self.market_data.iterrows()
+            self.num_rows = len(self.market_data)
+            # row position of the next tick and end of the streamed slice
+            self._pos = 0
+            self._stop = len(self.market_data)
             
             print(f"HistoricalDataGateway: Loaded {len(self.market_data)} historical bars.")
             
@@ -26,10 +30,49 @@ class HistoricalDataGateway(BaseDataGateway):
             print(f"Error loading historical data: {e}")
             raise
 
+    def set_range(self, start=None, end=None, warmup_bars: int = 0) -> int:
+        """
+        Restrict the stream to bars with start <= timestamp < end, plus up to
+        warmup_bars bars before start. Positions are found by binary search
+        on the sorted index and the rows are iterated from a slice, so no
+        data is copied.
+
+        Returns the number of warm-up bars actually included.
+        """
+        index = self.market_data.index
+        lo = 0 if start is None else index.searchsorted(self.to_index_timestamp(start), side="left")
+        hi = len(index) if end is None else index.searchsorted(self.to_index_timestamp(end), side="left")
+        first = max(0, lo - warmup_bars)
+
+        self._data_stream = self.market_data.iloc[first:hi].iterrows()
+        self.num_rows = max(0, hi - first)
+        self._pos = first
+        self._stop = hi
+        return lo - first
+
+    @property
+    def cursor(self) -> int:
+        """Row position of the next tick."""
+        return self._pos
+
+    def seek(self, pos: int) -> None:
+        """Continue the stream at row pos (used when resuming a checkpoint)."""
+        self._data_stream = self.market_data.iloc[pos:self._stop].iterrows()
+        self._pos = pos
+
+    def to_index_timestamp(self, ts) -> pd.Timestamp:
+        """Parse ts in the timezone of the loaded data."""
+        ts = pd.Timestamp(ts)
+        tz = getattr(self.market_data.index, "tz", None)
+        if tz is not None and ts.tzinfo is None:
+            ts = ts.tz_localize(tz)
+        return ts
+
     def get_next_tick(self):
         """ Pulls the *next* row from the loaded CSV data. """
         try:
             tick_data = next(self._data_stream)
+            self._pos += 1
             return tick_data
         
         except StopIteration:
@@ -1,7 +1,7 @@
 # src/gateways/multi_historical_data_gateway.py
 
 import json
-from typing import Dict, Tuple, Optional, Any
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 from src.gateways.base_gateway import BaseDataGateway
 from src.gateways.historical_data_gateway import HistoricalDataGateway
@@ -12,13 +12,23 @@ class MultiHistoricalDataGateway(BaseDataGateway):
     Streams one bar per ticker on each call.
 
     Assumes all CSV files use the same timestamps.
+
+    tickers restricts the stream to those entries of the config.
     """
 
-    def __init__(self, config_path: str = "settings/market_data_config.json"):
+    def __init__(
+        self,
+        config_path: str = "settings/market_data_config.json",
+        tickers: Optional[Iterable[str]] = None,
+    ):
         try:
             with open(config_path, "r") as f:
                 config = json.load(f)
 
+            if tickers is not None:
+                wanted = set(tickers)
+                config = [entry for entry in config if entry["ticker"] in wanted]
+
             if not config:
                 raise ValueError(
                     f"No tickers defined in {config_path}"
@@ -71,7 +81,8 @@ class MultiHistoricalDataGateway(BaseDataGateway):
         ticks = {}
         finished = []
 
-        for ticker in list(self._active_tickers):
+        # config order, so the bar order does not depend on set hashing
+        for ticker in self.tickers():
             gateway = self._gateways[ticker]
             tick = gateway.get_next_tick()
 
@@ -91,5 +102,54 @@ class MultiHistoricalDataGateway(BaseDataGateway):
 
         return ticks
 
+    def tickers(self):
+        """Tickers that still have bars to stream."""
+        return [t for t in self._gateways if t in self._active_tickers]
+
+    def get_next_tick_for(self, ticker: str) -> Optional[Tuple[Any, Any]]:
+        """Next (timestamp, row) of one ticker, or None when it is exhausted."""
+        if ticker not in self._active_tickers:
+            return None
+        tick = self._gateways[ticker].get_next_tick()
+        if tick is None:
+            self._active_tickers.discard(ticker)
+        return tick
+
     def has_data(self) -> bool:
         return bool(self._active_tickers)
+
+    def set_range(self, start=None, end=None, warmup_bars: int = 0) -> None:
+        """
+        Restrict every ticker to [start, end) plus warmup_bars bars before
+        start. See HistoricalDataGateway.set_range.
+        """
+        for gateway in self._gateways.values():
+            gateway.set_range(start=start, end=end, warmup_bars=warmup_bars)
+        self._active_tickers = set(self._gateways.keys())
+
+    def get_state(self) -> Dict[str, Any]:
+        """Stream cursors of every ticker, for checkpoints."""
+        return {
+            "cursors": {t: g.cursor for t, g in self._gateways.items()},
+            "active": sorted(self._active_tickers),
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """Move every ticker back to the cursors saved by get_state."""
+        for ticker, pos in state["cursors"].items():
+            self._gateways[ticker].seek(pos)
+        self._active_tickers = set(state["active"])
+
+    def to_index_timestamp(self, ts):
+        """Parse ts in the timezone of the loaded data."""
+        gateway = next(iter(self._gateways.values()))
+        return gateway.to_index_timestamp(ts)
+
+    def get_market_data(self, ticker: str):
+        """Full loaded frame of one ticker (ignores set_range)."""
+        return self._gateways[ticker].market_data
+
+    @property
+    def num_bars(self) -> int:
+        """Number of steps the stream will produce (longest ticker)."""
+        return max(g.num_rows for g in self._gateways.values())
@@ -11,11 +11,14 @@ from src.signals import Signal   # <- THIS IMPORT IS IMPORTANT
 class OrderLogger:
     """ Logging Gateway for Backtester """
 
-    def __init__(self, log_dir: str = 'logs'):
+    def __init__(self, log_dir: str = 'logs', suffix: str = ''):
         self.log_dir = log_dir
+        self.suffix = suffix
 
+        # suffix tells apart the files of runs started in the same second
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.log_filepath = os.path.join(self.log_dir, f"order_log_{timestamp}.csv")
+        name = f"order_log_{timestamp}_{suffix}.csv" if suffix else f"order_log_{timestamp}.csv"
+        self.log_filepath = os.path.join(self.log_dir, name)
 
         self.fieldnames = [
             'timestamp',
@@ -82,11 +85,13 @@ class OrderLogger:
 class SignalLogger:
     """Logs raw strategy signals to a separate CSV."""
 
-    def __init__(self, log_dir: str = 'logs'):
+    def __init__(self, log_dir: str = 'logs', suffix: str = ''):
         self.log_dir = log_dir
 
+        # suffix tells apart the files of runs started in the same second
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.log_filepath = os.path.join(self.log_dir, f"signal_log_{timestamp}.csv")
+        name = f"signal_log_{timestamp}_{suffix}.csv" if suffix else f"signal_log_{timestamp}.csv"
+        self.log_filepath = os.path.join(self.log_dir, name)
 
         self.fieldnames = [
             'timestamp',
@@ -1,15 +1,175 @@
+import itertools
+from enum import IntEnum
+
+
+class Side(IntEnum):
+    BUY = 1
+    SELL = 2
+
+
+class OrderType(IntEnum):
+    MARKET = 0
+    LIMIT = 1
+    STOP = 2
+    STOP_LIMIT = 3
+    TRAILING_STOP = 4
+
+
+class OrderStatus(IntEnum):
+    PENDING = 0
+    PLACED = 1
+    WORKING = 2
+    UNTRIGGERED = 3
+    PARTIALLY_FILLED = 4
+    FILLED = 5
+    CANCELLED = 6
+    REJECTED = 7
+    EXPIRED = 8
+
+
+# names used in logs and reports; codes are what orders store
+SIDE_NAMES = {Side.BUY: "BUY", Side.SELL: "SELL"}
+TYPE_NAMES = {t: t.name for t in OrderType}
+STATUS_NAMES = {
+    OrderStatus.PENDING: "Pending",
+    OrderStatus.PLACED: "Placed",
+    OrderStatus.WORKING: "Working",
+    OrderStatus.UNTRIGGERED: "Untriggered",
+    OrderStatus.PARTIALLY_FILLED: "PartiallyFilled",
+    OrderStatus.FILLED: "Filled",
+    OrderStatus.CANCELLED: "Cancelled",
+    OrderStatus.REJECTED: "Rejected",
+    OrderStatus.EXPIRED: "Expired",
+}
+_SIDE_CODES = {name: code for code, name in SIDE_NAMES.items()}
+_TYPE_CODES = {name: code for code, name in TYPE_NAMES.items()}
+_STATUS_CODES = {name: code for code, name in STATUS_NAMES.items()}
+
+_order_ids = itertools.count(1)
+
+
+def next_order_id() -> int:
+    """Process wide monotonic order id."""
+    return next(_order_ids)
+
+
+def peek_next_order_id() -> int:
+    """Id the next call to next_order_id will return."""
+    global _order_ids
+    n = next(_order_ids)
+    _order_ids = itertools.count(n)
+    return n
+
+
+def reset_order_ids(start: int = 1) -> None:
+    """Restart order ids at start (used when resuming a checkpoint)."""
+    global _order_ids
+    _order_ids = itertools.count(start)
+
+
+# bits left for the order ids of one run when runs share an id space
+RUN_ID_SHIFT = 40
+
+
+def seed_order_ids(run_id: int) -> None:
+    """
+    Start the order ids of run run_id at (run_id << RUN_ID_SHIFT) + 1, so
+    parallel runs (sweep jobs, shards, seeds) never hand out the same id
+    while staying within int64 for run ids below 2**23.
+    """
+    if not 0 <= run_id < 1 << (63 - RUN_ID_SHIFT):
+        raise ValueError(f"run_id must be in [0, 2**{63 - RUN_ID_SHIFT}), got {run_id}")
+    reset_order_ids((run_id << RUN_ID_SHIFT) + 1)
+
+
+def _code(value, codes, enum):
+    if value is None or isinstance(value, enum):
+        return value
+    if isinstance(value, int):
+        return enum(value)
+    return codes[value.upper() if enum is not OrderStatus else value]
+
+
 class Order:
+    """
+    Compact order record.
+
+    side, order_type and status are stored as small int codes (Side,
+    OrderType, OrderStatus) in side_code / type_code / status_code. The
+    side / order_type / status properties give and accept the string
+    names ("BUY", "LIMIT", "Filled", ...) for logging and older call sites.
+    """
+
+    __slots__ = (
+        "order_id",
+        "timestamp",
+        "symbol",
+        "quantity",
+        "price",
+        "side_code",
+        "type_code",
+        "stop_price",
+        "trail_amount",
+        "trail_percent",
+        "strategy",
+        "time_in_force",
+        "expire_at",
+        "status_code",
+        "filled_price",
+        "filled_quantity",
+        "filled_timestamp",
+        "is_cancelled",
+    )
+
     def __init__(self, order_dict: dict):
         self.order_id = order_dict.get("order_id")
         self.timestamp = order_dict.get("timestamp")
         self.symbol = order_dict.get("symbol")
         self.quantity = order_dict.get("quantity")
         self.price = order_dict.get("price")
-        self.side = order_dict.get("side")          # "BUY" or "SELL"
-        self.order_type = order_dict.get("order_type")  # "MARKET", "LIMIT", etc
+        self.side_code = _code(order_dict.get("side"), _SIDE_CODES, Side)
+        self.type_code = _code(order_dict.get("order_type"), _TYPE_CODES, OrderType)
+        self.stop_price = order_dict.get("stop_price")  # trigger for stop orders
+        self.trail_amount = order_dict.get("trail_amount")  # trailing stops: absolute distance
+        self.trail_percent = order_dict.get("trail_percent")  # or fraction of the watermark
+        self.strategy = order_dict.get("strategy")  # signal source(s) behind the order
+        self.time_in_force = order_dict.get("time_in_force") or "GTC"  # "GTC", "DAY", "GTD", "IOC"
+        self.expire_at = order_dict.get("expire_at")  # timestamp, required for "GTD"
+        if self.time_in_force == "GTD" and self.expire_at is None:
+            raise ValueError("GTD order needs expire_at")
 
-        self.status = "Pending"
+        self.status_code = OrderStatus.PENDING
         self.filled_price = None
         self.filled_quantity = None
         self.filled_timestamp = None
         self.is_cancelled = False
+
+    # string views
+
+    @property
+    def side(self):
+        return SIDE_NAMES.get(self.side_code)
+
+    @side.setter
+    def side(self, value):
+        self.side_code = _code(value, _SIDE_CODES, Side)
+
+    @property
+    def order_type(self):
+        return TYPE_NAMES.get(self.type_code)
+
+    @order_type.setter
+    def order_type(self, value):
+        self.type_code = _code(value, _TYPE_CODES, OrderType)
+
+    @property
+    def status(self):
+        return STATUS_NAMES[self.status_code]
+
+    @status.setter
+    def status(self, value):
+        self.status_code = _code(value, _STATUS_CODES, OrderStatus)
+
+    @property
+    def is_buy(self) -> bool:
+        return self.side_code == Side.BUY
@@ -1,103 +1,375 @@
-import heapq
-import uuid
-from src.order import Order
+import bisect
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from src.order import Order, Side, next_order_id
+
+
+class _OrderNode:
+    """Handle for a resting order: links it into its price level's FIFO queue."""
+
+    __slots__ = ("order", "level", "prev", "next")
+
+    def __init__(self, order: Order, level: "PriceLevel"):
+        self.order = order
+        self.level = level
+        self.prev: Optional["_OrderNode"] = None
+        self.next: Optional["_OrderNode"] = None
+
+
+class PriceLevel:
+    """All resting orders at one price, in arrival order (doubly linked list)."""
+
+    __slots__ = ("price", "head", "tail", "count", "total_quantity")
+
+    def __init__(self, price: float):
+        self.price = price
+        self.head: Optional[_OrderNode] = None
+        self.tail: Optional[_OrderNode] = None
+        self.count = 0
+        self.total_quantity = 0
+
+    def append(self, node: _OrderNode) -> None:
+        node.prev = self.tail
+        node.next = None
+        if self.tail is None:
+            self.head = node
+        else:
+            self.tail.next = node
+        self.tail = node
+        self.count += 1
+        self.total_quantity += node.order.quantity
+
+    def remove(self, node: _OrderNode) -> None:
+        if node.prev is None:
+            self.head = node.next
+        else:
+            node.prev.next = node.next
+        if node.next is None:
+            self.tail = node.prev
+        else:
+            node.next.prev = node.prev
+        node.prev = node.next = None
+        self.count -= 1
+        self.total_quantity -= node.order.quantity
+
+    def orders(self) -> List[Order]:
+        out = []
+        node = self.head
+        while node is not None:
+            out.append(node.order)
+            node = node.next
+        return out
+
 
 class OrderBook:
+    """
+    Price level order book.
+
+    Each side keeps a dict of price -> PriceLevel plus a sorted list of its
+    prices arranged so the best price is always at the end of the list
+    (bids ascending, asks stored as negated prices). Top of book is O(1),
+    adding a new price level is a bisect insert, and every resting order has
+    a handle in self.orders so cancel and reduce are O(1).
+
+    Cancelled and filled orders leave the book immediately, but Python dicts
+    keep their peak table size. Once removals since the last compaction make
+    up more than compaction_threshold of all entries seen since then (and at
+    least min_compaction_size), the lookup tables are rebuilt so memory
+    tracks the live book rather than its history.
 
-    def __init__(self):
+    Top listeners are called with (best bid, best ask) whenever either of
+    them changes.
+    """
+
+    def __init__(self, compaction_threshold: float = 0.5, min_compaction_size: int = 4096):
         """ Initializes the order book. """
-        # (price, timestamp, order)
-        self.asks = []  # Min-heap
-        # (-price, timestamp, order)
-        self.bids = []  # Max-heap (using negative prices)
-        
-        self.orders = {} # Fast lookup for cancellation
+        self.bid_levels: Dict[float, PriceLevel] = {}
+        self.ask_levels: Dict[float, PriceLevel] = {}
+        # sort keys, best price last: bids by price, asks by -price
+        self._bid_keys: List[float] = []
+        self._ask_keys: List[float] = []
+
+        # order_id -> handle of every resting order, for O(1) cancel/reduce
+        self.orders: Dict[int, _OrderNode] = {}
+
+        # live counts per side
+        self.num_bid_orders = 0
+        self.num_ask_orders = 0
+
+        # lifetime counters and compaction state
+        self.total_added = 0
+        self.total_cancelled = 0
+        self.total_filled = 0
+        self.compactions = 0
+        self.compaction_threshold = compaction_threshold
+        self.min_compaction_size = min_compaction_size
+        self._removed_since_compact = 0
+        self._top_listeners = []  # callbacks (best_bid, best_ask) run when the top changes
         print("OrderBook (Waiting Room): Initialized.")
 
+    def add_top_listener(self, callback) -> None:
+        """Call callback(best_bid, best_ask) whenever the best bid or ask changes."""
+        if callback not in self._top_listeners:
+            self._top_listeners.append(callback)
+
+    def _top_changed(self) -> None:
+        if self._top_listeners:
+            bid = self.best_bid()
+            ask = self.best_ask()
+            for callback in self._top_listeners:
+                callback(bid, ask)
+
+    # ------------------------------------------------------------------
+    # internal level helpers
+    # ------------------------------------------------------------------
+
+    def _side(self, side: int):
+        if side == Side.BUY:
+            return self.bid_levels, self._bid_keys, 1.0
+        return self.ask_levels, self._ask_keys, -1.0
+
+    def _get_or_create_level(self, side: int, price: float) -> PriceLevel:
+        levels, keys, sign = self._side(side)
+        level = levels.get(price)
+        if level is None:
+            level = PriceLevel(price)
+            levels[price] = level
+            bisect.insort(keys, sign * price)
+            if keys[-1] == sign * price:
+                self._top_changed()
+        return level
+
+    def _drop_level_if_empty(self, side: int, level: PriceLevel) -> None:
+        if level.count > 0:
+            return
+        levels, keys, sign = self._side(side)
+        del levels[level.price]
+        key = sign * level.price
+        if keys and keys[-1] == key:
+            keys.pop()
+            self._top_changed()
+        else:
+            del keys[bisect.bisect_left(keys, key)]
+
+    def _unlink(self, node: _OrderNode) -> None:
+        level = node.level
+        level.remove(node)
+        side = node.order.side_code
+        self._drop_level_if_empty(side, level)
+        if side == Side.BUY:
+            self.num_bid_orders -= 1
+        else:
+            self.num_ask_orders -= 1
+
+        self._removed_since_compact += 1
+        removed = self._removed_since_compact
+        if (
+            removed >= self.min_compaction_size
+            and removed > self.compaction_threshold * (removed + len(self.orders))
+        ):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rebuild the lookup tables at their live size."""
+        self.orders = dict(self.orders)
+        self.bid_levels = dict(self.bid_levels)
+        self.ask_levels = dict(self.ask_levels)
+        self._bid_keys = list(self._bid_keys)
+        self._ask_keys = list(self._ask_keys)
+        self._removed_since_compact = 0
+        self.compactions += 1
+
+    # ------------------------------------------------------------------
+    # order entry
+    # ------------------------------------------------------------------
+
     def add_order(self, order: Order):
-        """ Adds a new, open order to the book. """
+        """ Adds a new, open order to the back of its price level. """
         # 1. Set order ID if not already set
         if order.order_id is None:
-            order.order_id = str(uuid.uuid4())
+            order.order_id = next_order_id()
         order.is_cancelled = False
-        
-        # 2. Store the order for fast lookup
-        self.orders[order.order_id] = order
-        
-        # 3. Add the order to the correct heap
-        if order.side == 'BUY':
-            heap_item = (-order.price, order.timestamp, order)
-            heapq.heappush(self.bids, heap_item)
+
+        # 2. Queue it at its price level and keep the handle
+        level = self._get_or_create_level(order.side_code, order.price)
+        node = _OrderNode(order, level)
+        level.append(node)
+        self.orders[order.order_id] = node
+
+        if order.side_code == Side.BUY:
+            self.num_bid_orders += 1
         else:
-            heap_item = (order.price, order.timestamp, order)
-            heapq.heappush(self.asks, heap_item)
-                
+            self.num_ask_orders += 1
+        self.total_added += 1
+
         return order.order_id
 
     def cancel_order(self, order_id):
-        """ Marks an order for cancellation ("lazy cancellation"). """
-        if order_id in self.orders:
-            self.orders[order_id].is_cancelled = True
-            print(f"OrderBook: Order {order_id} marked for cancellation.")
+        """ Removes a resting order from the book. """
+        node = self.orders.pop(order_id, None)
+        if node is not None:
+            node.order.is_cancelled = True
+            self.total_cancelled += 1
+            self._unlink(node)
+            print(f"OrderBook: Order {order_id} cancelled.")
             return True
         else:
             print(f"OrderBook: Error - Cannot cancel. Order {order_id} not found.")
             return False
 
+    def reduce_order(self, order_id, quantity) -> bool:
+        """
+        Reduces the open quantity of a resting order in place, keeping its
+        queue position. Reducing to zero or below cancels it.
+        """
+        node = self.orders.get(order_id)
+        if node is None:
+            return False
+        order = node.order
+        new_qty = order.quantity - quantity
+        if new_qty <= 0:
+            return self.cancel_order(order_id)
+        node.level.total_quantity -= quantity
+        order.quantity = new_qty
+        return True
+
     def modify_order(self, order_id, new_details):
-        """ Modifies an order by cancelling the old one and adding a new one. """
-        if self.cancel_order(order_id):
-            # Get old order and create a new one with modifications
-            old_order = self.orders[order_id]
-            new_order_dict = {
-                'side': old_order.side,
-                'quantity': new_details.get('quantity', old_order.quantity),
-                'price': new_details.get('price', old_order.price),
-                'order_type': old_order.order_type,
-                'symbol': old_order.symbol,
-                'timestamp': old_order.timestamp
-            }
-            new_order = Order(new_order_dict)
-            return self.add_order(new_order)
-        else:
+        """
+        Modifies an order. A pure quantity decrease keeps queue priority;
+        any other change cancels the old order and adds a new one.
+        """
+        node = self.orders.get(order_id)
+        if node is None:
+            print(f"OrderBook: Error - Cannot modify. Order {order_id} not found.")
             return None # Old order not found
 
+        old_order = node.order
+        new_qty = new_details.get('quantity', old_order.quantity)
+        new_price = new_details.get('price', old_order.price)
+
+        if new_price == old_order.price and new_qty < old_order.quantity:
+            self.reduce_order(order_id, old_order.quantity - new_qty)
+            return order_id
+
+        self.cancel_order(order_id)
+        new_order_dict = {
+            'side': old_order.side_code,
+            'quantity': new_qty,
+            'price': new_price,
+            'order_type': old_order.type_code,
+            'symbol': old_order.symbol,
+            'timestamp': old_order.timestamp,
+            'strategy': old_order.strategy,
+            'time_in_force': old_order.time_in_force,
+            'expire_at': old_order.expire_at,
+        }
+        new_order = Order(new_order_dict)
+        return self.add_order(new_order)
+
+    # ------------------------------------------------------------------
+    # best orders (used by SimulatedMatchingEngine)
+    # ------------------------------------------------------------------
+
     def get_best_bid_order(self):
         """Returns the full order at the highest bid (or None)."""
-        while self.bids:
-            price_neg, _, order = self.bids[0]
-            if order.is_cancelled:
-                heapq.heappop(self.bids) # Clean up cancelled orders
-                continue
-            return order
-        return None
+        if not self._bid_keys:
+            return None
+        return self.bid_levels[self._bid_keys[-1]].head.order
 
     def get_best_ask_order(self):
         """Returns the full order at the lowest ask (or None)."""
-        while self.asks:
-            price, _, order = self.asks[0]
-            if order.is_cancelled:
-                heapq.heappop(self.asks) # Clean up cancelled orders
-                continue
-            return order
-        return None
-        
+        if not self._ask_keys:
+            return None
+        return self.ask_levels[-self._ask_keys[-1]].head.order
+
     def pop_best_bid_order(self):
         """Removes and returns the best bid order."""
-        while self.bids:
-            price_neg, _, order = heapq.heappop(self.bids)
-            if order.is_cancelled:
-                continue
-            del self.orders[order.order_id]
-            return order
-        return None
-        
+        order = self.get_best_bid_order()
+        if order is None:
+            return None
+        self.total_filled += 1
+        self._unlink(self.orders.pop(order.order_id))
+        return order
+
     def pop_best_ask_order(self):
         """Removes and returns the best ask order."""
-        while self.asks:
-            price, _, order = heapq.heappop(self.asks)
-            if order.is_cancelled:
-                continue
-            del self.orders[order.order_id]
-            return order
-        return None
\ No newline at end of file
+        order = self.get_best_ask_order()
+        if order is None:
+            return None
+        self.total_filled += 1
+        self._unlink(self.orders.pop(order.order_id))
+        return order
+
+    # ------------------------------------------------------------------
+    # market data views
+    # ------------------------------------------------------------------
+
+    def best_bid(self) -> Optional[float]:
+        return self._bid_keys[-1] if self._bid_keys else None
+
+    def best_ask(self) -> Optional[float]:
+        return -self._ask_keys[-1] if self._ask_keys else None
+
+    def top_of_book(self) -> Tuple[Optional[float], int, Optional[float], int]:
+        """(best bid, bid quantity, best ask, ask quantity) in O(1)."""
+        bid = self.best_bid()
+        ask = self.best_ask()
+        bid_qty = self.bid_levels[bid].total_quantity if bid is not None else 0
+        ask_qty = self.ask_levels[ask].total_quantity if ask is not None else 0
+        return bid, bid_qty, ask, ask_qty
+
+    def depth(self, levels: int = 5) -> Dict[str, List[Tuple[float, int, int]]]:
+        """
+        Aggregated depth snapshot, best price first:
+        {"bids": [(price, quantity, order count), ...], "asks": [...]}
+        """
+        if levels <= 0:
+            return {"bids": [], "asks": []}
+        bids = [
+            (p, self.bid_levels[p].total_quantity, self.bid_levels[p].count)
+            for p in reversed(self._bid_keys[-levels:])
+        ]
+        asks = [
+            (-k, self.ask_levels[-k].total_quantity, self.ask_levels[-k].count)
+            for k in reversed(self._ask_keys[-levels:])
+        ]
+        return {"bids": bids, "asks": asks}
+
+    def get_order(self, order_id) -> Optional[Order]:
+        node = self.orders.get(order_id)
+        return None if node is None else node.order
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    @property
+    def num_live_orders(self) -> int:
+        return len(self.orders)
+
+    def memory_stats(self) -> Dict[str, int]:
+        """Live counts, lifetime counters and an O(1) estimate of book memory."""
+        n_levels = len(self.bid_levels) + len(self.ask_levels)
+        node_bytes = sys.getsizeof(_OrderNode.__new__(_OrderNode))
+        level_bytes = sys.getsizeof(PriceLevel.__new__(PriceLevel))
+        approx_bytes = (
+            sys.getsizeof(self.orders)
+            + sys.getsizeof(self.bid_levels)
+            + sys.getsizeof(self.ask_levels)
+            + sys.getsizeof(self._bid_keys)
+            + sys.getsizeof(self._ask_keys)
+            + len(self.orders) * node_bytes
+            + n_levels * level_bytes
+        )
+        return {
+            "live_orders": len(self.orders),
+            "bid_orders": self.num_bid_orders,
+            "ask_orders": self.num_ask_orders,
+            "bid_levels": len(self.bid_levels),
+            "ask_levels": len(self.ask_levels),
+            "total_added": self.total_added,
+            "total_cancelled": self.total_cancelled,
+            "total_filled": self.total_filled,
+            "compactions": self.compactions,
+            "approx_bytes": approx_bytes,
+        }
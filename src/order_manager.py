@@ -1,9 +1,14 @@
 # order_manager.py
 
-from collections import deque
-import pandas as pd
-from src.order import Order
+import json
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from src.order import Order, Side
 from src.logger_gateway import OrderLogger
+from src.rate_limiter import RateLimiter
+from src.utills.timestamps import to_ns
 
 
 class OrderManager:
@@ -11,8 +16,12 @@ class OrderManager:
     Validates and records orders *before* execution.
     It checks:
     1. Capital Sufficiency
-    2. Risk Limits (Orders per minute)
-    3. Position Limits (Total shares held)
+    2. Risk Limits (order rate: global, per symbol, per strategy)
+    3. Position Limits (Total shares held, no short sales unless allow_short)
+
+    Rate limits work on int64 nanosecond timestamps (see RateLimiter).
+    rate_limits is the "rate_limits" block of the risk settings; without a
+    global entry max_orders_per_minute is used as a one minute window.
     """
 
     def __init__(
@@ -21,14 +30,45 @@ class OrderManager:
         max_orders_per_minute: int,
         max_position_size: int,
         order_logger: OrderLogger | None = None,
+        rate_limits: Dict[str, Any] | None = None,
+        allow_short: bool = False,
     ):
         self.capital = initial_capital
+        self.allow_short = allow_short
         self.max_orders_per_minute = max_orders_per_minute
         self.max_position_size = max_position_size
-        self.order_timestamps = deque()
+        self.rate_limiter = RateLimiter.from_settings(rate_limits, max_orders_per_minute)
 
         self.order_logger = order_logger
 
+    @classmethod
+    def from_settings(
+        cls,
+        settings: Dict[str, Any],
+        initial_capital: float,
+        order_logger: OrderLogger | None = None,
+    ) -> "OrderManager":
+        """Build from a risk settings dict (see src/settings/risk_settings.json)."""
+        return cls(
+            initial_capital=initial_capital,
+            max_orders_per_minute=settings.get("max_orders_per_minute", 60),
+            max_position_size=settings.get("max_position_size", 10_000),
+            order_logger=order_logger,
+            rate_limits=settings.get("rate_limits"),
+            allow_short=settings.get("allow_short", False),
+        )
+
+    @classmethod
+    def from_json(
+        cls,
+        json_path: str,
+        initial_capital: float,
+        order_logger: OrderLogger | None = None,
+    ) -> "OrderManager":
+        with open(json_path, "r") as f:
+            settings = json.load(f)
+        return cls.from_settings(settings, initial_capital, order_logger)
+
     def _log_risk_event(self, event_type: str, order: Order, reason: str):
         if self.order_logger is None:
             return
@@ -40,50 +80,93 @@ class OrderManager:
             reason=reason,
         )
 
-    def validate_order(self, order: Order, current_capital: float, current_position_size: int):
-        new_time = order.timestamp
-
-        one_minute_ago = new_time - pd.Timedelta('1 minute')
-        while self.order_timestamps and self.order_timestamps[0] < one_minute_ago:
-            self.order_timestamps.popleft()
+    def _check(self, order: Order, ts_ns: int, capital: float, position_size) -> str | None:
+        """Reason the order fails a risk check, or None if it passes."""
+        reason = self.rate_limiter.check(ts_ns, order.symbol, order.strategy)
+        if reason is not None:
+            return reason
 
-        if len(self.order_timestamps) >= self.max_orders_per_minute:
-            reason = f"Too many orders per minute. (Limit: {self.max_orders_per_minute})"
-            #print(f"Risk Check FAILED: {reason}")
-            self._log_risk_event("RISK_FAIL", order, reason)
-            return False
+        is_buy = order.side_code == Side.BUY
+        ref_price = order.price if order.price is not None else (order.stop_price or 0.0)
+        required_capital = order.quantity * ref_price
 
-        required_capital = order.quantity * order.price
-
-        if required_capital > current_capital and order.side == 'BUY':
-            reason = (
+        if required_capital > capital and is_buy:
+            return (
                 f"Not enough capital. "
-                f"(Need: ${required_capital:.2f}, Have: ${current_capital:.2f})"
+                f"(Need: ${required_capital:.2f}, Have: ${capital:.2f})"
             )
-            #print(f"Risk Check FAILED: {reason}")
-            self._log_risk_event("RISK_FAIL", order, reason)
-            return False
 
-        if order.side == 'BUY':
-            new_position = current_position_size + order.quantity
+        if is_buy:
+            new_position = position_size + order.quantity
             if new_position > self.max_position_size:
-                reason = f"Order would exceed max position size. (Limit: {self.max_position_size})"
-                #print(f"Risk Check FAILED: {reason}")
-                self._log_risk_event("RISK_FAIL", order, reason)
-                return False
+                return f"Order would exceed max position size. (Limit: {self.max_position_size})"
         else:
-            new_position = current_position_size - order.quantity
-            if new_position < 0:
-                reason = (
+            new_position = position_size - order.quantity
+            if new_position < 0 and not self.allow_short:
+                return (
                     f"Cannot sell more shares than you own. "
-                    f"(Have: {current_position_size}, Sell: {order.quantity})"
+                    f"(Have: {position_size}, Sell: {order.quantity})"
                 )
-                #print(f"Risk Check FAILED: {reason}")
-                self._log_risk_event("RISK_FAIL", order, reason)
-                return False
+            if new_position < -self.max_position_size:
+                return f"Order would exceed max short size. (Limit: {self.max_position_size})"
+
+        return None
+
+    def validate_order(self, order: Order, current_capital: float, current_position_size: int):
+        ts_ns = to_ns(order.timestamp)
+
+        reason = self._check(order, ts_ns, current_capital, current_position_size)
+        if reason is not None:
+            #print(f"Risk Check FAILED: {reason}")
+            self._log_risk_event("RISK_FAIL", order, reason)
+            return False
 
         # passed all checks
         #print(f"Risk Check PASSED: Order {order.side} {order.quantity} @ {order.price:.2f}")
-        self.order_timestamps.append(new_time)
+        self.rate_limiter.record(ts_ns, order.symbol, order.strategy)
         self._log_risk_event("RISK_PASS", order, "All risk checks passed")
         return True
+
+    def validate_batch(
+        self,
+        orders: List[Order],
+        portfolio_state: Dict[str, Any],
+    ) -> Tuple[np.ndarray, List[str | None]]:
+        """
+        Risk check a list of orders in order, with cumulative effects.
+
+        portfolio_state holds "cash" and "positions" (symbol -> quantity).
+        Capital reserved by accepted buys is not available to later orders,
+        and accepted orders move the position later orders of the same
+        symbol are checked against. Sale proceeds are not counted until the
+        fill. Accepted orders count against the rate limits.
+
+        Returns (accepted mask, reasons) with reasons[i] None for accepted
+        orders. Only rejections are logged, one row each.
+        """
+        n = len(orders)
+        accepted = np.zeros(n, dtype=bool)
+        reasons: List[str | None] = [None] * n
+
+        cash = portfolio_state.get("cash", 0.0)
+        positions = dict(portfolio_state.get("positions") or {})
+
+        for i, order in enumerate(orders):
+            ts_ns = to_ns(order.timestamp)
+            position = positions.get(order.symbol, 0)
+            reason = self._check(order, ts_ns, cash, position)
+            if reason is not None:
+                reasons[i] = reason
+                self._log_risk_event("RISK_FAIL", order, reason)
+                continue
+
+            accepted[i] = True
+            self.rate_limiter.record(ts_ns, order.symbol, order.strategy)
+            if order.side_code == Side.BUY:
+                ref_price = order.price if order.price is not None else (order.stop_price or 0.0)
+                cash -= order.quantity * ref_price
+                positions[order.symbol] = position + order.quantity
+            else:
+                positions[order.symbol] = position - order.quantity
+
+        return accepted, reasons
@@ -0,0 +1,208 @@
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.price_manager import PriceManager
+from src.execution_manager import ExecutionManager
+from src.order_manager import OrderManager
+from src.position_manager import PositionManager
+from src.order import Order
+from src.order_book import OrderBook
+from src.fill_models import build_fill_model
+from src.simulatedMatchingEngine import EngineBoard, SimulatedMatchingEngine
+from src.logger_gateway import OrderLogger
+from src.equity_curve import EquityCurve, OnlineStats
+from src.utills.performance import TRADE_COLUMNS, performance_summary
+
+
+class Portfolio:
+    """
+    One simulated account of a backtest.
+
+    Holds everything that depends on the account and not on the market:
+    sizing (ExecutionManager), risk checks (OrderManager), cash and
+    positions (PositionManager), the order books and matching engines of
+    its symbols, and its equity curve and running stats. The Backtester
+    feeds every portfolio the same bars and signal bundles.
+
+    Each matching engine draws its fills from a child stream of seed_seq,
+    in the order the symbols first appear. The engines are attached to
+    one EngineBoard, so resting orders of all symbols are matched in a
+    batch (see engines_for).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        position_manager: PositionManager,
+        execution_manager: ExecutionManager,
+        order_manager: OrderManager,
+        order_logger: OrderLogger,
+        seed_seq: np.random.SeedSequence,
+        fill_model: dict | None = None,
+        capacity: int = 1024,
+        exec_cfg: dict | None = None,
+        init_portfolio_cfg: dict | None = None,
+        order_mgr_params: dict | None = None,
+    ):
+        self.name = name
+        self.pmgr = position_manager
+        self.exec_mgr = execution_manager
+        self.order_mgr = order_manager
+        self.order_logger = order_logger
+        self.fill_model_cfg = fill_model
+
+        # configs to show in reports
+        self.exec_cfg = exec_cfg or {}
+        self.init_portfolio_cfg = init_portfolio_cfg or {}
+        self.order_mgr_params = order_mgr_params or {}
+
+        self.order_books: Dict[str, OrderBook] = {}
+        self.matching_engines: Dict[str, SimulatedMatchingEngine] = {}
+        self.board = EngineBoard()
+        # engines and board rows of the last symbols passed to engines_for
+        self._batch_symbols: Tuple[str, ...] = ()
+        self._batch: Tuple[List[SimulatedMatchingEngine], np.ndarray] = ([], np.empty(0, dtype=np.intp))
+
+        self.equity_curve = EquityCurve(capacity=capacity)
+        self.stats = OnlineStats()
+        # number of trade log records already fed into self.stats
+        self._trades_seen = 0
+        self._seed_seq = seed_seq
+
+    @classmethod
+    def from_config(
+        cls,
+        name: str,
+        price_manager: PriceManager,
+        exec_cfg: dict,
+        init_portfolio_cfg: dict,
+        order_mgr_params: dict,
+        order_logger: OrderLogger,
+        seed_seq: np.random.SeedSequence,
+        fill_model: dict | None = None,
+        capacity: int = 1024,
+    ) -> "Portfolio":
+        """Build the managers of a portfolio from its settings dicts."""
+        pmgr = PositionManager.from_dict(init_portfolio_cfg)
+        exec_mgr = ExecutionManager(
+            price_manager=price_manager,
+            position_manager=pmgr,
+            starting_cash=pmgr.get_cash(),
+            settings_dict=exec_cfg,
+        )
+        order_mgr = OrderManager.from_settings(
+            order_mgr_params,
+            initial_capital=pmgr.get_cash(),
+            order_logger=order_logger,
+        )
+        return cls(
+            name,
+            pmgr,
+            exec_mgr,
+            order_mgr,
+            order_logger,
+            seed_seq,
+            fill_model=fill_model,
+            capacity=capacity,
+            exec_cfg=exec_cfg,
+            init_portfolio_cfg=init_portfolio_cfg,
+            order_mgr_params=order_mgr_params,
+        )
+
+    def get_engine(self, symbol: str, market_data: pd.DataFrame) -> SimulatedMatchingEngine:
+        """
+        Order book and matching engine of symbol, created on first use;
+        market_data is the symbol's full data for the fill model.
+        """
+        engine = self.matching_engines.get(symbol)
+        if engine is None:
+            ob = OrderBook()
+            fill_model = build_fill_model(self.fill_model_cfg)
+            fill_model.prepare(market_data)
+            engine = SimulatedMatchingEngine(
+                order_book=ob,
+                order_logger=self.order_logger,
+                position_manager=self.pmgr,
+                seed=self._seed_seq.spawn(1)[0],
+                fill_model=fill_model,
+            )
+            self.board.attach(engine)
+            self.order_books[symbol] = ob
+            self.matching_engines[symbol] = engine
+        return engine
+
+    def engines_for(
+        self,
+        symbols: Tuple[str, ...],
+        market_data: Callable[[str], pd.DataFrame],
+    ) -> Tuple[List[SimulatedMatchingEngine], np.ndarray]:
+        """
+        Engines of symbols and their board rows, as match_resting_orders
+        takes them; market_data(symbol) gives the data of a new engine.
+        Reused as long as consecutive bars carry the same symbols.
+        """
+        if symbols != self._batch_symbols:
+            engines = [
+                self.matching_engines.get(sym) or self.get_engine(sym, market_data(sym))
+                for sym in symbols
+            ]
+            slots = np.fromiter((e.board_slot for e in engines), dtype=np.intp, count=len(engines))
+            self._batch_symbols = symbols
+            self._batch = (engines, slots)
+        return self._batch
+
+    def portfolio_state(self, orders: List[Order]) -> Dict[str, Any]:
+        """
+        Cash and positions of the order symbols, as validate_batch takes
+        them. Remainders the engines are still working count as filled.
+        """
+        cash = self.exec_mgr.cash
+        positions = {o.symbol: self.exec_mgr.get_position_qty(o.symbol) for o in orders}
+        for symbol, engine in self.matching_engines.items():
+            qty, buy_value = engine.working_exposure()
+            if qty:
+                cash -= buy_value
+                if symbol in positions:
+                    positions[symbol] += qty
+        return {"cash": cash, "positions": positions}
+
+    def record_equity(self, bar_timestamp: pd.Timestamp) -> None:
+        """Append equity at bar_timestamp and feed new trades into the stats."""
+        equity = self.exec_mgr.get_portfolio_value()
+        if len(self.equity_curve) == 0:
+            self.equity_curve.tz = bar_timestamp.tz
+        ts_ns = bar_timestamp.value
+        self.equity_curve.append(ts_ns, equity)
+        self.stats.update(ts_ns, equity)
+
+        trade_log = self.pmgr.trade_log
+        n = len(trade_log)
+        if n > self._trades_seen:
+            for pnl in trade_log.realized_pnl[self._trades_seen:n].tolist():
+                self.stats.record_trade(pnl)
+            self._trades_seen = n
+
+    # results
+
+    def get_equity_curve_dataframe(self) -> pd.DataFrame:
+        return self.equity_curve.to_dataframe()
+
+    def get_trade_arrays(self) -> Dict[str, np.ndarray]:
+        """Trade log as NumPy columns (timestamps as int64 ns, side as 1 = buy / 2 = sell)."""
+        return self.pmgr.trade_log.to_arrays()
+
+    def get_trade_dataframe(self) -> pd.DataFrame:
+        trade_log = self.pmgr.trade_log
+        if len(trade_log) == 0:
+            return pd.DataFrame(columns=TRADE_COLUMNS)
+        return trade_log.to_dataframe()
+
+    def get_performance_summary(self) -> Dict[str, float]:
+        """Full vectorized analytics over the equity buffer and trade log."""
+        return performance_summary(
+            self.equity_curve.values,
+            self.equity_curve.timestamps,
+            self.get_trade_arrays(),
+        )
@@ -1,8 +1,15 @@
 import json
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from typing import Dict, Optional, List
 from datetime import datetime
 
+import numpy as np
+
+from src.order import Side
+from src.tax_lots import ClosedLots, LotQueue
+from src.trade_log import TradeLog, TradeRecord  # noqa: F401 (TradeRecord re-exported)
+from src.utills.timestamps import to_ns
+
 
 @dataclass
 class Position:
@@ -11,28 +18,66 @@ class Position:
     avg_price: float = 0.0
 
 
-@dataclass
-class TradeRecord:
-    timestamp: datetime
-    symbol: str
-    side: str
-    quantity: float
-    price: float
-    realized_pnl: float
-    position_after: float
+class PositionManager:
+    """
+    Cash, positions and trade log.
 
+    Positions live in symbol indexed NumPy arrays (quantity, avg_price,
+    realized_pnl, last_price); symbol_index maps a symbol to its row and
+    rows are appended on first use with amortized doubling. mark() records
+    a new price for one symbol and adjusts the running market value by
+    quantity * price change, and fills adjust it by the quantity change, so
+    market_value / marked_value() are O(1) no matter how many symbols are
+    held. Symbols without a price yet are left out, as before.
 
-@dataclass
-class PositionManager:
-    cash: float = 0.0
-    positions: Dict[str, Position] = field(default_factory=dict)
-    trade_log: List[TradeRecord] = field(default_factory=list)
+    positions and get_position() return Position snapshots for reporting.
+
+    Each symbol also has a LotQueue (lots) that does the cost accounting:
+    lot_method is FIFO, LIFO or AVERAGE, fills open or consume lots, and
+    the quantity / avg_price / realized_pnl arrays are written from the
+    queue after every fill. Closed lot pieces go to closed_lots for per-lot
+    realized P&L and holding periods.
+    """
+
+    def __init__(
+        self,
+        cash: float = 0.0,
+        positions: Optional[Dict[str, Position]] = None,
+        trade_log: Optional[TradeLog] = None,
+        capacity: int = 16,
+        lot_method: str = "AVERAGE",
+    ):
+        self.cash = cash
+        self.trade_log = trade_log if trade_log is not None else TradeLog()
+        self.lot_method = lot_method.upper()
+        self.lots: Dict[str, LotQueue] = {}
+        self.closed_lots = ClosedLots()
+
+        self.symbol_index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        capacity = max(capacity, 1)
+        self.quantities = np.zeros(capacity)
+        self.avg_prices = np.zeros(capacity)
+        self.realized_pnl = np.zeros(capacity)
+        self.last_prices = np.full(capacity, np.nan)
+        self.market_value = 0.0
+
+        for symbol, pos in (positions or {}).items():
+            i = self._index(symbol)
+            # opening time unknown: starts as a single lot
+            self.lots[symbol].fill(pos.quantity, pos.avg_price)
+            self.quantities[i] = pos.quantity
+            self.avg_prices[i] = pos.avg_price
 
     @classmethod
     def from_json(cls, path: str) -> "PositionManager":
         with open(path, "r") as f:
             data = json.load(f)
+        return cls.from_dict(data)
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "PositionManager":
+        """From the initial positions format (cash, positions, lot_method)."""
         cash = data.get("cash", 0.0)
         raw_positions = data.get("positions", {})
 
@@ -43,33 +88,98 @@ class PositionManager:
             avg = p.get("avg_price", 0.0)
             positions[symbol] = Position(symbol, qty, avg)
 
-        return cls(cash=cash, positions=positions)
+        return cls(cash=cash, positions=positions, lot_method=data.get("lot_method", "AVERAGE"))
+
+    # symbol rows
+
+    def _index(self, symbol: str) -> int:
+        """Row of symbol, added on first use."""
+        i = self.symbol_index.get(symbol)
+        if i is not None:
+            return i
+        i = len(self.symbols)
+        if i == len(self.quantities):
+            self._grow(2 * i)
+        self.symbol_index[symbol] = i
+        self.symbols.append(symbol)
+        self.lots[symbol] = LotQueue(self.lot_method)
+        return i
+
+    def _grow(self, capacity: int) -> None:
+        n = len(self.quantities)
+        for name, fill in (
+            ("quantities", 0.0),
+            ("avg_prices", 0.0),
+            ("realized_pnl", 0.0),
+            ("last_prices", np.nan),
+        ):
+            old = getattr(self, name)
+            new = np.full(capacity, fill)
+            new[:n] = old
+            setattr(self, name, new)
+
+    @property
+    def num_symbols(self) -> int:
+        return len(self.symbols)
+
+    # marking
+
+    def mark(self, symbol: str, price: float) -> None:
+        """New last price for symbol; updates the running market value."""
+        i = self._index(symbol)
+        old = self.last_prices[i]
+        qty = self.quantities[i]
+        if qty != 0:
+            if old == old:  # not NaN
+                self.market_value += qty * (price - old)
+            else:
+                self.market_value += qty * price
+        self.last_prices[i] = price
+
+    def marked_value(self) -> float:
+        """Cash plus positions at their last marked prices."""
+        return self.cash + self.market_value
+
+    def recompute_market_value(self) -> float:
+        """Exact market value from the arrays (resets accumulated rounding)."""
+        n = len(self.symbols)
+        self.market_value = float(np.nansum(self.quantities[:n] * self.last_prices[:n]))
+        return self.market_value
+
+    # queries
 
     def get_cash(self) -> float:
         return self.cash
 
+    def get_quantity(self, symbol: str) -> float:
+        i = self.symbol_index.get(symbol)
+        return 0.0 if i is None else float(self.quantities[i])
+
     def get_position(self, symbol: str) -> Optional[Position]:
-        return self.positions.get(symbol)
+        i = self.symbol_index.get(symbol)
+        if i is None:
+            return None
+        return Position(symbol, float(self.quantities[i]), float(self.avg_prices[i]))
+
+    @property
+    def positions(self) -> Dict[str, Position]:
+        return {
+            sym: Position(sym, float(self.quantities[i]), float(self.avg_prices[i]))
+            for sym, i in self.symbol_index.items()
+        }
 
     def snapshot_positions(self) -> Dict[str, float]:
-        return {sym: pos.quantity for sym, pos in self.positions.items()}
+        return {sym: float(self.quantities[i]) for sym, i in self.symbol_index.items()}
 
     def update_from_fill(self, order, fee: float = 0.0) -> None:
         qty = order.filled_quantity
         price = order.filled_price
         symbol = order.symbol
-        side = order.side
+        side = order.side_code
 
-        side_up = side.upper()
-        signed_qty = qty if side_up == "BUY" else -qty
+        signed_qty = qty if side == Side.BUY else -qty
 
-        pos = self.positions.get(symbol)
-        if pos is None:
-            pos = Position(symbol=symbol)
-            self.positions[symbol] = pos
-
-        old_qty = pos.quantity
-        new_qty = old_qty + signed_qty
+        i = self._index(symbol)
 
         trade_value = price * qty
 
@@ -78,77 +188,73 @@ class PositionManager:
         else:
             self.cash += trade_value - fee
 
-        # realized PnL calculation
-        realized_pnl = 0.0
-        if old_qty > 0 and signed_qty < 0:
-            closing_qty = min(old_qty, -signed_qty)
-            realized_pnl = closing_qty * (price - pos.avg_price)
-        elif old_qty < 0 and signed_qty > 0:
-            closing_qty = min(-old_qty, signed_qty)
-            realized_pnl = closing_qty * (pos.avg_price - price)
-
-        # Avg price handling
-        if old_qty == 0 and new_qty != 0:
-            pos.avg_price = price
-        elif (
-            old_qty != 0
-            and new_qty != 0
-            and ((old_qty > 0 and new_qty > 0) or (old_qty < 0 and new_qty < 0))
-        ):
-            total_old = abs(old_qty) * pos.avg_price
-            total_new = abs(signed_qty) * price
-            pos.avg_price = (total_old + total_new) / abs(new_qty)
-        elif old_qty != 0 and new_qty != 0 and old_qty * new_qty < 0:
-            pos.avg_price = price
+        ts = order.filled_timestamp
+        if ts is None:
+            ts = order.timestamp
+        if ts is None:
+            ts = datetime.utcnow()
+        ts_ns = to_ns(ts)
 
-        pos.quantity = new_qty
+        # lots do the cost basis and realized PnL
+        lots = self.lots[symbol]
+        realized_pnl = lots.fill(signed_qty, price, ts_ns, self.closed_lots, symbol)
 
-        if pos.quantity == 0:
-            pos.avg_price = 0.0
+        last = self.last_prices[i]
+        if last == last:
+            self.market_value += signed_qty * last
+        self.quantities[i] = lots.quantity
+        self.avg_prices[i] = lots.avg_price
+        self.realized_pnl[i] += realized_pnl
 
         # trade log record
-        ts = getattr(order, "filled_timestamp", None)
-        if ts is None:
-            ts = getattr(order, "timestamp", None)
-        if isinstance(ts, datetime):
-            trade_ts = ts
-        else:
-            trade_ts = datetime.fromisoformat(str(ts)) if ts is not None else datetime.utcnow()
-
-        self.trade_log.append(
-            TradeRecord(
-                timestamp=trade_ts,
-                symbol=symbol,
-                side=side_up,
-                quantity=qty,
-                price=price,
-                realized_pnl=realized_pnl,
-                position_after=pos.quantity,
-            )
+        log = self.trade_log
+        if len(log) == 0 and log.tz is None:
+            log.tz = getattr(ts, "tzinfo", None)
+
+        log.append(
+            ts_ns,
+            symbol,
+            side,
+            qty,
+            price,
+            realized_pnl,
+            lots.quantity,
+            order.strategy,
         )
 
+    def open_lots(self, symbol: str):
+        """Open lots of symbol in opening order."""
+        lots = self.lots.get(symbol)
+        return [] if lots is None else lots.open_lots()
+
+    def closed_lots_dataframe(self):
+        """Closed lot pieces with per-lot realized PnL and holding period."""
+        return self.closed_lots.to_dataframe(self.trade_log.tz)
+
     def position_value(self, symbol: str, last_price: float) -> float:
-        pos = self.positions.get(symbol)
-        if pos is None:
-            return 0.0
-        return pos.quantity * last_price
-
-    def portfolio_value(self, last_prices: Dict[str, float]) -> float:
-        value = self.cash
-        for sym, pos in self.positions.items():
-            price = last_prices.get(sym)
-            if price is not None:
-                value += pos.quantity * price
-        return value
+        return self.get_quantity(symbol) * last_price
+
+    def portfolio_value(self, last_prices) -> float:
+        """
+        Cash plus positions valued at last_prices: a dict symbol -> price,
+        or an array aligned with symbol_index (NaN = no price).
+        """
+        n = len(self.symbols)
+        if isinstance(last_prices, dict):
+            value = self.cash
+            for sym, i in self.symbol_index.items():
+                price = last_prices.get(sym)
+                if price is not None:
+                    value += self.quantities[i] * price
+            return float(value)
+        prices = np.asarray(last_prices, dtype=np.float64)[:n]
+        return float(self.cash + np.nansum(self.quantities[:n] * prices))
 
     def is_flat(self, symbol: str) -> bool:
-        pos = self.positions.get(symbol)
-        return pos is None or pos.quantity == 0
+        return self.get_quantity(symbol) == 0
 
     def is_long(self, symbol: str) -> bool:
-        pos = self.positions.get(symbol)
-        return pos is not None and pos.quantity > 0
+        return self.get_quantity(symbol) > 0
 
     def is_short(self, symbol: str) -> bool:
-        pos = self.positions.get(symbol)
-        return pos is not None and pos.quantity < 0
+        return self.get_quantity(symbol) < 0
@@ -7,12 +7,22 @@ class PriceManager:
     def __init__(self, max_history: int = 100):
         self.prices = {}  # {symbol: deque(maxlen=max_history)}
         self.max_history = max_history
-    
+        self._close_listeners = []  # callbacks (symbol, close) run on every update
+
+    def add_close_listener(self, callback) -> None:
+        """Call callback(symbol, close) whenever a bar for symbol arrives."""
+        if callback not in self._close_listeners:
+            self._close_listeners.append(callback)
+
     def update(self, symbol: str, tick_data: pd.Series):
         """Add new price bar to history."""
         if symbol not in self.prices:
             self.prices[symbol] = deque(maxlen=self.max_history)
         self.prices[symbol].append(tick_data)
+        if self._close_listeners:
+            close = tick_data['Close']
+            for callback in self._close_listeners:
+                callback(symbol, close)
     
     def get_latest_price(self, symbol: str) -> Optional[float]:
         """Get most recent close price."""
@@ -0,0 +1,173 @@
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+
+class SlidingWindowLimiter:
+    """
+    At most limit events in any window_ns long window.
+
+    Keeps the last limit accepted timestamps in a ring buffer, so a check
+    only compares against the oldest of them: O(1) and no allocation.
+    Timestamps are expected to be non-decreasing. A limit of 0 (or less)
+    rejects everything.
+    """
+
+    __slots__ = ("limit", "window_ns", "_buf", "_head", "_count")
+
+    def __init__(self, limit: int, window_ns: int):
+        self.limit = max(limit, 0)
+        self.window_ns = window_ns
+        self._buf = [0] * self.limit
+        self._head = 0  # oldest entry once the buffer is full
+        self._count = 0
+
+    def allowed(self, ts_ns: int) -> bool:
+        if self.limit == 0:
+            return False
+        return self._count < self.limit or self._buf[self._head] < ts_ns - self.window_ns
+
+    def record(self, ts_ns: int) -> None:
+        if self.limit == 0:
+            return
+        self._buf[self._head] = ts_ns
+        self._head = (self._head + 1) % self.limit
+        if self._count < self.limit:
+            self._count += 1
+
+    def describe(self) -> str:
+        return f"{self.limit} per {pd.Timedelta(self.window_ns)}"
+
+
+class TokenBucket:
+    """
+    Token bucket holding up to burst tokens, refilled at rate tokens per
+    second. Each event takes one token.
+    """
+
+    __slots__ = ("rate", "burst", "_per_ns", "_tokens", "_last_ns")
+
+    def __init__(self, rate: float, burst: float):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._per_ns = rate / 1e9
+        self._tokens = float(burst)
+        self._last_ns: Optional[int] = None
+
+    def _refill(self, ts_ns: int) -> None:
+        if self._last_ns is not None and ts_ns > self._last_ns:
+            self._tokens = min(self.burst, self._tokens + (ts_ns - self._last_ns) * self._per_ns)
+        if self._last_ns is None or ts_ns > self._last_ns:
+            self._last_ns = ts_ns
+
+    def allowed(self, ts_ns: int) -> bool:
+        self._refill(ts_ns)
+        return self._tokens >= 1.0
+
+    def record(self, ts_ns: int) -> None:
+        self._refill(ts_ns)
+        self._tokens -= 1.0
+
+    def describe(self) -> str:
+        return f"{self.rate}/s, burst {self.burst}"
+
+
+def build_limiter(spec: Dict[str, Any]):
+    """
+    Limiter from a settings entry:
+      {"type": "sliding_window", "limit": 60, "window": "1min"}
+      {"type": "token_bucket", "rate": 2.0, "burst": 20}
+    """
+    kind = spec.get("type", "sliding_window")
+    if kind == "sliding_window":
+        return SlidingWindowLimiter(int(spec["limit"]), pd.Timedelta(spec.get("window", "1min")).value)
+    if kind == "token_bucket":
+        return TokenBucket(float(spec["rate"]), float(spec.get("burst", 1)))
+    raise ValueError(f"Unknown rate limiter type '{kind}'")
+
+
+class RateLimiter:
+    """
+    Global, per symbol and per strategy limits checked together.
+
+    Each scope is an optional limiter spec (see build_limiter); per symbol
+    and per strategy limiters are created on first use of a key. check()
+    returns the reason of the first limit that would be broken, or None;
+    record() takes the order out of every applicable limit, so orders
+    rejected for other reasons do not count. An order of several
+    strategies (label "A+B") counts against each strategy's own limit.
+    """
+
+    def __init__(
+        self,
+        global_limit: Optional[Dict[str, Any]] = None,
+        per_symbol: Optional[Dict[str, Any]] = None,
+        per_strategy: Optional[Dict[str, Any]] = None,
+    ):
+        self.global_limiter = build_limiter(global_limit) if global_limit else None
+        self.per_symbol_spec = per_symbol
+        self.per_strategy_spec = per_strategy
+        self.symbol_limiters: Dict[str, Any] = {}
+        self.strategy_limiters: Dict[str, Any] = {}
+
+    @classmethod
+    def from_settings(
+        cls,
+        rate_limits: Optional[Dict[str, Any]] = None,
+        max_orders_per_minute: Optional[int] = None,
+    ) -> "RateLimiter":
+        """
+        From the "rate_limits" block of the risk settings. Without a global
+        entry, max_orders_per_minute becomes a one minute sliding window.
+        """
+        rate_limits = rate_limits or {}
+        global_limit = rate_limits.get("global")
+        if global_limit is None and max_orders_per_minute is not None:
+            global_limit = {"type": "sliding_window", "limit": max_orders_per_minute, "window": "1min"}
+        return cls(
+            global_limit=global_limit,
+            per_symbol=rate_limits.get("per_symbol"),
+            per_strategy=rate_limits.get("per_strategy"),
+        )
+
+    def _keyed(self, limiters: Dict[str, Any], spec, key):
+        if spec is None or key is None:
+            return None
+        limiter = limiters.get(key)
+        if limiter is None:
+            limiter = build_limiter(spec)
+            limiters[key] = limiter
+        return limiter
+
+    @staticmethod
+    def _strategies(strategy) -> Tuple[str, ...]:
+        """Strategies behind an order label ("A+B" -> ("A", "B"))."""
+        if strategy is None:
+            return ()
+        return tuple(strategy.split("+"))
+
+    def check(self, ts_ns: int, symbol=None, strategy=None) -> Optional[str]:
+        g = self.global_limiter
+        if g is not None and not g.allowed(ts_ns):
+            return f"Global order rate limit hit ({g.describe()})"
+        s = self._keyed(self.symbol_limiters, self.per_symbol_spec, symbol)
+        if s is not None and not s.allowed(ts_ns):
+            return f"Order rate limit for {symbol} hit ({s.describe()})"
+        for name in self._strategies(strategy):
+            t = self._keyed(self.strategy_limiters, self.per_strategy_spec, name)
+            if t is not None and not t.allowed(ts_ns):
+                return f"Order rate limit for strategy {name} hit ({t.describe()})"
+        return None
+
+    def record(self, ts_ns: int, symbol=None, strategy=None) -> None:
+        if self.global_limiter is not None:
+            self.global_limiter.record(ts_ns)
+        s = self._keyed(self.symbol_limiters, self.per_symbol_spec, symbol)
+        if s is not None:
+            s.record(ts_ns)
+        for name in self._strategies(strategy):
+            t = self._keyed(self.strategy_limiters, self.per_strategy_spec, name)
+            if t is not None:
+                t.record(ts_ns)
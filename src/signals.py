@@ -1,6 +1,8 @@
 from dataclasses import dataclass, field
 from typing import Dict, List, Iterable, Optional
 
+import numpy as np
+
 
 @dataclass
 class Signal:
@@ -32,52 +34,227 @@ class AggregatedSymbolSignal:
         return self.sell_count > 0
 
 
-@dataclass
+NORMALIZATIONS = ("rank", "zscore")
+
+
 class SignalBundle:
-    by_symbol: Dict[str, AggregatedSymbolSignal]
+    """
+    Signals of one bar aggregated per symbol, as arrays.
+
+    Symbols and strategies get integer ids in first-seen order (symbols,
+    strategies). Per symbol totals are bincounts over the signals:
+    buy_strength, sell_strength, buy_count, sell_count, and source_counts
+    holds the number of signals per (symbol, strategy). Selections are
+    argmax / argpartition over these arrays; AggregatedSymbolSignal
+    records are only built for the symbols picked (aggregate(), by_symbol).
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        buy_strength: np.ndarray,
+        sell_strength: np.ndarray,
+        buy_count: np.ndarray,
+        sell_count: np.ndarray,
+        strategies: Optional[List[str]] = None,
+        source_counts: Optional[np.ndarray] = None,
+    ):
+        self.symbols = symbols
+        self.symbol_ids: Dict[str, int] = {s: i for i, s in enumerate(symbols)}
+        self.buy_strength = buy_strength
+        self.sell_strength = sell_strength
+        self.buy_count = buy_count
+        self.sell_count = sell_count
+        self.strategies = strategies or []
+        if source_counts is None:
+            source_counts = np.zeros((len(symbols), len(self.strategies)), dtype=np.int64)
+        self.source_counts = source_counts
+        self._by_symbol: Optional[Dict[str, AggregatedSymbolSignal]] = None
 
     @classmethod
     def from_signals(cls, signals: Iterable[Signal]) -> "SignalBundle":
-        agg: Dict[str, AggregatedSymbolSignal] = {}
+        symbol_ids: Dict[str, int] = {}
+        strategy_ids: Dict[str, int] = {}
+        sym: List[int] = []
+        strat: List[int] = []
+        strength: List[float] = []
+        side: List[int] = []  # 1 buy, -1 sell, 0 other
 
         for s in signals:
-            sym = s.symbol
-            if sym not in agg:
-                agg[sym] = AggregatedSymbolSignal(symbol=sym)
+            i = symbol_ids.get(s.symbol)
+            if i is None:
+                i = symbol_ids[s.symbol] = len(symbol_ids)
+            if s.source is None:
+                j = -1
+            else:
+                j = strategy_ids.get(s.source)
+                if j is None:
+                    j = strategy_ids[s.source] = len(strategy_ids)
+            sym.append(i)
+            strat.append(j)
+            strength.append(s.strength)
+            side.append(1 if s.side == "BUY" else (-1 if s.side == "SELL" else 0))
+
+        return cls.from_arrays(
+            list(symbol_ids),
+            np.array(sym, dtype=np.int64),
+            np.array(side, dtype=np.int8),
+            np.array(strength, dtype=np.float64),
+            np.array(strat, dtype=np.int64),
+            list(strategy_ids),
+        )
 
-            entry = agg[sym]
+    @classmethod
+    def from_arrays(
+        cls,
+        symbols: List[str],
+        symbol_ids: np.ndarray,
+        sides: np.ndarray,
+        strengths: np.ndarray,
+        strategy_ids: Optional[np.ndarray] = None,
+        strategies: Optional[List[str]] = None,
+    ) -> "SignalBundle":
+        """
+        Bundle from one entry per signal: symbol id (into symbols), side
+        (1 buy, -1 sell), strength and strategy id (into strategies, -1 for
+        none).
+        """
+        n = len(symbols)
+        buy = sides == 1
+        sell = sides == -1
+        buy_strength = np.bincount(symbol_ids, weights=np.where(buy, strengths, 0.0), minlength=n)
+        sell_strength = np.bincount(symbol_ids, weights=np.where(sell, strengths, 0.0), minlength=n)
+        buy_count = np.bincount(symbol_ids[buy], minlength=n)
+        sell_count = np.bincount(symbol_ids[sell], minlength=n)
 
-            if s.side == "BUY":
-                entry.buy_count += 1
-                entry.total_buy_strength += s.strength
-            elif s.side == "SELL":
-                entry.sell_count += 1
-                entry.total_sell_strength += s.strength
+        strategies = strategies or []
+        m = len(strategies)
+        if m and strategy_ids is not None:
+            known = strategy_ids >= 0
+            flat = symbol_ids[known] * m + strategy_ids[known]
+            source_counts = np.bincount(flat, minlength=n * m).reshape(n, m)
+        else:
+            source_counts = np.zeros((n, m), dtype=np.int64)
 
-            if s.source is not None:
-                entry.sources.append(s.source)
+        return cls(symbols, buy_strength, sell_strength, buy_count, sell_count, strategies, source_counts)
 
-        return cls(by_symbol=agg)
+    def __len__(self) -> int:
+        return len(self.symbols)
 
-    def strongest_buy_symbol(self) -> Optional[AggregatedSymbolSignal]:
-        candidates = [
-            v for v in self.by_symbol.values()
-            if v.total_buy_strength > 0
-        ]
-        if not candidates:
+    @property
+    def net_strength(self) -> np.ndarray:
+        return self.buy_strength - self.sell_strength
+
+    # per symbol records
+
+    def sources(self, i: int) -> List[str]:
+        """Strategy names of the signals of symbol i (once per signal)."""
+        counts = self.source_counts[i]
+        return [self.strategies[j] for j in np.flatnonzero(counts) for _ in range(counts[j])]
+
+    def aggregate(self, i: int) -> AggregatedSymbolSignal:
+        """AggregatedSymbolSignal of symbol id i."""
+        return AggregatedSymbolSignal(
+            symbol=self.symbols[i],
+            buy_count=int(self.buy_count[i]),
+            sell_count=int(self.sell_count[i]),
+            total_buy_strength=float(self.buy_strength[i]),
+            total_sell_strength=float(self.sell_strength[i]),
+            sources=self.sources(i),
+        )
+
+    @property
+    def by_symbol(self) -> Dict[str, AggregatedSymbolSignal]:
+        """All symbols as AggregatedSymbolSignal records (built once, on demand)."""
+        if self._by_symbol is None:
+            self._by_symbol = {s: self.aggregate(i) for i, s in enumerate(self.symbols)}
+        return self._by_symbol
+
+    # selection
+
+    def _strongest(self, values: np.ndarray) -> Optional[AggregatedSymbolSignal]:
+        if len(values) == 0:
+            return None
+        i = int(np.argmax(values))
+        if values[i] <= 0:
             return None
-        return max(candidates, key=lambda x: x.total_buy_strength)
+        return self.aggregate(i)
+
+    def strongest_buy_symbol(self) -> Optional[AggregatedSymbolSignal]:
+        return self._strongest(self.buy_strength)
 
     def strongest_sell_symbol(self) -> Optional[AggregatedSymbolSignal]:
-        candidates = [
-            v for v in self.by_symbol.values()
-            if v.total_sell_strength > 0
-        ]
-        if not candidates:
-            return None
-        return max(candidates, key=lambda x: x.total_sell_strength)
+        return self._strongest(self.sell_strength)
 
     def strongest_net_symbol(self) -> Optional[AggregatedSymbolSignal]:
-        if not self.by_symbol:
+        if len(self.symbols) == 0:
             return None
-        return max(self.by_symbol.values(), key=lambda x: abs(x.net_strength))
+        return self.aggregate(int(np.argmax(np.abs(self.net_strength))))
+
+    @staticmethod
+    def _top_k(values: np.ndarray, k: int) -> np.ndarray:
+        """Ids of the k largest positive values, largest first."""
+        candidates = np.flatnonzero(values > 0)
+        if k <= 0:
+            return candidates[:0]
+        if k < len(candidates):
+            part = np.argpartition(-values[candidates], k - 1)[:k]
+            candidates = candidates[part]
+        return candidates[np.argsort(-values[candidates], kind="stable")]
+
+    def top_buys(self, k: int) -> np.ndarray:
+        """Symbol ids of the k strongest buys, strongest first."""
+        return self._top_k(self.buy_strength, k)
+
+    def top_sells(self, k: int) -> np.ndarray:
+        """Symbol ids of the k strongest sells, strongest first."""
+        return self._top_k(self.sell_strength, k)
+
+    # cross-sectional normalization
+
+    def ranks(self) -> np.ndarray:
+        """Net strength as centred ranks in [-1, 1] (ties get their mean rank)."""
+        n = len(self.symbols)
+        if n < 2:
+            return np.zeros(n)
+        net = self.net_strength
+        order = np.argsort(net, kind="stable")
+        ranks = np.empty(n)
+        ranks[order] = np.arange(n, dtype=np.float64)
+        # average the ranks of tied values
+        uniq, inverse = np.unique(net, return_inverse=True)
+        if len(uniq) < n:
+            ranks = (np.bincount(inverse, weights=ranks) / np.bincount(inverse))[inverse]
+        return 2.0 * ranks / (n - 1) - 1.0
+
+    def zscores(self) -> np.ndarray:
+        """Net strength minus the cross-sectional mean, over its std (0 if flat)."""
+        net = self.net_strength
+        if len(net) == 0:
+            return net
+        std = net.std()
+        if std == 0:
+            return np.zeros(len(net))
+        return (net - net.mean()) / std
+
+    def normalized(self, method: str) -> "SignalBundle":
+        """
+        Bundle whose net strength is replaced by its cross-sectional rank
+        or z-score: positive scores become buy strength, negative ones sell
+        strength. Counts and sources are kept.
+        """
+        if method == "rank":
+            score = self.ranks()
+        elif method == "zscore":
+            score = self.zscores()
+        else:
+            raise ValueError(f"Unknown signal normalization '{method}'")
+        return SignalBundle(
+            self.symbols,
+            np.maximum(score, 0.0),
+            np.maximum(-score, 0.0),
+            self.buy_count,
+            self.sell_count,
+            self.strategies,
+            self.source_counts,
+        )
@@ -1,12 +1,20 @@
-import random
+import heapq
+from typing import Sequence
+
+import numpy as np
 import pandas as pd
 
+from src.fill_models import FillModel, RandomPartialFillModel
 from src.order_book import OrderBook
 from src.logger_gateway import OrderLogger
-from src.order import Order
+from src.order import Order, OrderStatus, OrderType, Side, next_order_id
 from src.position_manager import PositionManager
 
 
+_STOP_TYPES = (OrderType.STOP, OrderType.STOP_LIMIT, OrderType.TRAILING_STOP)
+_NO_EXPIRY = np.iinfo(np.int64).max
+
+
 class SimulatedMatchingEngine:
     def __init__(
         self,
@@ -14,8 +22,35 @@ class SimulatedMatchingEngine:
         order_logger: OrderLogger,
         position_manager: PositionManager,
         fee_per_order: float = 0.0,
+        seed=None,
+        rng_block_size: int = 1024,
+        day_timezone: str = "America/New_York",
+        session_close: str = "16:00",
+        fill_model: FillModel | None = None,
     ):
-        """Initializes the engine."""
+        """
+        Initializes the engine.
+
+        seed may be an int, a numpy SeedSequence or None (fresh entropy).
+        Uniform variates for rejections and partial fills are drawn from a
+        per engine Generator in blocks of rng_block_size.
+
+        Resting orders with time in force DAY expire at the session close
+        (session_close, local time in day_timezone) of their trading day;
+        orders placed at or after the close are for the next weekday's
+        session. GTD orders expire at order.expire_at, a naive expire_at
+        being read in the timezone of the order (bar) timestamp.
+
+        Untriggered STOP, STOP_LIMIT and TRAILING_STOP orders wait in trigger
+        heaps: buy stops by ascending trigger, sell stops by descending
+        trigger. Each bar only pops the stops whose trigger lies inside the
+        bar's High/Low range. Trailing stops are also indexed by their
+        watermark so only those whose watermark moves get re-keyed.
+
+        fill_model decides fill quantity and price of market and marketable
+        limit orders (default: RandomPartialFillModel). If the model carries
+        remainders, unfilled quantity is worked on the following bars.
+        """
         self.order_book = order_book
         self.order_logger = order_logger
         self.position_manager = position_manager
@@ -25,6 +60,39 @@ class SimulatedMatchingEngine:
         self.fill_reject_chance = 0.05
         self.partial_fill_chance = 0.10
 
+        self.fill_model = fill_model if fill_model is not None else RandomPartialFillModel()
+        # [order, remaining quantity, bars carried, expiry ns or None] still being worked
+        self._working_orders = []
+
+        self.rng = np.random.default_rng(seed)
+        self._rng_block_size = rng_block_size
+        self._uniforms = np.empty(0)
+        self._uniform_pos = 0
+
+        # min-heap of (expiry ns, sequence, order) for resting DAY/GTD orders
+        self.day_timezone = day_timezone
+        close = pd.Timestamp(session_close)
+        self._session_close = close - close.normalize()  # offset from midnight
+        self._expiry_heap = []
+        self._expiry_seq = 0
+
+        # untriggered stops: order_id -> order, plus trigger indexes of
+        # (key, sequence, order). Entries whose key no longer matches the
+        # order's stop_price (re-keyed trailing stops) or whose order left
+        # self.stop_orders are skipped when they surface, and the heaps are
+        # rebuilt from their live entries once the stale ones outnumber them.
+        self.stop_orders = {}
+        self._buy_stops = []          # key = stop_price, min first
+        self._sell_stops = []         # key = -stop_price, highest stop first
+        self._trail_sell_marks = []   # key = watermark (highest High), lowest first
+        self._trail_buy_marks = []    # key = -watermark (lowest Low), highest first
+        self._trail_marks = {}        # order_id -> current watermark
+        self._stop_seq = 0
+
+        # row of this engine in an EngineBoard (see EngineBoard.attach)
+        self.board = None
+        self.board_slot = -1
+
         print("SimulatedMatchingEngine: Initialized.")
 
 
@@ -35,7 +103,7 @@ class SimulatedMatchingEngine:
         fills = []
 
         # 1. Random rejection
-        if random.random() < self.fill_reject_chance:
+        if self._next_uniform() < self.fill_reject_chance:
             #print("MatchingEngine: Order randomly REJECTED.")
             self.order_logger.log_event(
                 event_type="REJECTED",
@@ -43,108 +111,499 @@ class SimulatedMatchingEngine:
                 tick_timestamp=current_tick.name,
                 reason="Random engine rejection",
             )
-            order.status = "Rejected"
+            order.status_code = OrderStatus.REJECTED
             return fills
 
         # 2. Type dependent handling
-        if order.order_type == "MARKET":
+        if order.type_code == OrderType.MARKET:
             filled = self._fill_market_order(order, current_tick)
             if filled is not None:
                 fills.append(filled)
 
-        elif order.order_type == "LIMIT":
+        elif order.type_code == OrderType.LIMIT:
             fills.extend(self._process_limit_order(order, current_tick))
 
+        elif order.type_code in _STOP_TYPES:
+            fills.extend(self._process_stop_order(order, current_tick))
+
+        self._sync_events()
         return fills
 
     def check_open_orders(self, current_tick: "pd.Series"):
-        """Check waiting limit orders in the book vs new tick."""
+        """Expire stale orders, then check waiting limit orders vs new tick."""
         fills = []
 
-        # 1. Waiting BUY orders
-        while True:
-            best_bid_order = self.order_book.get_best_bid_order()
-            if not best_bid_order:
-                break
+        self.expire_orders(current_tick.name)
 
-            if best_bid_order.price >= current_tick["Low"]:
-                #print(
-                    #f"MatchingEngine: Waiting BUY order {best_bid_order.order_id} FILLED."
-                #)
-                popped_order = self.order_book.pop_best_bid_order()
-                fill_price = popped_order.price
-                fill_qty = popped_order.quantity
+        # 0. Stops triggered inside this bar join the market/limit paths
+        fills.extend(self._trigger_stops(current_tick))
 
-                filled = self._apply_fill(
-                    order=popped_order,
-                    current_tick=current_tick,
-                    fill_qty=fill_qty,
-                    fill_price=fill_price,
-                    event_type="FILLED",
-                )
-                fills.append(filled)
-            else:
-                break
+        # remainders carried over by the fill model
+        fills.extend(self._work_carried_orders(current_tick))
 
-        # 2. Waiting SELL orders
-        while True:
-            best_ask_order = self.order_book.get_best_ask_order()
-            if not best_ask_order:
-                break
+        # 1./2. Waiting BUY and SELL limit orders
+        fills.extend(
+            self.fill_crossing_orders(current_tick["Low"], current_tick["High"], current_tick)
+        )
 
-            if best_ask_order.price <= current_tick["High"]:
-                #print(
-                    #f"MatchingEngine: Waiting SELL order {best_ask_order.order_id} FILLED."
-                #)
-                popped_order = self.order_book.pop_best_ask_order()
-                fill_price = popped_order.price
-                fill_qty = popped_order.quantity
+        self._sync_events()
+        return fills
 
-                filled = self._apply_fill(
-                    order=popped_order,
-                    current_tick=current_tick,
-                    fill_qty=fill_qty,
-                    fill_price=fill_price,
-                    event_type="FILLED",
-                )
-                fills.append(filled)
+    def expire_orders(self, now) -> int:
+        """
+        Cancel every resting order whose expiry is at or before now and log
+        an EXPIRED event for it. Orders that already left the book are
+        skipped when their heap entry surfaces, so each entry is touched
+        once. Returns the number of orders expired.
+        """
+        heap = self._expiry_heap
+        if not heap:
+            return 0
+
+        now_ns = pd.Timestamp(now).value
+        expired = 0
+        while heap and heap[0][0] <= now_ns:
+            _, _, order = heapq.heappop(heap)
+            if self.stop_orders.get(order.order_id) is order:
+                del self.stop_orders[order.order_id]
+                self._trail_marks.pop(order.order_id, None)
+            elif self.order_book.get_order(order.order_id) is order:
+                self.order_book.cancel_order(order.order_id)
             else:
+                continue
+            order.status_code = OrderStatus.EXPIRED
+            self.order_logger.log_event(
+                event_type="EXPIRED",
+                order=order,
+                tick_timestamp=now,
+                reason=f"Time in force {order.time_in_force} expired",
+            )
+            expired += 1
+        self._sync_events()
+        return expired
+
+    def modify_order(self, order_id, new_details):
+        """Modify a resting order in the book, keeping its expiry schedule."""
+        new_id = self.order_book.modify_order(order_id, new_details)
+        if new_id is not None and new_id != order_id:
+            self._schedule_expiry(self.order_book.get_order(new_id))
+            self._sync_events()
+        return new_id
+
+    def fill_crossing_orders(self, low: float, high: float, current_tick: "pd.Series"):
+        """
+        Fill resting bids priced >= low, then resting asks priced <= high,
+        best first, through the fill model. An order the model fills only
+        in part keeps its rest in the book (same queue position) and ends
+        that side for this bar.
+        """
+        fills = []
+        book = self.order_book
+
+        best = book.best_bid()
+        while best is not None and best >= low:
+            if not self._fill_resting(book.get_best_bid_order(), current_tick, fills):
+                break
+            best = book.best_bid()
+
+        best = book.best_ask()
+        while best is not None and best <= high:
+            if not self._fill_resting(book.get_best_ask_order(), current_tick, fills):
                 break
+            best = book.best_ask()
 
         return fills
 
+    def has_pending_events(self, current_tick: "pd.Series") -> bool:
+        """True if this bar may expire orders or trigger stops here."""
+        return self._pending_at(pd.Timestamp(current_tick.name).value)
+
+    def _pending_at(self, now_ns: int) -> bool:
+        if self.stop_orders or self._working_orders:
+            return True
+        heap = self._expiry_heap
+        return bool(heap) and heap[0][0] <= now_ns
+
+    def cancel_stop_order(self, order_id) -> bool:
+        """Cancel an untriggered stop order (its index entries go stale)."""
+        order = self.stop_orders.pop(order_id, None)
+        if order is None:
+            return False
+        self._trail_marks.pop(order_id, None)
+        order.is_cancelled = True
+        order.status_code = OrderStatus.CANCELLED
+        self._sync_events()
+        return True
 
     # Internal helpers
 
-    def _fill_market_order(self, order: Order, current_tick: "pd.Series") -> Order | None:
-        """Fill a market order at Close, possibly partially."""
-        fill_price = current_tick["Close"]
-        fill_qty = order.quantity
+    # --- EngineBoard row ---
+
+    def _sync_top(self, best_bid, best_ask) -> None:
+        """Top listener of the order book: new best prices into the board."""
+        board = self.board
+        board.best_bid[self.board_slot] = np.nan if best_bid is None else best_bid
+        board.best_ask[self.board_slot] = np.nan if best_ask is None else best_ask
+
+    def _sync_events(self) -> None:
+        """Stops, carried remainders and next expiry into the board."""
+        board = self.board
+        if board is None:
+            return
+        i = self.board_slot
+        board.busy[i] = bool(self.stop_orders or self._working_orders)
+        heap = self._expiry_heap
+        board.next_expiry[i] = heap[0][0] if heap else _NO_EXPIRY
+
+    # --- stop orders ---
+
+    def _process_stop_order(self, order: Order, current_tick: "pd.Series"):
+        """Arm a new stop order; trigger at once if Close is already through it."""
+        if order.order_id is None:
+            order.order_id = next_order_id()
+
+        close = current_tick["Close"]
+        if order.type_code == OrderType.TRAILING_STOP:
+            self._trail_marks[order.order_id] = close
+            order.stop_price = self._trail_trigger(order, close)
+
+        if order.stop_price is None:
+            order.status_code = OrderStatus.REJECTED
+            self.order_logger.log_event(
+                event_type="REJECTED",
+                order=order,
+                tick_timestamp=current_tick.name,
+                reason="Stop order without stop_price or trail",
+            )
+            return []
+
+        if (order.side_code == Side.BUY and close >= order.stop_price) or (
+            order.side_code == Side.SELL and close <= order.stop_price
+        ):
+            return self._fire_stop(order, current_tick, fill_price=close)
+
+        self.stop_orders[order.order_id] = order
+        order.status_code = OrderStatus.UNTRIGGERED
+        self._index_stop(order)
+        if order.type_code == OrderType.TRAILING_STOP:
+            self._index_trail_mark(order)
+        self._schedule_expiry(order)
+
+        self.order_logger.log_event(
+            event_type="PLACED",
+            order=order,
+            tick_timestamp=current_tick.name,
+            reason=f"Stop armed at {order.stop_price:.4f}",
+        )
+        return []
+
+    def _trail_trigger(self, order: Order, watermark: float) -> float:
+        if order.trail_percent is not None:
+            dist = watermark * order.trail_percent
+        else:
+            dist = order.trail_amount or 0.0
+        return watermark + dist if order.side_code == Side.BUY else watermark - dist
+
+    def _index_stop(self, order: Order) -> None:
+        self._stop_seq += 1
+        if order.side_code == Side.BUY:
+            heapq.heappush(self._buy_stops, (order.stop_price, self._stop_seq, order))
+        else:
+            heapq.heappush(self._sell_stops, (-order.stop_price, self._stop_seq, order))
+
+    def _index_trail_mark(self, order: Order) -> None:
+        self._stop_seq += 1
+        mark = self._trail_marks[order.order_id]
+        if order.side_code == Side.BUY:
+            heapq.heappush(self._trail_buy_marks, (-mark, self._stop_seq, order))
+        else:
+            heapq.heappush(self._trail_sell_marks, (mark, self._stop_seq, order))
+
+    def _is_live_stop(self, order: Order) -> bool:
+        return self.stop_orders.get(order.order_id) is order
+
+    def _trigger_stops(self, current_tick: "pd.Series"):
+        """Fire stops whose trigger lies in this bar, then move trailing watermarks."""
+        if not self.stop_orders:
+            if self._buy_stops or self._sell_stops or self._trail_sell_marks or self._trail_buy_marks:
+                self._buy_stops, self._sell_stops = [], []
+                self._trail_sell_marks, self._trail_buy_marks = [], []
+            return []
+
+        high = current_tick["High"]
+        low = current_tick["Low"]
+        opening = current_tick.get("Open", current_tick["Close"])
+        fills = []
+
+        # buy stops fire when High reaches the trigger, fill no better than Open
+        heap = self._buy_stops
+        while heap and heap[0][0] <= high:
+            key, _, order = heapq.heappop(heap)
+            if not self._is_live_stop(order) or key != order.stop_price:
+                continue
+            fills.extend(self._fire_stop(order, current_tick, max(order.stop_price, opening)))
+
+        # sell stops fire when Low reaches the trigger
+        heap = self._sell_stops
+        while heap and -heap[0][0] >= low:
+            key, _, order = heapq.heappop(heap)
+            if not self._is_live_stop(order) or -key != order.stop_price:
+                continue
+            fills.extend(self._fire_stop(order, current_tick, min(order.stop_price, opening)))
+
+        # trailing sells: raise watermark to High for those below it
+        heap = self._trail_sell_marks
+        while heap and heap[0][0] < high:
+            key, _, order = heapq.heappop(heap)
+            if not self._is_live_stop(order) or key != self._trail_marks[order.order_id]:
+                continue
+            self._trail_marks[order.order_id] = high
+            order.stop_price = self._trail_trigger(order, high)
+            self._index_stop(order)
+            self._index_trail_mark(order)
+
+        # trailing buys: lower watermark to Low for those above it
+        heap = self._trail_buy_marks
+        while heap and -heap[0][0] > low:
+            key, _, order = heapq.heappop(heap)
+            if not self._is_live_stop(order) or -key != self._trail_marks[order.order_id]:
+                continue
+            self._trail_marks[order.order_id] = low
+            order.stop_price = self._trail_trigger(order, low)
+            self._index_stop(order)
+            self._index_trail_mark(order)
+
+        self._compact_stop_heaps()
+        return fills
+
+    def _compact_stop_heaps(self) -> None:
+        """Drop stale trigger entries once they outnumber the live ones."""
+        # every live stop has exactly one live entry in the trigger heaps and
+        # every live trailing stop one in the watermark heaps
+        live = len(self.stop_orders)
+        if len(self._buy_stops) + len(self._sell_stops) > 2 * live:
+            self._buy_stops = [
+                e for e in self._buy_stops
+                if self._is_live_stop(e[2]) and e[0] == e[2].stop_price
+            ]
+            self._sell_stops = [
+                e for e in self._sell_stops
+                if self._is_live_stop(e[2]) and -e[0] == e[2].stop_price
+            ]
+            heapq.heapify(self._buy_stops)
+            heapq.heapify(self._sell_stops)
+
+        marks = self._trail_marks
+        if len(self._trail_sell_marks) + len(self._trail_buy_marks) > 2 * len(marks):
+            self._trail_sell_marks = [
+                e for e in self._trail_sell_marks
+                if self._is_live_stop(e[2]) and e[0] == marks.get(e[2].order_id)
+            ]
+            self._trail_buy_marks = [
+                e for e in self._trail_buy_marks
+                if self._is_live_stop(e[2]) and -e[0] == marks.get(e[2].order_id)
+            ]
+            heapq.heapify(self._trail_sell_marks)
+            heapq.heapify(self._trail_buy_marks)
+
+    def _fire_stop(self, order: Order, current_tick: "pd.Series", fill_price: float):
+        """Convert a triggered stop into a market or limit order and route it."""
+        self.stop_orders.pop(order.order_id, None)
+        self._trail_marks.pop(order.order_id, None)
 
-        if random.random() < self.partial_fill_chance:
-            fill_qty = int(order.quantity * random.uniform(0.1, 0.9))
-            fill_qty = max(1, fill_qty)
-            #print(
-                #f"MatchingEngine: Order partially filled ({fill_qty} / {order.quantity})"
-            #)
+        self.order_logger.log_event(
+            event_type="TRIGGERED",
+            order=order,
+            tick_timestamp=current_tick.name,
+            reason=f"Stop {order.stop_price:.4f} triggered",
+        )
 
-        return self._apply_fill(
+        if order.type_code == OrderType.STOP_LIMIT:
+            order.type_code = OrderType.LIMIT
+            return self._process_limit_order(order, current_tick)
+
+        order.type_code = OrderType.MARKET
+        filled = self._fill_market_order(order, current_tick, fill_price=fill_price)
+        return [filled] if filled is not None else []
+
+    def _schedule_expiry(self, order: Order) -> None:
+        expiry = self._expiry_ns(order)
+        if expiry is not None:
+            heapq.heappush(self._expiry_heap, (expiry, self._expiry_seq, order))
+            self._expiry_seq += 1
+
+    def _expiry_ns(self, order: Order) -> int | None:
+        """Expiry of a resting order in ns, or None if it never expires."""
+        tif = order.time_in_force
+        if tif == "GTD":
+            expire_at = pd.Timestamp(order.expire_at)
+            if expire_at.tzinfo is None:
+                # naive: wall clock time of the data, like the bar timestamps
+                tz = getattr(pd.Timestamp(order.timestamp), "tzinfo", None)
+                if tz is not None:
+                    expire_at = expire_at.tz_localize(tz)
+            return expire_at.value
+        if tif == "DAY":
+            ts = pd.Timestamp(order.timestamp)
+            tz = None
+            if ts.tzinfo is not None:
+                # wall clock arithmetic, so DST changes do not move the close
+                tz = self.day_timezone
+                ts = ts.tz_convert(tz).tz_localize(None)
+            close = ts.normalize() + self._session_close
+            if ts >= close:
+                close += pd.offsets.BDay(1)
+            if tz is not None:
+                close = close.tz_localize(tz)
+            return close.value
+        return None
+
+    def _next_uniform(self) -> float:
+        """Next U(0, 1) variate from the pre-drawn block."""
+        if self._uniform_pos >= len(self._uniforms):
+            self._uniforms = self.rng.random(self._rng_block_size)
+            self._uniform_pos = 0
+        u = self._uniforms[self._uniform_pos]
+        self._uniform_pos += 1
+        return float(u)
+
+    def _fill_market_order(
+        self,
+        order: Order,
+        current_tick: "pd.Series",
+        fill_price: float | None = None,
+    ) -> Order | None:
+        """Fill a market order through the fill model, possibly partially."""
+        fill_qty, price = self.fill_model.fill(
+            self, order, current_tick, order.quantity, fill_price=fill_price
+        )
+        remaining = order.quantity - max(fill_qty, 0)
+        carried = remaining > 0 and self.fill_model.carries_remainder
+        # immediate or cancel: nothing is worked on later bars
+        ioc_rest = carried and order.time_in_force == "IOC"
+        if ioc_rest:
+            carried = False
+            if fill_qty <= 0:
+                order.status_code = OrderStatus.EXPIRED
+                self._log_ioc_rest(order, current_tick, remaining)
+                return None
+        if carried:
+            self._working_orders.append([order, remaining, 0, self._expiry_ns(order)])
+
+        if fill_qty <= 0:
+            order.status_code = OrderStatus.WORKING
+            self.order_logger.log_event(
+                event_type="PLACED",
+                order=order,
+                tick_timestamp=current_tick.name,
+                reason="Waiting for bar volume",
+            )
+            return None
+
+        filled = self._apply_fill(
             order=order,
             current_tick=current_tick,
             fill_qty=fill_qty,
-            fill_price=fill_price,
+            fill_price=price,
             event_type="FILLED",
         )
+        if carried:
+            order.status_code = OrderStatus.PARTIALLY_FILLED
+        elif ioc_rest:
+            order.status_code = OrderStatus.PARTIALLY_FILLED
+            self._log_ioc_rest(order, current_tick, remaining)
+        return filled
+
+    def _log_ioc_rest(self, order: Order, current_tick: "pd.Series", remaining: int) -> None:
+        self.order_logger.log_event(
+            event_type="EXPIRED",
+            order=order,
+            tick_timestamp=current_tick.name,
+            reason=f"IOC remainder of {remaining} cancelled",
+        )
+
+    def working_exposure(self) -> tuple[float, float]:
+        """
+        (signed quantity, buy value) still to fill from carried remainders,
+        valued at the order price.
+        """
+        qty = 0.0
+        buy_value = 0.0
+        for order, remaining, _, _ in self._working_orders:
+            if order.side_code == Side.BUY:
+                qty += remaining
+                buy_value += remaining * (order.price or 0.0)
+            else:
+                qty -= remaining
+        return qty, buy_value
+
+    def _work_carried_orders(self, current_tick: "pd.Series"):
+        """
+        Offer carried remainders to this bar, oldest first. Remainders past
+        their DAY/GTD expiry or max_carry_bars expire instead.
+        """
+        if not self._working_orders:
+            return []
+
+        fills = []
+        still_working = []
+        max_bars = self.fill_model.max_carry_bars
+        now_ns = pd.Timestamp(current_tick.name).value
+
+        for order, remaining, age, expiry in self._working_orders:
+            age += 1
+            if expiry is not None and expiry <= now_ns:
+                order.status_code = OrderStatus.EXPIRED
+                self.order_logger.log_event(
+                    event_type="EXPIRED",
+                    order=order,
+                    tick_timestamp=current_tick.name,
+                    reason=f"Time in force {order.time_in_force} expired with {remaining} unfilled",
+                )
+                continue
+            if max_bars is not None and age > max_bars:
+                order.status_code = OrderStatus.EXPIRED
+                self.order_logger.log_event(
+                    event_type="EXPIRED",
+                    order=order,
+                    tick_timestamp=current_tick.name,
+                    reason=f"{remaining} unfilled after {max_bars} bars",
+                )
+                continue
+
+            if order.type_code == OrderType.LIMIT and not (
+                (order.side_code == Side.BUY and order.price >= current_tick["Low"])
+                or (order.side_code == Side.SELL and order.price <= current_tick["High"])
+            ):
+                still_working.append([order, remaining, age, expiry])
+                continue
+
+            fill_qty, price = self.fill_model.fill(self, order, current_tick, remaining)
+            if fill_qty > 0:
+                fills.append(self._apply_fill(
+                    order=order,
+                    current_tick=current_tick,
+                    fill_qty=fill_qty,
+                    fill_price=price,
+                    event_type="FILLED",
+                ))
+                remaining -= fill_qty
+            if remaining > 0:
+                order.status_code = OrderStatus.PARTIALLY_FILLED
+                still_working.append([order, remaining, age, expiry])
+
+        self._working_orders = still_working
+        return fills
 
     def _process_limit_order(self, order: Order, current_tick: "pd.Series"):
         """Handle a new limit order."""
         fills: list[Order] = []
         can_fill_now = False
 
-        if order.side == "BUY":
+        if order.side_code == Side.BUY:
             if order.price >= current_tick["Low"]:
                 can_fill_now = True
-        elif order.side == "SELL":
+        elif order.side_code == Side.SELL:
             if order.price <= current_tick["High"]:
                 can_fill_now = True
 
@@ -153,11 +612,21 @@ class SimulatedMatchingEngine:
             filled = self._fill_market_order(order, current_tick)
             if filled is not None:
                 fills.append(filled)
+        elif order.time_in_force == "IOC":
+            order.status_code = OrderStatus.EXPIRED
+            self.order_logger.log_event(
+                event_type="EXPIRED",
+                order=order,
+                tick_timestamp=current_tick.name,
+                reason="IOC limit not marketable",
+            )
         else:
             #print("MatchingEngine: Limit order added to OrderBook to wait.")
             order_id = self.order_book.add_order(order)
             order.order_id = order_id
-            order.status = "Placed"
+            order.status_code = OrderStatus.PLACED
+
+            self._schedule_expiry(order)
 
             self.order_logger.log_event(
                 event_type="PLACED",
@@ -168,6 +637,38 @@ class SimulatedMatchingEngine:
 
         return fills
 
+    def _fill_resting(self, order: Order, current_tick: "pd.Series", fills: list) -> bool:
+        """Fill the best resting order of its side; True if it left the book."""
+        fill_qty, price = self.fill_model.fill_resting(
+            self, order, current_tick, order.quantity, order.price
+        )
+        if fill_qty <= 0:
+            return False
+        if fill_qty >= order.quantity:
+            if order.side_code == Side.BUY:
+                self.order_book.pop_best_bid_order()
+            else:
+                self.order_book.pop_best_ask_order()
+            fills.append(self._apply_fill(
+                order=order,
+                current_tick=current_tick,
+                fill_qty=order.quantity,
+                fill_price=price,
+                event_type="FILLED",
+            ))
+            return True
+
+        fills.append(self._apply_fill(
+            order=order,
+            current_tick=current_tick,
+            fill_qty=fill_qty,
+            fill_price=price,
+            event_type="FILLED",
+        ))
+        self.order_book.reduce_order(order.order_id, fill_qty)
+        order.status_code = OrderStatus.PARTIALLY_FILLED
+        return False
+
     def _apply_fill(
         self,
         order: Order,
@@ -180,7 +681,7 @@ class SimulatedMatchingEngine:
         order.filled_quantity = fill_qty
         order.filled_price = fill_price
         order.filled_timestamp = current_tick.name
-        order.status = "Filled"
+        order.status_code = OrderStatus.FILLED
 
         self.order_logger.log_event(
             event_type=event_type,
@@ -194,3 +695,105 @@ class SimulatedMatchingEngine:
         self.position_manager.update_from_fill(order, fee=self.fee_per_order)
 
         return order
+
+
+class EngineBoard:
+    """
+    State of many engines as arrays, for match_resting_orders: best bid
+    and ask of each book (NaN if empty), whether the engine has stops or
+    carried remainders, and its next expiry in ns.
+
+    Attached engines keep their row current themselves: the order book
+    reports top of book changes and the engine updates the rest after
+    every call that can change it. A bar then reads all books with a few
+    array gathers instead of calls per engine.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.size = 0
+        self.best_bid = np.full(capacity, np.nan)
+        self.best_ask = np.full(capacity, np.nan)
+        self.busy = np.zeros(capacity, dtype=bool)
+        self.next_expiry = np.full(capacity, _NO_EXPIRY, dtype=np.int64)
+
+    def _grow(self) -> None:
+        n = max(1, len(self.busy))
+        self.best_bid = np.concatenate([self.best_bid, np.full(n, np.nan)])
+        self.best_ask = np.concatenate([self.best_ask, np.full(n, np.nan)])
+        self.busy = np.concatenate([self.busy, np.zeros(n, dtype=bool)])
+        self.next_expiry = np.concatenate([self.next_expiry, np.full(n, _NO_EXPIRY, dtype=np.int64)])
+
+    def attach(self, engine: SimulatedMatchingEngine) -> int:
+        """Give engine the next row and keep it updated; returns the row."""
+        if self.size == len(self.busy):
+            self._grow()
+        slot = self.size
+        self.size += 1
+        engine.board = self
+        engine.board_slot = slot
+        book = engine.order_book
+        book.add_top_listener(engine._sync_top)
+        engine._sync_top(book.best_bid(), book.best_ask())
+        engine._sync_events()
+        return slot
+
+
+def match_resting_orders(
+    engines: Sequence[SimulatedMatchingEngine],
+    bars: Sequence["pd.Series"],
+    highs: np.ndarray | None = None,
+    lows: np.ndarray | None = None,
+    board: EngineBoard | None = None,
+    slots: np.ndarray | None = None,
+    now_ns: int | None = None,
+) -> list[Order]:
+    """
+    Batched check_open_orders over many symbols for one bar.
+
+    Best bid/ask of every book are compared with the bar lows/highs in
+    one vectorized pass; only books that cross, or whose engine has stops
+    or due expiries, are visited. Fills come back in the same order as
+    calling engines[i].check_open_orders(bars[i]) for i = 0, 1, ... would
+    produce them.
+
+    With board and slots (the board rows of engines) the book state is
+    gathered from the board's arrays; otherwise it is read from each
+    engine. All bars share one timestamp, now_ns (default: that of
+    bars[0]). highs/lows may be passed in aligned with engines; otherwise
+    they are read from the bars of books that hold orders.
+    """
+    n = len(engines)
+    fills: list[Order] = []
+    if n == 0:
+        return fills
+
+    if now_ns is None:
+        now_ns = pd.Timestamp(bars[0].name).value
+
+    if board is not None and slots is not None:
+        best_bid = board.best_bid[slots]
+        best_ask = board.best_ask[slots]
+        events = board.busy[slots] | (board.next_expiry[slots] <= now_ns)
+    else:
+        best_bid = np.array([e.order_book.best_bid() for e in engines], dtype=np.float64)
+        best_ask = np.array([e.order_book.best_ask() for e in engines], dtype=np.float64)
+        events = np.fromiter((e._pending_at(now_ns) for e in engines), dtype=bool, count=n)
+
+    if highs is None or lows is None:
+        highs = np.full(n, np.nan)
+        lows = np.full(n, np.nan)
+        for i in np.flatnonzero(~(np.isnan(best_bid) & np.isnan(best_ask))):
+            highs[i] = bars[i]["High"]
+            lows[i] = bars[i]["Low"]
+
+    # NaN (empty side or missing bar value) never crosses
+    crosses = (best_bid >= lows) | (best_ask <= highs)
+
+    for i in np.flatnonzero(events | crosses):
+        engine = engines[i]
+        if events[i]:
+            fills.extend(engine.check_open_orders(bars[i]))
+        else:
+            fills.extend(engine.fill_crossing_orders(lows[i], highs[i], bars[i]))
+
+    return fills
@@ -0,0 +1,167 @@
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+LOT_METHODS = ("FIFO", "LIFO", "AVERAGE")
+
+
+class Lot:
+    """Open quantity bought (long) or sold short at one price and time."""
+
+    __slots__ = ("quantity", "price", "open_ns")
+
+    def __init__(self, quantity: float, price: float, open_ns: Optional[int]):
+        self.quantity = quantity
+        self.price = price
+        self.open_ns = open_ns
+
+
+class ClosedLots:
+    """
+    Columnar record of closed lot pieces, one row per (lot, closing fill)
+    pair, for per-lot realized P&L and holding periods.
+    """
+
+    _FIELDS = ("symbol", "direction", "quantity", "open_price", "close_price",
+               "open_ns", "close_ns", "realized_pnl")
+
+    def __init__(self):
+        self._rows: Dict[str, list] = {name: [] for name in self._FIELDS}
+
+    def __len__(self) -> int:
+        return len(self._rows["symbol"])
+
+    def append(self, symbol, direction, quantity, open_price, close_price, open_ns, close_ns, pnl):
+        rows = self._rows
+        rows["symbol"].append(symbol)
+        rows["direction"].append(direction)
+        rows["quantity"].append(quantity)
+        rows["open_price"].append(open_price)
+        rows["close_price"].append(close_price)
+        rows["open_ns"].append(open_ns)
+        rows["close_ns"].append(close_ns)
+        rows["realized_pnl"].append(pnl)
+
+    def to_dataframe(self, tz=None) -> pd.DataFrame:
+        """Closed lots with open/close times and holding period."""
+        rows = self._rows
+        open_ns = np.array([np.nan if t is None else t for t in rows["open_ns"]], dtype=np.float64)
+        close_ns = np.asarray(rows["close_ns"], dtype=np.int64)
+
+        def times(ns):
+            idx = pd.to_datetime(ns, unit="ns", utc=tz is not None)
+            return idx.tz_convert(tz) if tz is not None else idx
+
+        df = pd.DataFrame({
+            "symbol": rows["symbol"],
+            "direction": np.where(np.asarray(rows["direction"]) > 0, "LONG", "SHORT"),
+            "quantity": np.asarray(rows["quantity"], dtype=np.float64),
+            "open_price": np.asarray(rows["open_price"], dtype=np.float64),
+            "close_price": np.asarray(rows["close_price"], dtype=np.float64),
+            "opened": times(open_ns),
+            "closed": times(close_ns),
+            "realized_pnl": np.asarray(rows["realized_pnl"], dtype=np.float64),
+        })
+        df["holding_period"] = df["closed"] - df["opened"]
+        return df
+
+
+class LotQueue:
+    """
+    Open lots of one symbol, all on the same side.
+
+    Lots sit in a deque in opening order. A closing fill consumes lots
+    from the left (FIFO) or the right (LIFO), each fully consumed lot is a
+    single pop, so closing costs amortized O(1) per lot. AVERAGE realizes
+    P&L against the running average cost and consumes lots in FIFO order
+    only for holding periods.
+
+    quantity is signed (negative for shorts); cost is the total cost basis
+    of the open quantity, so avg_price = cost / |quantity|.
+    """
+
+    __slots__ = ("method", "lots", "quantity", "cost")
+
+    def __init__(self, method: str = "AVERAGE"):
+        method = method.upper()
+        if method not in LOT_METHODS:
+            raise ValueError(f"Unknown lot method '{method}'")
+        self.method = method
+        self.lots = deque()
+        self.quantity = 0.0
+        self.cost = 0.0
+
+    @property
+    def avg_price(self) -> float:
+        return self.cost / abs(self.quantity) if self.quantity != 0 else 0.0
+
+    def _open(self, signed_qty: float, price: float, ts_ns: Optional[int]) -> None:
+        self.lots.append(Lot(abs(signed_qty), price, ts_ns))
+        self.quantity += signed_qty
+        self.cost += abs(signed_qty) * price
+
+    def _close(self, qty: float, price: float, ts_ns, closed: Optional[ClosedLots], symbol) -> float:
+        direction = 1.0 if self.quantity > 0 else -1.0
+        average = self.method == "AVERAGE"
+        avg = self.avg_price
+        lifo = self.method == "LIFO"
+        lots = self.lots
+
+        realized = 0.0
+        cost_out = 0.0
+        remaining = qty
+        while remaining > 0 and lots:
+            lot = lots[-1] if lifo else lots[0]
+            take = lot.quantity if lot.quantity <= remaining else remaining
+            basis = avg if average else lot.price
+            pnl = direction * (price - basis) * take
+            realized += pnl
+            cost_out += basis * take
+            if closed is not None:
+                closed.append(symbol, direction, take, basis, price, lot.open_ns, ts_ns, pnl)
+
+            if take == lot.quantity:
+                if lifo:
+                    lots.pop()
+                else:
+                    lots.popleft()
+            else:
+                lot.quantity -= take
+            remaining -= take
+
+        self.quantity -= direction * qty
+        if not lots or self.quantity == 0:
+            lots.clear()
+            self.quantity = 0.0
+            self.cost = 0.0
+        else:
+            self.cost -= cost_out
+        return realized
+
+    def fill(
+        self,
+        signed_qty: float,
+        price: float,
+        ts_ns: Optional[int] = None,
+        closed: Optional[ClosedLots] = None,
+        symbol: Optional[str] = None,
+    ) -> float:
+        """Apply a fill (positive = buy); returns the realized P&L."""
+        if signed_qty == 0:
+            return 0.0
+        if self.quantity == 0 or (self.quantity > 0) == (signed_qty > 0):
+            self._open(signed_qty, price, ts_ns)
+            return 0.0
+
+        closing = min(abs(signed_qty), abs(self.quantity))
+        realized = self._close(closing, price, ts_ns, closed, symbol)
+        rest = abs(signed_qty) - closing
+        if rest > 0:
+            self._open(rest if signed_qty > 0 else -rest, price, ts_ns)
+        return realized
+
+    def open_lots(self) -> List[Lot]:
+        return list(self.lots)
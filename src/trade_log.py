@@ -0,0 +1,191 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.order import SIDE_NAMES, Side
+
+
+@dataclass
+class TradeRecord:
+    timestamp: datetime
+    symbol: str
+    side: str
+    quantity: float
+    price: float
+    realized_pnl: float
+    position_after: float
+    strategy: Optional[str] = None
+
+
+_COLUMNS = (
+    ("timestamp", np.int64),
+    ("symbol_id", np.int32),
+    ("side", np.int8),
+    ("quantity", np.float64),
+    ("price", np.float64),
+    ("realized_pnl", np.float64),
+    ("position_after", np.float64),
+    ("strategy_id", np.int32),
+)
+
+
+class TradeLog:
+    """
+    Columnar fill log.
+
+    One preallocated typed array per column (timestamp ns, symbol id, side
+    code, quantity, price, realized P&L, position after, strategy id),
+    grown by doubling, so append is amortized O(1) and allocates no Python
+    objects. Symbols and strategies are interned into small tables; a
+    strategy id of -1 means no strategy. Column properties are views of
+    the filled part, and to_dataframe() wraps them without copying the
+    numeric columns (labels become categoricals over the id arrays).
+
+    Indexing and iteration still give TradeRecord objects, built on demand.
+    """
+
+    def __init__(self, capacity: int = 1024, tz=None):
+        capacity = max(1, int(capacity))
+        self._cols: Dict[str, np.ndarray] = {
+            name: np.empty(capacity, dtype=dtype) for name, dtype in _COLUMNS
+        }
+        self._size = 0
+        self.symbols: List[str] = []
+        self.strategies: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        self._strategy_ids: Dict[str, int] = {}
+        # timezone of the fill timestamps, used when building DataFrames
+        self.tz = tz
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self) -> None:
+        new_cap = 2 * len(self._cols["timestamp"])
+        for name, col in self._cols.items():
+            new = np.empty(new_cap, dtype=col.dtype)
+            new[: self._size] = col[: self._size]
+            self._cols[name] = new
+
+    def _intern(self, table: List[str], ids: Dict[str, int], key: str) -> int:
+        i = ids.get(key)
+        if i is None:
+            i = len(table)
+            ids[key] = i
+            table.append(key)
+        return i
+
+    def append(
+        self,
+        ts_ns: int,
+        symbol: str,
+        side: int,
+        quantity: float,
+        price: float,
+        realized_pnl: float,
+        position_after: float,
+        strategy: Optional[str] = None,
+    ) -> None:
+        if self._size == len(self._cols["timestamp"]):
+            self._grow()
+        i = self._size
+        cols = self._cols
+        cols["timestamp"][i] = ts_ns
+        cols["symbol_id"][i] = self._intern(self.symbols, self._symbol_ids, symbol)
+        cols["side"][i] = side
+        cols["quantity"][i] = quantity
+        cols["price"][i] = price
+        cols["realized_pnl"][i] = realized_pnl
+        cols["position_after"][i] = position_after
+        cols["strategy_id"][i] = (
+            -1 if strategy is None else self._intern(self.strategies, self._strategy_ids, strategy)
+        )
+        self._size = i + 1
+
+    # column views
+
+    def column(self, name: str) -> np.ndarray:
+        return self._cols[name][: self._size]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.column("timestamp")
+
+    @property
+    def realized_pnl(self) -> np.ndarray:
+        return self.column("realized_pnl")
+
+    def symbol_labels(self) -> np.ndarray:
+        """Symbol per fill as an object array."""
+        table = np.array(self.symbols, dtype=object)
+        return table[self.column("symbol_id")]
+
+    def strategy_labels(self) -> np.ndarray:
+        """Strategy per fill as an object array (None where unknown)."""
+        table = np.array(self.strategies + [None], dtype=object)
+        return table[self.column("strategy_id")]  # -1 picks the trailing None
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Columns in the TRADE_COLUMNS layout; side as int codes (1 = buy)."""
+        return {
+            "timestamp": self.timestamps,
+            "symbol": self.symbol_labels(),
+            "side": self.column("side"),
+            "quantity": self.column("quantity"),
+            "price": self.column("price"),
+            "realized_pnl": self.realized_pnl,
+            "position_after": self.column("position_after"),
+            "strategy": self.strategy_labels(),
+        }
+
+    def _index(self) -> pd.DatetimeIndex:
+        index = pd.DatetimeIndex(self.timestamps.view("datetime64[ns]"), name="timestamp")
+        if self.tz is not None:
+            index = index.tz_localize("UTC").tz_convert(self.tz)
+        return index
+
+    def to_dataframe(self) -> pd.DataFrame:
+        side_names = [SIDE_NAMES[Side.BUY], SIDE_NAMES[Side.SELL]]
+        return pd.DataFrame(
+            {
+                "symbol": pd.Categorical.from_codes(self.column("symbol_id"), self.symbols),
+                "side": pd.Categorical.from_codes(self.column("side") - 1, side_names),
+                "quantity": self.column("quantity"),
+                "price": self.column("price"),
+                "realized_pnl": self.realized_pnl,
+                "position_after": self.column("position_after"),
+                "strategy": pd.Categorical.from_codes(self.column("strategy_id"), self.strategies),
+            },
+            index=self._index(),
+            copy=False,
+        )
+
+    # record access
+
+    def __getitem__(self, i: int) -> TradeRecord:
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("trade index out of range")
+        cols = self._cols
+        ts = pd.Timestamp(int(cols["timestamp"][i]))
+        if self.tz is not None:
+            ts = ts.tz_localize("UTC").tz_convert(self.tz)
+        strategy_id = int(cols["strategy_id"][i])
+        return TradeRecord(
+            timestamp=ts,
+            symbol=self.symbols[int(cols["symbol_id"][i])],
+            side=SIDE_NAMES[Side(int(cols["side"][i]))],
+            quantity=float(cols["quantity"][i]),
+            price=float(cols["price"][i]),
+            realized_pnl=float(cols["realized_pnl"][i]),
+            position_after=float(cols["position_after"][i]),
+            strategy=None if strategy_id < 0 else self.strategies[strategy_id],
+        )
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self[i]
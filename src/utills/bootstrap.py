@@ -0,0 +1,162 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def bootstrap_indices(
+    n: int,
+    n_resamples: int,
+    mean_block: float,
+    method: str = "stationary",
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """
+    All resamples at once as an (n_resamples, n) index matrix.
+
+    method="stationary" draws geometric block lengths with the given mean
+    (Politis and Romano), method="block" uses fixed length circular blocks.
+    Blocks wrap around the end of the series.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if n <= 0 or n_resamples <= 0:
+        return np.empty((max(n_resamples, 0), max(n, 0)), dtype=np.int64)
+
+    if method == "stationary":
+        p = 1.0 / max(mean_block, 1.0)
+        new_block = rng.random((n_resamples, n), dtype=np.float32) < p
+        new_block[:, 0] = True
+    elif method == "block":
+        block = max(int(round(mean_block)), 1)
+        new_block = np.broadcast_to(np.arange(n) % block == 0, (n_resamples, n))
+    else:
+        raise ValueError(f"Unknown bootstrap method '{method}'")
+
+    # work on the flattened matrix; every row starts a block, so blocks
+    # never span two resamples
+    flat = new_block.ravel()
+    block_pos = np.flatnonzero(flat)
+    block_id = np.cumsum(flat) - 1
+    starts = rng.integers(0, n, size=len(block_pos))
+    offset = np.arange(flat.size) - block_pos[block_id]
+    return ((starts[block_id] + offset) % n).reshape(n_resamples, n)
+
+
+def _align_returns(returns: Sequence[np.ndarray]) -> np.ndarray:
+    """Stack return series into a (configs, n) matrix, keeping the common tail."""
+    n = min(len(r) for r in returns)
+    return np.vstack([np.asarray(r, dtype=np.float64)[len(r) - n:] for r in returns])
+
+
+def bootstrap_sharpe(
+    returns: Sequence[np.ndarray],
+    ppy: float = 1.0,
+    n_resamples: int = 5000,
+    mean_block: Optional[float] = None,
+    method: str = "stationary",
+    seed: Optional[int] = None,
+    chunk_size: int = 500,
+) -> np.ndarray:
+    """
+    Bootstrapped annualized Sharpe ratios, shape (n_resamples, configs).
+
+    Every configuration is resampled with the same index matrix, so the
+    draws are paired and can be compared across configurations. Each
+    resample only needs per index counts: sums and sums of squares for all
+    configurations come from one matrix product per chunk of resamples.
+    """
+    R = _align_returns(returns)
+    k, n = R.shape
+    if n < 2:
+        return np.full((n_resamples, k), np.nan)
+
+    if mean_block is None:
+        mean_block = max(1.0, n ** (1.0 / 3.0))
+
+    rng = np.random.default_rng(seed)
+    out = np.empty((n_resamples, k))
+    R2 = R * R
+
+    for lo in range(0, n_resamples, chunk_size):
+        b = min(chunk_size, n_resamples - lo)
+        idx = bootstrap_indices(n, b, mean_block, method=method, rng=rng)
+        flat = idx + (np.arange(b) * n)[:, None]
+        counts = np.bincount(flat.ravel(), minlength=b * n).reshape(b, n).astype(np.float64)
+
+        s1 = counts @ R.T
+        s2 = counts @ R2.T
+        mean = s1 / n
+        var = np.maximum(s2 - s1 * mean, 0.0) / (n - 1)
+        std = np.sqrt(var)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[lo:lo + b] = np.where(std > 0, mean / std, np.nan) * np.sqrt(ppy)
+
+    return out
+
+
+def sharpe_confidence_intervals(
+    samples: np.ndarray,
+    labels: Optional[List[str]] = None,
+    confidence: float = 0.95,
+) -> pd.DataFrame:
+    """Percentile confidence intervals per configuration."""
+    alpha = (1.0 - confidence) / 2.0
+    lo, med, hi = np.nanquantile(samples, [alpha, 0.5, 1.0 - alpha], axis=0)
+    return pd.DataFrame(
+        {
+            "sharpe_median": med,
+            "ci_low": lo,
+            "ci_high": hi,
+            "std_error": np.nanstd(samples, axis=0, ddof=1),
+        },
+        index=labels,
+    )
+
+
+def outperformance_matrix(
+    samples: np.ndarray,
+    labels: Optional[List[str]] = None,
+    chunk_size: int = 1000,
+) -> pd.DataFrame:
+    """
+    Entry (i, j) is the fraction of resamples where configuration i has a
+    higher Sharpe than configuration j.
+    """
+    b, k = samples.shape
+    wins = np.zeros((k, k))
+    valid = np.zeros((k, k))
+    for lo in range(0, b, chunk_size):
+        s = samples[lo:lo + chunk_size]
+        ok = ~np.isnan(s)
+        wins += (s[:, :, None] > s[:, None, :]).sum(axis=0)
+        valid += (ok[:, :, None] & ok[:, None, :]).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prob = np.where(valid > 0, wins / valid, np.nan)
+    return pd.DataFrame(prob, index=labels, columns=labels)
+
+
+def sweep_bootstrap_report(
+    runs: Dict[str, np.ndarray],
+    ppy: float,
+    n_resamples: int = 5000,
+    confidence: float = 0.95,
+    **kwargs,
+):
+    """
+    Convenience wrapper for the sensitivity driver.
+
+    runs maps a configuration label to its per bar return series. Returns
+    (ci_table, outperformance_matrix).
+    """
+    labels = list(runs.keys())
+    samples = bootstrap_sharpe(
+        [runs[label] for label in labels],
+        ppy=ppy,
+        n_resamples=n_resamples,
+        **kwargs,
+    )
+    return (
+        sharpe_confidence_intervals(samples, labels, confidence=confidence),
+        outperformance_matrix(samples, labels),
+    )
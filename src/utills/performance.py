@@ -1,3 +1,5 @@
+from typing import Dict, Tuple
+
 import pandas as pd
 import numpy as np
 
@@ -118,4 +120,374 @@ class PerformanceCalculator:
         for key, value in metrics.items():
             metrics[key] = round(value, 4)
             
-        return metrics
\ No newline at end of file
+        return metrics
+
+# ---------------------------------------------------------------------------
+# Vectorized analytics on equity arrays and trade logs
+# ---------------------------------------------------------------------------
+#
+# All functions below work on plain NumPy arrays: equity as float64 and
+# timestamps as int64 nanoseconds (as stored by EquityCurve), and a trade
+# log given as a mapping of column name -> array (a DataFrame works too).
+# Each metric is a single pass of NumPy operations, so they stay fast on
+# millions of equity points.
+
+SECONDS_PER_YEAR = 365.0 * 24.0 * 60.0 * 60.0
+
+TRADE_COLUMNS = [
+    "timestamp",
+    "symbol",
+    "side",
+    "quantity",
+    "price",
+    "realized_pnl",
+    "position_after",
+    "strategy",
+]
+
+
+def returns_from_equity(equity) -> np.ndarray:
+    """Simple per bar returns, skipping bars where the previous value is 0."""
+    eq = np.asarray(equity, dtype=np.float64)
+    if len(eq) < 2:
+        return np.empty(0, dtype=np.float64)
+    prev = eq[:-1]
+    mask = prev != 0
+    return (eq[1:][mask] - prev[mask]) / prev[mask]
+
+
+def periods_per_year(timestamps) -> float:
+    """Bars per year from the median bar spacing, as used for annualization."""
+    ts = np.asarray(timestamps, dtype=np.int64)
+    if len(ts) < 2:
+        return 0.0
+    dt_sec = float(np.median(np.diff(ts))) / 1e9
+    if dt_sec <= 0:
+        return 0.0
+    return SECONDS_PER_YEAR / dt_sec
+
+
+def sharpe_ratio(returns, ppy: float) -> float | None:
+    """Annualized Sharpe ratio (rf=0, ddof=1)."""
+    r = np.asarray(returns, dtype=np.float64)
+    if len(r) < 2 or ppy <= 0:
+        return None
+    std = r.std(ddof=1)
+    if std == 0:
+        return None
+    return float(r.mean() / std * np.sqrt(ppy))
+
+
+def sortino_ratio(returns, ppy: float) -> float | None:
+    """Annualized Sortino ratio (rf=0, downside deviation over all bars)."""
+    r = np.asarray(returns, dtype=np.float64)
+    if len(r) < 2 or ppy <= 0:
+        return None
+    downside = np.sqrt(np.mean(np.minimum(r, 0.0) ** 2))
+    if downside == 0:
+        return None
+    return float(r.mean() / downside * np.sqrt(ppy))
+
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sum over the window bars ending at each bar, NaN for the first
+    window - 1 entries. O(n) time and memory.
+
+    Prefix sums restart every window bars, so each window sum combines at
+    most two partial block sums and its rounding error scales with the
+    window's own values, not with a prefix over the whole series.
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if window <= 0 or n < window:
+        return out
+    blocks = -(-n // window)
+    c = np.zeros(blocks * window)
+    c[:n] = x
+    c = np.cumsum(c.reshape(blocks, window), axis=1).ravel()
+    s = c[window - 1:n].copy()
+    # windows ending at j >= window: rest of the previous block plus the
+    # current block up to j
+    j = np.arange(window, n)
+    s[1:] += c[(j // window) * window - 1] - c[j - window]
+    out[window - 1:] = s
+    return out
+
+
+def _rolling_mean_var(r: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling mean and variance (ddof=1), NaN for the first window - 1 entries.
+
+    Sums run over returns centred on their global mean, so the sum of
+    squares does not cancel against a large squared mean. A variance
+    below 1e-12 times the squared (raw or centred) window mean is rounding
+    noise and is set to 0.
+    """
+    if len(r) == 0:
+        return np.empty(0), np.empty(0)
+    mu = float(np.mean(r))
+    d = r - mu
+    m = _rolling_sum(d, window) / window
+    var = (_rolling_sum(d * d, window) / window - m * m) * (window / (window - 1))
+    mean = m + mu
+    with np.errstate(invalid="ignore"):
+        var[var < 1e-12 * np.maximum(mean * mean, m * m)] = 0.0
+    return mean, var
+
+
+def rolling_volatility(returns, window: int, ppy: float = 1.0) -> np.ndarray:
+    """Rolling annualized volatility (ddof=1) over `window` bars."""
+    r = np.asarray(returns, dtype=np.float64)
+    if window < 2:
+        raise ValueError("window must be at least 2")
+    _, var = _rolling_mean_var(r, window)
+    return np.sqrt(var) * np.sqrt(ppy)
+
+
+def rolling_sharpe(returns, window: int, ppy: float = 1.0) -> np.ndarray:
+    """Rolling annualized Sharpe ratio over `window` bars (NaN if flat)."""
+    r = np.asarray(returns, dtype=np.float64)
+    if window < 2:
+        raise ValueError("window must be at least 2")
+    mean, var = _rolling_mean_var(r, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = mean / np.sqrt(var) * np.sqrt(ppy)
+    out[~np.isfinite(out)] = np.nan
+    return out
+
+
+def rolling_sortino(returns, window: int, ppy: float = 1.0) -> np.ndarray:
+    """Rolling annualized Sortino ratio over `window` bars (NaN if no downside)."""
+    r = np.asarray(returns, dtype=np.float64)
+    if window < 1:
+        raise ValueError("window must be at least 1")
+    mean = _rolling_sum(r, window) / window
+    downside_sq = np.maximum(_rolling_sum(np.minimum(r, 0.0) ** 2, window), 0.0) / window
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = mean / np.sqrt(downside_sq) * np.sqrt(ppy)
+    out[~np.isfinite(out)] = np.nan
+    return out
+
+
+def drawdown_series(equity) -> np.ndarray:
+    """Drawdown from the running peak at every bar (0 or negative)."""
+    eq = np.asarray(equity, dtype=np.float64)
+    if len(eq) == 0:
+        return np.empty(0, dtype=np.float64)
+    peak = np.maximum.accumulate(eq)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(peak != 0, (eq - peak) / peak, 0.0)
+    return dd
+
+
+def max_drawdown(equity) -> float:
+    dd = drawdown_series(equity)
+    return float(dd.min()) if len(dd) else 0.0
+
+
+def max_drawdown_duration(equity, timestamps=None) -> Tuple[int, float | None]:
+    """
+    Longest time spent below a previous peak.
+
+    Returns (bars, seconds). Seconds is None when no timestamps are given.
+    """
+    eq = np.asarray(equity, dtype=np.float64)
+    n = len(eq)
+    if n == 0:
+        return 0, None if timestamps is None else 0.0
+
+    idx = np.arange(n)
+    peak = np.maximum.accumulate(eq)
+    # index of the most recent bar that was at the peak
+    last_peak = np.maximum.accumulate(np.where(eq >= peak, idx, 0))
+    bars = int((idx - last_peak).max())
+
+    if timestamps is None:
+        return bars, None
+    ts = np.asarray(timestamps, dtype=np.int64)
+    seconds = float((ts - ts[last_peak]).max()) / 1e9
+    return bars, seconds
+
+
+def calmar_ratio(equity, ppy: float) -> float | None:
+    """Annualized mean return divided by the absolute max drawdown."""
+    r = returns_from_equity(equity)
+    mdd = max_drawdown(equity)
+    if len(r) == 0 or ppy <= 0 or mdd == 0:
+        return None
+    return float(r.mean() * ppy / abs(mdd))
+
+
+def _trade_columns(trades) -> Dict[str, np.ndarray]:
+    """Normalize a trade log (mapping or DataFrame) into NumPy columns."""
+    if trades is None:
+        return {}
+    if isinstance(trades, pd.DataFrame):
+        df = trades
+        if "timestamp" not in df.columns and df.index.name == "timestamp":
+            df = df.reset_index()
+        cols = {c: df[c].to_numpy() for c in df.columns}
+    else:
+        cols = {c: np.asarray(v) for c, v in trades.items()}
+
+    ts = cols.get("timestamp")
+    if ts is not None and len(ts) and ts.dtype != np.int64:
+        idx = pd.DatetimeIndex(pd.to_datetime(ts, utc=True))
+        cols["timestamp"] = idx.as_unit("ns").asi8
+    return cols
+
+
+def _signed_quantity(cols: Dict[str, np.ndarray]) -> np.ndarray:
+    qty = cols["quantity"].astype(np.float64)
+    side = cols["side"]
+    if side.dtype.kind in "iu":
+        # integer side codes: 1 = buy, anything else = sell
+        is_buy = side == 1
+    else:
+        is_buy = np.char.upper(side.astype(str)) == "BUY"
+    return np.where(is_buy, qty, -qty)
+
+
+def turnover(trades, equity) -> float:
+    """Total traded notional divided by average equity."""
+    cols = _trade_columns(trades)
+    eq = np.asarray(equity, dtype=np.float64)
+    if not cols or len(cols["quantity"]) == 0 or len(eq) == 0:
+        return 0.0
+    avg_eq = eq.mean()
+    if avg_eq == 0:
+        return 0.0
+    notional = np.abs(cols["quantity"].astype(np.float64) * cols["price"].astype(np.float64))
+    return float(notional.sum() / avg_eq)
+
+
+def exposure(trades, timestamps) -> float:
+    """
+    Fraction of bars with at least one open position.
+
+    Positions are rebuilt from the trade log's position_after column and
+    mapped onto the bar timestamps with a binary search per symbol.
+    """
+    cols = _trade_columns(trades)
+    ts = np.asarray(timestamps, dtype=np.int64)
+    if not cols or len(cols["quantity"]) == 0 or len(ts) == 0:
+        return 0.0
+
+    trade_ts = cols["timestamp"]
+    pos_after = cols["position_after"].astype(np.float64)
+    symbols, sym_idx = np.unique(cols["symbol"].astype(str), return_inverse=True)
+
+    invested = np.zeros(len(ts), dtype=bool)
+    for k in range(len(symbols)):
+        mask = sym_idx == k
+        s_ts = trade_ts[mask]
+        s_pos = pos_after[mask]
+        order = np.argsort(s_ts, kind="stable")
+        s_ts = s_ts[order]
+        s_pos = s_pos[order]
+        # last trade at or before each bar
+        j = np.searchsorted(s_ts, ts, side="right") - 1
+        held = np.where(j >= 0, s_pos[np.maximum(j, 0)], 0.0)
+        invested |= held != 0
+    return float(invested.mean())
+
+
+def attribution(trades, by: str = "symbol") -> pd.DataFrame:
+    """
+    Realized P&L, fill count and traded notional grouped by a trade column
+    ("symbol" or "strategy").
+    """
+    cols = _trade_columns(trades)
+    columns = ["realized_pnl", "num_fills", "traded_value"]
+    if not cols or len(cols.get("quantity", [])) == 0 or by not in cols:
+        return pd.DataFrame(columns=columns)
+
+    keys = cols[by]
+    keys = np.where(pd.isna(keys), "N/A", keys).astype(str)
+    labels, inv = np.unique(keys, return_inverse=True)
+
+    pnl = cols["realized_pnl"].astype(np.float64)
+    notional = np.abs(cols["quantity"].astype(np.float64) * cols["price"].astype(np.float64))
+
+    df = pd.DataFrame(
+        {
+            "realized_pnl": np.bincount(inv, weights=pnl, minlength=len(labels)),
+            "num_fills": np.bincount(inv, minlength=len(labels)),
+            "traded_value": np.bincount(inv, weights=notional, minlength=len(labels)),
+        },
+        index=pd.Index(labels, name=by),
+    )
+    return df.sort_values("realized_pnl", ascending=False)
+
+
+def trade_statistics(trades) -> Dict[str, float]:
+    """
+    Statistics over closing fills (fills that reduce an open position).
+    """
+    cols = _trade_columns(trades)
+    if not cols or len(cols["quantity"]) == 0:
+        return {"num_fills": 0, "num_closing_trades": 0}
+
+    pnl = cols["realized_pnl"].astype(np.float64)
+    after = cols["position_after"].astype(np.float64)
+    before = after - _signed_quantity(cols)
+    closing = np.abs(after) < np.abs(before)
+
+    closed = pnl[closing]
+    wins = closed[closed > 0]
+    losses = closed[closed < 0]
+    n = len(closed)
+
+    gross_win = float(wins.sum())
+    gross_loss = float(-losses.sum())
+
+    return {
+        "num_fills": int(len(pnl)),
+        "num_closing_trades": int(n),
+        "total_realized_pnl": float(pnl.sum()),
+        "wins": int(len(wins)),
+        "losses": int(len(losses)),
+        "win_rate": len(wins) / n if n else 0.0,
+        "avg_win": float(wins.mean()) if len(wins) else 0.0,
+        "avg_loss": float(losses.mean()) if len(losses) else 0.0,
+        "largest_win": float(wins.max()) if len(wins) else 0.0,
+        "largest_loss": float(losses.min()) if len(losses) else 0.0,
+        "profit_factor": gross_win / gross_loss if gross_loss > 0 else None,
+        "expectancy": float(closed.mean()) if n else 0.0,
+    }
+
+
+def performance_summary(equity, timestamps, trades=None) -> Dict[str, float]:
+    """
+    One dictionary with the headline metrics for a run. Used by the
+    backtester report and by the sensitivity driver.
+    """
+    eq = np.asarray(equity, dtype=np.float64)
+    ts = np.asarray(timestamps, dtype=np.int64)
+    if len(eq) == 0:
+        return {}
+
+    rets = returns_from_equity(eq)
+    ppy = periods_per_year(ts)
+    dd_bars, dd_seconds = max_drawdown_duration(eq, ts)
+
+    summary = {
+        "start_equity": float(eq[0]),
+        "end_equity": float(eq[-1]),
+        "total_return": float(eq[-1] / eq[0] - 1.0) if eq[0] != 0 else 0.0,
+        "volatility": float(rets.std(ddof=1) * np.sqrt(ppy)) if len(rets) > 1 and ppy > 0 else None,
+        "sharpe": sharpe_ratio(rets, ppy),
+        "sortino": sortino_ratio(rets, ppy),
+        "max_drawdown": max_drawdown(eq),
+        "max_drawdown_bars": dd_bars,
+        "max_drawdown_seconds": dd_seconds,
+        "calmar": calmar_ratio(eq, ppy),
+    }
+
+    if trades is not None:
+        summary["turnover"] = turnover(trades, eq)
+        summary["exposure"] = exposure(trades, ts)
+        summary.update(trade_statistics(trades))
+
+    return summary
@@ -0,0 +1,11 @@
+import pandas as pd
+
+
+def to_ns(ts) -> int:
+    """int64 nanoseconds of an int, pd.Timestamp or anything pd.Timestamp parses."""
+    if isinstance(ts, int):
+        return ts
+    value = getattr(ts, "value", None)
+    if isinstance(value, int):
+        return value
+    return pd.Timestamp(ts).value